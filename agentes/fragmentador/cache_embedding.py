@@ -0,0 +1,79 @@
+"""
+Módulo para cachear embeddings en memoria y en base de datos.
+"""
+
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from nucleo.base_datos.modelos import Database
+
+class EmbeddingCache:
+    """Cachea embeddings por modelo y hash de texto con un LRU en memoria delante de PostgreSQL."""
+
+    # LRU compartido por todas las instancias del proceso
+    _memoria: OrderedDict = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, modelo: str, capacidad: int = 10000, persistente: bool = True, db: Optional[Database] = None):
+        self.modelo = modelo
+        self.capacidad = capacidad
+        self.persistente = persistente
+        self.db = db or (Database() if persistente else None)
+        self.estadisticas = {'aciertos_memoria': 0, 'aciertos_bd': 0, 'fallos': 0}
+
+    @staticmethod
+    def calcular_hash(texto: str) -> str:
+        """Calcula el hash SHA256 de un texto."""
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def buscar(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Devuelve los embeddings cacheados para los hashes dados."""
+        encontrados = {}
+        unicos = set(hashes)
+
+        # Consultar primero la memoria
+        with self._lock:
+            for hash_texto in unicos:
+                clave = (self.modelo, hash_texto)
+                if clave in self._memoria:
+                    self._memoria.move_to_end(clave)
+                    encontrados[hash_texto] = self._memoria[clave]
+        self.estadisticas['aciertos_memoria'] += len(encontrados)
+
+        # Consultar la base de datos solo para los que faltan
+        pendientes = [h for h in unicos if h not in encontrados]
+        if pendientes and self.persistente:
+            persistidos = {
+                hash_texto: np.asarray(vector, dtype=np.float32)
+                for hash_texto, vector in self.db.obtener_embeddings_cache(self.modelo, pendientes).items()
+            }
+            self._guardar_memoria(persistidos)
+            encontrados.update(persistidos)
+            self.estadisticas['aciertos_bd'] += len(persistidos)
+
+        self.estadisticas['fallos'] += len(unicos) - len(encontrados)
+        return encontrados
+
+    def guardar(self, vectores: Dict[str, np.ndarray]) -> None:
+        """Guarda nuevos embeddings en memoria y, si procede, en base de datos."""
+        if not vectores:
+            return
+        self._guardar_memoria(vectores)
+        if self.persistente:
+            self.db.insertar_embeddings_cache(
+                self.modelo,
+                [(hash_texto, vector.tolist()) for hash_texto, vector in vectores.items()]
+            )
+
+    def _guardar_memoria(self, vectores: Dict[str, np.ndarray]) -> None:
+        """Inserta embeddings en el LRU descartando los menos usados."""
+        with self._lock:
+            for hash_texto, vector in vectores.items():
+                clave = (self.modelo, hash_texto)
+                self._memoria[clave] = vector
+                self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.capacidad:
+                self._memoria.popitem(last=False)
@@ -5,66 +5,96 @@ Módulo para descargar con seguridad los documentos PDF.
 import io
 import requests
 from typing import Optional
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 from nucleo.configuracion.configuracion import Config
-from servicios.utilidades.adaptador_ssl import CustomSSLAdapter
+from servicios.utilidades.cliente_http import ClienteHttp
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+from servicios.utilidades.validadores_http import ValidadoresHttp
+from agentes.rastreador.verificador_pdf import FIRMA_PDF, TAMANO_CABECERA
 
 class PdfDownloader:
     """Descarga documentos PDF a partir de URLs."""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, almacen: Optional[AlmacenPdf] = None,
+                 validadores: Optional[ValidadoresHttp] = None):
         self.config = config
-        self.session = self._configurar_sesion()
+        self.almacen = almacen or AlmacenPdf()
+        self.validadores = validadores or ValidadoresHttp()
+        self.session = ClienteHttp.compartido(config).session
 
-    def _configurar_sesion(self):
-        """Configura una sesión HTTP segura para descargas."""
-        session = requests.Session()
-        session.mount('https://', CustomSSLAdapter(max_retries=3))
-        session.mount('http://', CustomSSLAdapter(max_retries=3))
-        session.headers.update({'User-Agent': self.config.SCRAPING_CONFIG['user_agent']})
-        session.verify = False # Desactiva verificación SSL
-        session.trust_env = False
-        return session
-    
-    def download(self, url: str) -> Optional[io.BytesIO]:
-        """Descarga un documento PDF desde la URL proporcionada y lo guarda en memoria."""
+    def download(self, url: str, hash_sha256: Optional[str] = None) -> Optional[io.BytesIO]:
+        """Obtiene el PDF del almacén local o lo descarga desde la URL proporcionada, y lo carga en memoria."""
+        if url.startswith('file://'):
+            return self._leer_local(url)
+
+        # Reutilizar el contenido exacto del documento o, si no, la descarga reciente de la URL
+        pdf_content = (self.almacen.abrir(hash_sha256) if hash_sha256 else None) or \
+                      (self.almacen.abrir(entrada['hash']) if (entrada := self.almacen.entrada_url(url, vigente=True)) else None)
+        if pdf_content:
+            return pdf_content
+
+        # Una descarga anterior de la URL se reutiliza si el servidor confirma que no ha cambiado
+        validador = self.validadores.para_almacen(url, self.almacen)
         try:
             response = self.session.get(
                 url,
                 timeout=self.config.SCRAPING_CONFIG['timeout'],
-                stream=True
+                stream=True,
+                headers=self.validadores.cabeceras(validador)
             )
-            response.raise_for_status()
-            
-            # Verificar que el contenido sea realmente un PDF
-            content_type = response.headers.get('content-type', '').lower()
-            if 'application/pdf' not in content_type:
-                print(f"El contenido no es un PDF válido (Content-Type: {content_type})")
-                return None
+            if response.status_code == 304 and validador:
+                response.close()
+                entrada = self.validadores.confirmar_almacen(url, validador, self.almacen)
+                if (pdf_content := self.almacen.abrir(entrada['hash'])):
+                    return pdf_content
+                response = self.session.get(url, timeout=self.config.SCRAPING_CONFIG['timeout'], stream=True)
+            # Cerrarla libera la conexión y el hueco del host aunque no se lea el cuerpo
+            with response:
+                response.raise_for_status()
             
-            # Descargar todo el contenido en memoria
-            pdf_content = io.BytesIO()
-            for chunk in response.iter_content(chunk_size=8192):
-                pdf_content.write(chunk)
+                # Descargar todo el contenido en memoria
+                pdf_content = io.BytesIO()
+                for chunk in response.iter_content(chunk_size=8192):
+                    pdf_content.write(chunk)
             
-            # Verificar que el PDF no esté vacío
-            if pdf_content.getbuffer().nbytes == 0:
-                print("El PDF descargado está vacío")
-                return None
+                # Verificar que el PDF no esté vacío
+                if pdf_content.getbuffer().nbytes == 0:
+                    print("El PDF descargado está vacío")
+                    return None
 
-            # Verificar estructura básica del PDF
-            pdf_content.seek(0)
-            magic_number = pdf_content.read(4)
-            if magic_number != b'%PDF':
-                print("El archivo no comienza con la firma PDF (%PDF)")
-                return None
+                # Mismo criterio que el verificador: la firma, no el Content-Type, y admitiendo bytes previos
+                pdf_content.seek(0)
+                if FIRMA_PDF not in pdf_content.read(TAMANO_CABECERA):
+                    print(f"El archivo no contiene la firma PDF ({FIRMA_PDF.decode()}) en su cabecera")
+                    return None
 
-            pdf_content.seek(0)
-            return pdf_content
+                hash_contenido, _ = self.almacen.guardar([pdf_content.getvalue()], url, response.headers.get('last-modified'))
+                self.validadores.guardar(url, response, hash_contenido)
+                pdf_content.seek(0)
+                return pdf_content
 
         except requests.exceptions.RequestException as e:
             print(f"Error de red al descargar PDF: {str(e)}")
             return None
         except Exception as e:
             print(f"Error inesperado al descargar PDF: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def _leer_local(self, url: str) -> Optional[io.BytesIO]:
+        """Carga en memoria un PDF local referenciado con una URL file://."""
+        try:
+            with open(url2pathname(urlparse(url).path), 'rb') as f:
+                pdf_content = io.BytesIO(f.read())
+
+            if FIRMA_PDF not in pdf_content.read(TAMANO_CABECERA):
+                print(f"El archivo no contiene la firma PDF ({FIRMA_PDF.decode()}) en su cabecera")
+                return None
+
+            pdf_content.seek(0)
+            return pdf_content
+
+        except OSError as e:
+            print(f"Error leyendo PDF local: {str(e)}")
+            return None
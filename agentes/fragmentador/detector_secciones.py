@@ -0,0 +1,110 @@
+"""
+Módulo para detectar encabezados de sección a partir de las métricas de fuente del PDF.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from statistics import median
+from typing import Dict, List, Optional
+
+# Numeración habitual de apartados (sobre texto ya normalizado): "3.", "3.1.", "iv.", "a)", "articulo 5.", "primero.-"
+PATRON_NUMERACION = re.compile(
+    r'^(?:(?:articulo|capitulo|anexo|apartado|base|seccion)\s+)?'
+    r'(?:\d+(?:\.\d+)*|[ivxlc]+[.)]|[a-z][.)]'
+    r'|(?:primer|segund|tercer|cuart|quint|sext|septim|octav|noven|decim)[oa][.)\-–:])'
+    r'[.)\-–:oa]*\s+'
+)
+
+def normalizar_titulo(titulo: str) -> str:
+    """Normaliza un título para búsquedas: minúsculas, sin tildes, numeración ni puntuación."""
+    texto = unicodedata.normalize('NFKD', titulo.strip().lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = PATRON_NUMERACION.sub('', texto + ' ', count=1)
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+class SectionDetector:
+    """Detecta encabezados por tamaño y grosor de fuente respecto al cuerpo de cada página."""
+
+    def __init__(self, factor_tamano: float = 1.15, max_caracteres: int = 120, max_niveles: int = 3):
+        self.factor_tamano = factor_tamano
+        self.max_caracteres = max_caracteres
+        self.max_niveles = max_niveles
+
+    def detectar(self, pagina, texto: str, zonas_tablas: List[tuple]) -> List[Dict]:
+        """Devuelve los encabezados de una página pdfplumber en orden de lectura."""
+        caracteres = [c for c in pagina.chars if c['text'].strip()]
+        if not caracteres:
+            return []
+
+        # El tamaño de cuerpo es el más frecuente de la página
+        tamano_cuerpo = Counter(round(c['size'], 1) for c in caracteres).most_common(1)[0][0]
+
+        encabezados, cursor = [], 0
+        for linea in pagina.extract_text_lines(strip=True, return_chars=True):
+            estilo = self._estilo_encabezado(linea, tamano_cuerpo, zonas_tablas)
+            if not estilo:
+                continue
+
+            anterior = encabezados[-1] if encabezados else None
+            if (anterior and anterior['estilo'] == estilo
+                    and linea['top'] - anterior['bottom'] < estilo[0] * 0.8):
+                # Título repartido en varias líneas consecutivas con el mismo estilo
+                anterior['titulo'] = f"{anterior['titulo']} {linea['text'].strip()}"
+                anterior['bottom'] = linea['bottom']
+                continue
+
+            posicion = texto.find(linea['text'].strip(), cursor)
+            cursor = posicion if posicion >= 0 else cursor
+            encabezados.append({
+                'titulo': linea['text'].strip(),
+                'estilo': estilo,
+                'top': linea['top'],
+                'bottom': linea['bottom'],
+                'posicion': cursor
+            })
+        return encabezados
+
+    def numerar(self, pagina: Dict, seccion_actual: Optional[Dict]) -> Optional[Dict]:
+        """Numera los encabezados de una página y devuelve la sección vigente al final de ella."""
+        pagina['seccion_inicial'] = seccion_actual
+        orden = seccion_actual['orden'] if seccion_actual else 0
+        for seccion in pagina['secciones']:
+            orden += 1
+            seccion['orden'] = orden
+            seccion['nivel'] = 1 # Provisional hasta conocer todos los estilos del documento
+            seccion['numero_pagina'] = pagina['numero_pagina']
+            seccion['titulo_normalizado'] = normalizar_titulo(seccion['titulo'])
+            seccion_actual = seccion
+        return seccion_actual
+
+    def asignar_niveles(self, secciones: List[Dict]) -> None:
+        """Asigna el nivel de cada encabezado del documento según la prominencia de su estilo."""
+        estilos = sorted({s['estilo'] for s in secciones}, key=lambda e: (-e[0], not e[1]))
+        niveles = {estilo: min(i + 1, self.max_niveles) for i, estilo in enumerate(estilos)}
+        for seccion in secciones:
+            seccion['nivel'] = niveles[seccion['estilo']]
+
+    def _estilo_encabezado(self, linea: Dict, tamano_cuerpo: float, zonas_tablas: List[tuple]) -> Optional[tuple]:
+        """Devuelve el estilo (tamaño, negrita) si la línea tiene aspecto de encabezado."""
+        texto = linea['text'].strip()
+        if not 3 <= len(texto) <= self.max_caracteres or not any(c.isalpha() for c in texto):
+            return None
+        if any(x0 <= linea['x0'] and top <= linea['top'] and linea['bottom'] <= bottom
+               for x0, top, x1, bottom in zonas_tablas):
+            return None
+
+        caracteres = [c for c in linea['chars'] if c['text'].strip()]
+        if not caracteres:
+            return None
+        tamano = round(median(c['size'] for c in caracteres), 1)
+        negrita = sum('bold' in c['fontname'].lower() for c in caracteres) >= 0.8 * len(caracteres)
+
+        if tamano >= tamano_cuerpo * self.factor_tamano:
+            return (tamano, negrita)
+        # Texto en negrita del tamaño del cuerpo: solo líneas cortas que no terminan como una frase
+        if (negrita and tamano >= tamano_cuerpo * 0.95 and len(texto.split()) <= 12
+                and not texto.endswith(('.', ',', ';'))):
+            return (tamano, negrita)
+        return None
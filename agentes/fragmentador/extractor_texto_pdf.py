@@ -4,63 +4,110 @@ Módulo para extraer texto y tablas de documentos PDF.
 
 import io
 import pdfplumber
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
+
+from .detector_secciones import SectionDetector
 
 class PdfContentExtractor:
     """Extrae texto y tablas estructuradas de documentos PDF."""
+
+    def __init__(self):
+        self.section_detector = SectionDetector()
     
     def extract_text(self, pdf_stream: io.BytesIO) -> List[Dict]:
         """Extrae el contenido textual y tabular de cada página de un PDF."""
         try:
-            with pdfplumber.open(pdf_stream) as pdf:
-                paginas = []
-                
-                for pagina_num, pagina in enumerate(pdf.pages, start=1):
-                    try:
-                        # Extraer texto simple de la página
-                        texto = pagina.extract_text() or ""
-                        
-                        # Extraer tablas con configuración mejorada
-                        tablas = pagina.extract_tables({
-                            "vertical_strategy": "lines", 
-                            "horizontal_strategy": "lines",
-                            "intersection_y_tolerance": 10,
-                            "intersection_x_tolerance": 10,
-                            "text_tolerance": 3,
-                            "text_x_tolerance": 3,
-                            "text_y_tolerance": 3
-                        })
-                    
-                        # Procesar tablas y convertirlas a texto estructurado
-                        texto_tablas = self._procesar_tablas(tablas, pagina_num)
-                        
-                        # Combinar texto y tablas
-                        texto_completo = texto + "\n\n" + texto_tablas if texto_tablas else texto
-
-                        if texto_completo.strip():
-                            paginas.append({
-                                'numero_pagina': pagina_num,
-                                'texto': texto_completo,
-                                'dimensiones': (pagina.width, pagina.height),
-                                'tiene_tablas': len(tablas) > 0,
-                                'num_tablas': len(tablas)
-                            })
-                    except Exception as e:
-                        print(f"Error extrayendo texto de página {pagina_num}: {str(e)}")
-                        continue
-
-                if not paginas:
-                    print("No se pudo extraer texto de ninguna página del PDF")
-                    return []
-
-                return paginas
+            paginas = list(self.iterar_paginas(pdf_stream))
+            if not paginas:
+                print("No se pudo extraer texto de ninguna página del PDF")
+                return []
+
+            self.section_detector.asignar_niveles([s for p in paginas for s in p['secciones']])
+            return paginas
         except pdfplumber.PDFSyntaxError as e:
             print(f"Error de sintaxis en el PDF: {str(e)}")
             return []
         except Exception as e:
             print(f"Error inesperado al procesar PDF: {str(e)}")
             return []
-        
+
+    def contar_paginas(self, pdf_stream: io.BytesIO) -> int:
+        """Cuenta las páginas del PDF sin analizar su contenido."""
+        try:
+            with pdfplumber.open(pdf_stream) as pdf:
+                return len(pdf.pages)
+        except Exception:
+            return 0
+        finally:
+            pdf_stream.seek(0)
+
+    def iterar_paginas(self, pdf_stream: io.BytesIO) -> Iterator[Dict]:
+        """Genera las páginas con texto una a una, liberando la caché de pdfplumber tras cada página.
+
+        Los niveles de las secciones son provisionales hasta conocer todos los estilos del documento
+        (ver SectionDetector.asignar_niveles). Los errores del documento se propagan al consumidor.
+        """
+        with pdfplumber.open(pdf_stream) as pdf:
+            seccion_actual = None
+
+            for pagina_num, pagina in enumerate(pdf.pages, start=1):
+                try:
+                    contenido = self._extraer_pagina(pagina, pagina_num)
+                except Exception as e:
+                    print(f"Error extrayendo texto de página {pagina_num}: {str(e)}")
+                    continue
+                finally:
+                    # Liberar los objetos analizados de la página para no acumularlos en el documento
+                    getattr(pagina, 'close', pagina.flush_cache)()
+
+                if contenido:
+                    seccion_actual = self.section_detector.numerar(contenido, seccion_actual)
+                    yield contenido
+
+    def _extraer_pagina(self, pagina, pagina_num: int) -> Optional[Dict]:
+        """Extrae el texto, las tablas y los encabezados de una página."""
+        # Extraer texto simple de la página
+        texto = pagina.extract_text() or ""
+
+        # Extraer tablas con configuración mejorada
+        tablas_encontradas = pagina.find_tables({
+            "vertical_strategy": "lines", 
+            "horizontal_strategy": "lines",
+            "intersection_y_tolerance": 10,
+            "intersection_x_tolerance": 10,
+            "text_tolerance": 3,
+            "text_x_tolerance": 3,
+            "text_y_tolerance": 3
+        })
+        tablas = [tabla.extract() for tabla in tablas_encontradas]
+
+        # Procesar tablas y convertirlas a texto estructurado
+        texto_tablas = self._procesar_tablas(tablas, pagina_num)
+
+        # Combinar texto y tablas
+        texto_completo = texto + "\n\n" + texto_tablas if texto_tablas else texto
+        if not texto_completo.strip():
+            return None
+
+        zonas_tablas = [tabla.bbox for tabla in tablas_encontradas]
+        return {
+            'numero_pagina': pagina_num,
+            'texto': texto_completo,
+            'dimensiones': (pagina.width, pagina.height),
+            'tiene_tablas': len(tablas) > 0,
+            'num_tablas': len(tablas),
+            'secciones': self._detectar_secciones(pagina, texto, zonas_tablas),
+            'posiciones_tablas': {i: bbox[1] for i, bbox in enumerate(zonas_tablas, 1)}
+        }
+
+    def _detectar_secciones(self, pagina, texto: str, zonas_tablas: List[tuple]) -> List[Dict]:
+        """Detecta los encabezados de la página sin interrumpir la extracción si falla."""
+        try:
+            return self.section_detector.detectar(pagina, texto, zonas_tablas)
+        except Exception as e:
+            print(f"Error detectando secciones de página {pagina.page_number}: {str(e)}")
+            return []
+
     def _procesar_tablas(self, tablas: List, pagina_num: int) -> str:
         """Convierte tablas extraídas de PDF a texto estructurado."""
         texto_tablas = ""
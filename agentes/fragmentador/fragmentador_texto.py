@@ -3,50 +3,114 @@ Módulo para dividir texto en fragmentos.
 """
 
 import re
+import threading
 from typing import List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# Patrones precompilados del marcado de tablas generado por el extractor
+PATRON_SEPARADOR_TABLA = re.compile(r'(--- TABLA \d+ PÁG \d+ ---)')
+PATRON_MARCADOR_TABLA = re.compile(r'--- TABLA (\d+) PÁG (\d+) ---')
+
 class TextSplitter:
     """Divide el texto en fragmentos más pequeños."""
-    
-    def __init__(self, chunk_size=1000, chunk_overlap=200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            add_start_index=True,
-            separators=["\n\n", "\n", "  ", " ", ""]
-        )
+
+    def __init__(self, chunk_size=1000, chunk_overlap=200, embedder=None):
+        self.embedder = embedder
+        self._chunk_size = chunk_size
+        self._chunk_overlap = chunk_overlap
+        self._text_splitter = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para_modelo(cls, embedder, chunk_size: int = 0, chunk_overlap: int = 25) -> 'TextSplitter':
+        """Crea un fragmentador que mide en tokens del modelo de embeddings sin superar su longitud máxima.
+
+        El modelo no se carga hasta dividir el primer texto (chunk_size 0: el límite del modelo).
+        """
+        return cls(chunk_size, chunk_overlap, embedder=embedder)
+
+    @property
+    def chunk_size(self) -> int:
+        if self.embedder is None:
+            return self._chunk_size
+        limite = self.embedder.max_seq_length - 2 # Reservar los tokens especiales [CLS] y [SEP]
+        return min(self._chunk_size or limite, limite)
+
+    @property
+    def chunk_overlap(self) -> int:
+        if self.embedder is None:
+            return self._chunk_overlap
+        return min(self._chunk_overlap, self.chunk_size // 2)
+
+    @property
+    def text_splitter(self) -> RecursiveCharacterTextSplitter:
+        with self._lock:
+            if self._text_splitter is None:
+                self._text_splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap,
+                    length_function=self.longitud,
+                    add_start_index=True,
+                    separators=["\n\n", "\n", "  ", " ", ""]
+                )
+            return self._text_splitter
+
+    def longitud(self, texto: str) -> int:
+        """Mide el texto en tokens del modelo o, sin modelo, en caracteres."""
+        if self.embedder is None:
+            return len(texto)
+        return self.embedder.contar_tokens(texto)
 
     def split(self, texto: str) -> List[str]:
-        """Divide el texto en fragmentos, preservando estructura de tablas."""
-        try:
-            partes = re.split(r'(--- TABLA \d+ PÁG \d+ ---)', texto)
-            chunks = []
-            i = 0
-
-            while i < len(partes):
-                parte = partes[i].strip()
-                if not parte:
-                    i += 1
-                    continue
-
-                if re.match(r'--- TABLA \d+ PÁG \d+ ---', parte):
-                    # Combinar marcador de tabla y contenido siguiente
-                    if i + 1 < len(partes):
-                        contenido_tabla = partes[i + 1].strip()
-                        chunk_tabla = f"{parte}\n{contenido_tabla}"
-                        chunks.append(chunk_tabla)
-                        i += 2
-                    else:
-                        chunks.append(parte)
-                        i += 1
+        """Divide el texto en fragmentos, preservando estructura de tablas.
+
+        Los errores se propagan: una página sin chunks por un fallo debe hacer fallar el trabajo de ingesta.
+        """
+        partes = PATRON_SEPARADOR_TABLA.split(texto)
+        chunks = []
+        i = 0
+
+        while i < len(partes):
+            parte = partes[i].strip()
+            if not parte:
+                i += 1
+                continue
+
+            if PATRON_MARCADOR_TABLA.match(parte):
+                # Combinar marcador de tabla y contenido siguiente
+                if i + 1 < len(partes):
+                    contenido_tabla = partes[i + 1].strip()
+                    chunks.extend(self._dividir_tabla(parte, contenido_tabla))
+                    i += 2
                 else:
-                    chunks.extend(self.text_splitter.split_text(parte))
+                    chunks.append(parte)
                     i += 1
+            else:
+                chunks.extend(self.text_splitter.split_text(parte))
+                i += 1
+
+        return chunks
+
+    def _dividir_tabla(self, marcador: str, contenido: str) -> List[str]:
+        """Divide por filas las tablas que superan el límite del modelo, repitiendo marcador y cabecera."""
+        chunk_tabla = f"{marcador}\n{contenido}"
+        if self.embedder is None or self.longitud(chunk_tabla) <= self.chunk_size:
+            return [chunk_tabla]
+
+        lineas = contenido.split("\n")
+        cabecera = [l for l in lineas[:2] if l.startswith("CABECERA:") or (l and set(l) == {"-"})]
+        prefijo = "\n".join([marcador] + cabecera)
+        longitud_prefijo = self.longitud(prefijo)
 
-            return chunks
-        
-        except Exception as e:
-            print(f"Error dividiendo texto en chunks: {str(e)}")
-            return []
\ No newline at end of file
+        # Los tokens de WordPiece no cruzan saltos de línea, así que las longitudes por fila se suman
+        chunks, actual, longitud_actual = [], [], longitud_prefijo
+        for fila in lineas[len(cabecera):]:
+            longitud_fila = self.longitud(fila)
+            if actual and longitud_actual + longitud_fila > self.chunk_size:
+                chunks.append("\n".join([prefijo] + actual))
+                actual, longitud_actual = [], longitud_prefijo
+            actual.append(fila)
+            longitud_actual += longitud_fila
+        if actual:
+            chunks.append("\n".join([prefijo] + actual))
+        return chunks
@@ -2,23 +2,108 @@
 Módulo para generar representaciones vectoriales.
 """
 
+import copy
+import threading
 import numpy as np
-from typing import List
+from typing import Dict, List, Optional
 from sentence_transformers import SentenceTransformer
 
+from nucleo.configuracion.configuracion import Config
+
+from .cache_embedding import EmbeddingCache
+from .modelo_onnx import OnnxEmbeddingModel
+
+BACKENDS = ('torch', 'onnx')
+
 class EmbeddingGenerator:
     """Genera embeddings vectoriales para fragmentos de texto."""
-    
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        self.model = SentenceTransformer(model_name)
-    
+
+    # Modelos cargados, compartidos entre instancias del proceso
+    _modelos: Dict[str, object] = {}
+    _lock = threading.Lock()
+    # El tokenizador rápido de HF no admite usos simultáneos ("Already borrowed"): encode se serializa
+    # por modelo y cada hilo que mide textos tiene su propia copia del tokenizador
+    _locks_codificacion: Dict[str, threading.Lock] = {}
+    _tokenizadores = threading.local()
+
+    def __init__(self, model_name: Optional[str] = None, config: Optional[Config] = None, backend: Optional[str] = None):
+        self.config = config or Config()
+        self.model_name = model_name or self.config.EMBEDDING_CONFIG['modelo']
+        self.backend = backend or self.config.EMBEDDING_CONFIG['backend']
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend de embeddings no soportado: {self.backend}")
+        self.cache = EmbeddingCache(
+            self.clave_modelo,
+            capacidad=self.config.EMBEDDING_CONFIG['cache_memoria'],
+            persistente=self.config.EMBEDDING_CONFIG['cache_persistente']
+        )
+
+    @property
+    def clave_modelo(self) -> str:
+        """Identifica modelo y backend, ya que los vectores cuantizados difieren ligeramente."""
+        return self.model_name if self.backend == 'torch' else f"{self.model_name}-onnx-int8"
+
+    @property
+    def model(self):
+        """Carga el modelo solo cuando hay textos que no están en caché."""
+        with self._lock:
+            if self.clave_modelo not in self._modelos:
+                if self.backend == 'onnx':
+                    self._modelos[self.clave_modelo] = OnnxEmbeddingModel(self.config.EMBEDDING_CONFIG['ruta_onnx'])
+                else:
+                    self._modelos[self.clave_modelo] = SentenceTransformer(self.model_name)
+                self._locks_codificacion[self.clave_modelo] = threading.Lock()
+            return self._modelos[self.clave_modelo]
+
+    @property
+    def tokenizer(self):
+        """Copia del tokenizador del modelo propia del hilo, para medir los textos como los mide el modelo."""
+        copias = getattr(self._tokenizadores, 'copias', None)
+        if copias is None:
+            copias = self._tokenizadores.copias = {}
+        if self.clave_modelo not in copias:
+            modelo = self.model
+            with self._locks_codificacion[self.clave_modelo]:
+                copias[self.clave_modelo] = copy.deepcopy(modelo.tokenizer)
+        return copias[self.clave_modelo]
+
+    def contar_tokens(self, texto: str) -> int:
+        """Número de tokens del texto sin los tokens especiales."""
+        return len(self.tokenizer(texto, add_special_tokens=False, verbose=False)['input_ids'])
+
+    @property
+    def max_seq_length(self) -> int:
+        """Número máximo de tokens que procesa el modelo; el resto se trunca."""
+        return self.model.max_seq_length
+
     def generate(self, chunks: List[str]) -> List[np.ndarray]:
         """Genera embeddings para cada fragmento de texto."""
         try:
             if not chunks:
                 return []
-            return self.model.encode(chunks, show_progress_bar=False)
-        
+
+            hashes = [self.cache.calcular_hash(chunk) for chunk in chunks]
+            vectores = self.cache.buscar(hashes)
+
+            # Codificar en un único lote los textos no cacheados, sin duplicados
+            pendientes = {h: chunk for h, chunk in zip(hashes, chunks) if h not in vectores}
+            if pendientes:
+                modelo = self.model
+                with self._locks_codificacion[self.clave_modelo]:
+                    nuevos = modelo.encode(list(pendientes.values()), show_progress_bar=False)
+                nuevos = dict(zip(pendientes.keys(), nuevos))
+                self.cache.guardar(nuevos)
+                vectores.update(nuevos)
+
+            return np.vstack([vectores[h] for h in hashes])
+
         except Exception as e:
             print(f"Error generando embeddings: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def encode(self, texto: str) -> np.ndarray:
+        """Genera el embedding de un único texto, como en las búsquedas por consulta."""
+        embeddings = self.generate([texto])
+        if len(embeddings) == 0:
+            raise ValueError("No se pudo generar el embedding de la consulta")
+        return embeddings[0]
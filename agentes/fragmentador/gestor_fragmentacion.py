@@ -3,17 +3,23 @@ Agente que coordina el flujo completo de descarga, extracción, fragmentación,
 vectorización y almacenamiento de documentos PDF.
 """
 
+import io
 import time
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
 
 from nucleo.configuracion.configuracion import Config
 from nucleo.base_datos.modelos import Database
-from servicios.monitoreo.recolector_metricas import MetricasManager
+from servicios.monitoreo.recolector_metricas import MetricasManager, MuestreoMemoria
 
 from .descargador_pdf import PdfDownloader
 from .extractor_texto_pdf import PdfContentExtractor
 from .fragmentador_texto import TextSplitter
 from .generador_embedding import EmbeddingGenerator
 from .titulador_seccion import SectionTitleGenerator
+from .pipeline_ingesta import PipelineIngesta
 
 class ChunkingAgent:
     """Agente principal de procesamiento de documentos PDF."""
@@ -24,77 +30,286 @@ class ChunkingAgent:
         self.metricas = MetricasManager()
         self.downloader = PdfDownloader(self.config)
         self.extractor = PdfContentExtractor()
-        self.splitter = TextSplitter()
         self.embedder = EmbeddingGenerator()
+        self.splitter = self._crear_splitter()
         self.title_generator = SectionTitleGenerator()
+        self._lock_metricas = threading.Lock()
+
+    def _crear_splitter(self) -> TextSplitter:
+        """Crea el fragmentador medido en tokens del modelo o, en modo clásico, en caracteres."""
+        ajustes = self.config.FRAGMENTACION_CONFIG
+        if ajustes['modo'] == 'caracteres':
+            return TextSplitter(ajustes['tamano_caracteres'], ajustes['solapamiento_caracteres'])
+        return TextSplitter.para_modelo(self.embedder, ajustes['tamano_tokens'], ajustes['solapamiento_tokens'])
 
     def procesar_documento(self, documento_id: int, pdf_url: str) -> bool:
         """Procesa un documento completo desde la URL hasta su almacenamiento vectorial."""
         start_time = time.time()
         try:
-            if self.db.documento_tiene_chunks(documento_id):
+            if self.db.documento_ingesta_completa(documento_id):
                 return True
-            
+            checkpoint = self.iniciar(documento_id, pdf_url)
+
             # Descargar PDF
-            pdf_stream = self.downloader.download(pdf_url)
+            pdf_stream = self.descargar(pdf_url, documento_id)
             if not pdf_stream:
-                print(f"No se pudo descargar el PDF de {pdf_url}")
-                return False
-            
-            # Extraer texto estructurado con tablas
-            paginas = self.extractor.extract_text(pdf_stream)
-            if not paginas:
-                print(f"No se pudo extraer texto del PDF {pdf_url}")
+                self.fallar(documento_id, "No se pudo descargar el PDF")
                 return False
-            
-            # Dividir texto en chunks y generar embeddings
-            total_chunks = 0
-            for pagina in paginas:
-                chunks = self.splitter.split(pagina['texto'])
-                if not chunks:
-                    continue
-                
-                embeddings = self.embedder.generate(chunks)
-                if len(embeddings) != len(chunks):
-                    print("No se pudo generar embeddings para todos los chunks")
-                    continue
-                
-                # Almacenar en base de datos
-                for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                    titulo_seccion = self.title_generator.generate(chunk, pagina['numero_pagina'], i+1)
-                    
-                    if not self.db.insertar_chunk_documento(
-                        documento_id=documento_id,
-                        chunk_texto=chunk,
-                        chunk_vector=embedding.tolist(),
-                        titulo_seccion=titulo_seccion,
-                        numero_pagina=pagina['numero_pagina']
-                    ):
-                        print(f"Error insertando chunk {i+1} de página {pagina['numero_pagina']}")
-                    else:
-                        total_chunks += 1
-
-            tiempo_procesamiento = time.time() - start_time
-            
-            self.metricas.registrar_procesamiento_documento(
-                tiene_texto=len(paginas) > 0,
-                tiene_tablas=any(p['tiene_tablas'] for p in paginas),
-                tiene_metadatos=True,
-                num_chunks=total_chunks,
-                caracteres_totales=sum(len(c['texto']) for c in paginas),
-                tiempo_procesamiento=tiempo_procesamiento
-            )
-        
+
+            # Los documentos muy largos se procesan página a página con memoria acotada
+            if self.usar_streaming(documento_id, pdf_stream):
+                return self.procesar_streaming(documento_id, pdf_stream, checkpoint) > 0
+
+            # Texto y embeddings de todo el documento en memoria
+            with MuestreoMemoria() as memoria:
+                # Extraer texto estructurado con tablas
+                paginas = self.extraer(pdf_stream, pdf_url)
+                if not paginas:
+                    self.fallar(documento_id, "No se pudo extraer texto del PDF")
+                    return False
+                self.indexar_secciones(documento_id, paginas)
+
+                # Reutilizar páginas sin cambios, dividir el resto en chunks y generar embeddings
+                pendientes = self.pendientes(paginas, checkpoint)
+                paginas_vectorizadas = self.reutilizar(documento_id, pendientes) + self.vectorizar(pendientes)
+            total_chunks = self.almacenar(documento_id, paginas_vectorizadas, len(paginas), memoria.incremento_mb)
+
+            self.registrar_metricas(paginas, total_chunks, time.time() - start_time)
             return total_chunks > 0
-            
+
         except Exception as e:
-            tiempo_procesamiento = time.time() - start_time
+            self.fallar(documento_id, str(e))
+            self.registrar_metricas([], 0, time.time() - start_time)
+            return False
+
+    def usar_streaming(self, documento_id: int, pdf_stream: io.BytesIO) -> bool:
+        """Decide si el documento supera el umbral de páginas del modo streaming."""
+        umbral = self.config.INGESTA_CONFIG['paginas_streaming']
+        if umbral <= 0:
+            return False
+        documento = self.db.documento_existe_por_id(documento_id)
+        num_paginas = (documento or {}).get('numero_paginas') or self.extractor.contar_paginas(pdf_stream)
+        return num_paginas > umbral
+
+    def procesar_streaming(self, documento_id: int, pdf_stream: io.BytesIO, checkpoint: int = 0) -> int:
+        """Procesa el documento página a página sin retener el texto ni los embeddings de las ya almacenadas."""
+        start_time = time.time()
+        secciones, num_paginas, caracteres, tiene_tablas = [], 0, 0, False
+
+        # Una sola consulta por documento, no por página
+        anterior = self.version_anterior(documento_id)
+        with MuestreoMemoria() as memoria:
+            for pagina in self.extractor.iterar_paginas(pdf_stream):
+                num_paginas += 1
+                caracteres += len(pagina['texto'])
+                tiene_tablas = tiene_tablas or pagina['tiene_tablas']
+                secciones.extend(pagina['secciones'])
+                self.indexar_secciones(documento_id, [pagina])
+
+                if pagina['numero_pagina'] > checkpoint:
+                    paginas_vectorizadas = self.reutilizar(documento_id, [pagina], anterior) + self.vectorizar([pagina])
+                    if not self.almacenar_paginas(documento_id, paginas_vectorizadas):
+                        self._registrar_procesamiento(num_paginas, tiene_tablas, caracteres, 0, time.time() - start_time)
+                        return 0
+
+        if not num_paginas:
+            self.fallar(documento_id, "No se pudo extraer texto del PDF")
+            return 0
+
+        # Niveles y jerarquía definitivos una vez vistos todos los estilos de encabezado del documento
+        self.extractor.section_detector.asignar_niveles(secciones)
+        self.db.guardar_secciones_documento(documento_id, secciones)
+
+        total_chunks = self.completar(documento_id, num_paginas, memoria.incremento_mb)
+        print(f"Documento {documento_id} procesado en streaming: {num_paginas} páginas, "
+              f"memoria del proceso +{memoria.incremento_mb:.1f} MB")
+        self._registrar_procesamiento(num_paginas, tiene_tablas, caracteres, total_chunks, time.time() - start_time)
+        return total_chunks
+
+    def procesar_documentos(self, documentos: List[Tuple[int, str]]) -> Dict[int, int]:
+        """Procesa varios documentos solapando sus etapas en un pipeline concurrente."""
+        pipeline = PipelineIngesta(
+            self,
+            workers=self.config.INGESTA_CONFIG['workers'],
+            tamano_cola=self.config.INGESTA_CONFIG['tamano_cola']
+        )
+        return pipeline.procesar(documentos)
+
+    # --- Trabajos de ingesta ---
+
+    def iniciar(self, documento_id: int, pdf_url: str) -> int:
+        """Registra el inicio o la reanudación del trabajo y devuelve la última página completada."""
+        trabajo = self.db.iniciar_trabajo_ingesta(documento_id, pdf_url)
+        checkpoint = trabajo['ultima_pagina'] if trabajo else 0
+        if checkpoint:
+            print(f"Reanudando documento {documento_id} desde la página {checkpoint + 1}")
+        return checkpoint
+
+    def pendientes(self, paginas: List[Dict], checkpoint: int) -> List[Dict]:
+        """Descarta las páginas ya almacenadas antes del checkpoint."""
+        return [p for p in paginas if p['numero_pagina'] > checkpoint]
+
+    def fallar(self, documento_id: int, error: str) -> None:
+        """Marca el trabajo como fallido conservando su checkpoint para reanudarlo."""
+        self.db.finalizar_trabajo_ingesta(documento_id, 'fallido', error=error)
+
+    # --- Etapas de la ingesta ---
+
+    def descargar(self, pdf_url: str, documento_id: Optional[int] = None) -> Optional[io.BytesIO]:
+        """Carga el PDF en memoria desde el almacén local o, si no está, desde la red."""
+        documento = self.db.documento_existe_por_id(documento_id) if documento_id else None
+        pdf_stream = self.downloader.download(pdf_url, documento['hash_sha256'] if documento else None)
+        if not pdf_stream:
+            print(f"No se pudo descargar el PDF de {pdf_url}")
+        return pdf_stream
+
+    def extraer(self, pdf_stream: io.BytesIO, pdf_url: str) -> List[Dict]:
+        """Extrae el texto estructurado con tablas de cada página."""
+        paginas = self.extractor.extract_text(pdf_stream)
+        if not paginas:
+            print(f"No se pudo extraer texto del PDF {pdf_url}")
+        return paginas
+
+    def indexar_secciones(self, documento_id: int, paginas: List[Dict]) -> None:
+        """Guarda la jerarquía de secciones detectada y anota su identificador en cada encabezado."""
+        secciones = [s for p in paginas for s in p.get('secciones', [])]
+        if not secciones:
+            return
+        identificadores = self.db.guardar_secciones_documento(documento_id, secciones)
+        for seccion in secciones:
+            seccion['id'] = identificadores.get(seccion['orden'])
+
+    def version_anterior(self, documento_id: int) -> Tuple[Optional[int], Dict[str, int]]:
+        """Devuelve la versión anterior del documento y la página de cada hash de su texto."""
+        documento = self.db.documento_existe_por_id(documento_id)
+        anterior_id = documento.get('documento_anterior_id') if documento else None
+        if not anterior_id:
+            return None, {}
+        return anterior_id, self.db.obtener_hashes_paginas(anterior_id)
+
+    def reutilizar(self, documento_id: int, paginas: List[Dict],
+                   anterior: Optional[Tuple[Optional[int], Dict[str, int]]] = None) -> List[Dict]:
+        """Reutiliza los chunks de las páginas cuyo texto no cambió respecto a la versión anterior.
+
+        Quien llama página a página pasa en anterior el resultado de version_anterior, para consultarla una sola vez.
+        """
+        for pagina in paginas:
+            pagina['hash_texto'] = hashlib.sha256(pagina['texto'].encode('utf-8')).hexdigest()
+        self.db.guardar_hashes_paginas(documento_id, [(p['numero_pagina'], p['hash_texto']) for p in paginas])
+
+        anterior_id, hashes_anteriores = anterior if anterior is not None else self.version_anterior(documento_id)
+        if not anterior_id:
+            return []
+
+        # Emparejar por hash, ya que una página sin cambios puede haberse desplazado
+        coincidencias = {
+            p['numero_pagina']: hashes_anteriores[p['hash_texto']]
+            for p in paginas if p['hash_texto'] in hashes_anteriores
+        }
+        if not coincidencias:
+            return []
+
+        chunks_anteriores = {}
+        for chunk in self.db.obtener_chunks_por_paginas(anterior_id, list(set(coincidencias.values()))):
+            chunks_anteriores.setdefault(chunk['numero_pagina'], []).append(chunk)
+
+        paginas_reutilizadas = []
+        for pagina in paginas:
+            chunks = chunks_anteriores.get(coincidencias.get(pagina['numero_pagina']))
+            if not chunks:
+                continue
+            pagina['reutilizada'] = True
+            textos = [c['chunk_texto'] for c in chunks]
+            paginas_reutilizadas.append({
+                'numero_pagina': pagina['numero_pagina'],
+                'chunks': textos,
+                'embeddings': [np.asarray(c['chunk_vector'], dtype=np.float32) for c in chunks],
+                'secciones': self.title_generator.asignar_secciones(pagina, textos)
+            })
+        return paginas_reutilizadas
+
+    def vectorizar(self, paginas: List[Dict]) -> List[Dict]:
+        """Divide el texto de cada página en chunks y genera sus embeddings."""
+        paginas_vectorizadas = []
+        for pagina in paginas:
+            if pagina.get('reutilizada'):
+                continue
+            chunks = self.splitter.split(pagina['texto'])
+            if not chunks:
+                continue
+
+            embeddings = self.embedder.generate(chunks)
+            if len(embeddings) != len(chunks):
+                print("No se pudo generar embeddings para todos los chunks")
+                continue
+
+            paginas_vectorizadas.append({
+                'numero_pagina': pagina['numero_pagina'],
+                'chunks': chunks,
+                'embeddings': embeddings,
+                'secciones': self.title_generator.asignar_secciones(pagina, chunks)
+            })
+        return paginas_vectorizadas
+
+    def almacenar(self, documento_id: int, paginas_vectorizadas: List[Dict], total_paginas: int = None,
+                  memoria_proceso_mb: float = None) -> int:
+        """Almacena las páginas, completa el trabajo y devuelve el total de chunks del documento."""
+        if not self.almacenar_paginas(documento_id, paginas_vectorizadas):
+            return 0
+        return self.completar(documento_id, total_paginas, memoria_proceso_mb)
+
+    def almacenar_paginas(self, documento_id: int, paginas_vectorizadas: List[Dict]) -> bool:
+        """Inserta en bloque los chunks de cada página avanzando el checkpoint."""
+        for pagina in sorted(paginas_vectorizadas, key=lambda p: p['numero_pagina']):
+            registros = [
+                (
+                    chunk,
+                    embedding.tolist(),
+                    self.title_generator.generate(chunk, pagina['numero_pagina'], i+1, seccion),
+                    pagina['numero_pagina'],
+                    seccion.get('id') if seccion else None
+                )
+                for i, (chunk, embedding, seccion) in enumerate(
+                    zip(pagina['chunks'], pagina['embeddings'], pagina['secciones'])
+                )
+            ]
+            # Las páginas se guardan en orden: un fallo detiene el documento para no dejar huecos tras el checkpoint
+            if not self.db.guardar_pagina_ingesta(documento_id, pagina['numero_pagina'], registros):
+                self.fallar(documento_id, f"Error insertando chunks de página {pagina['numero_pagina']}")
+                return False
+        return True
+
+    def completar(self, documento_id: int, total_paginas: int = None, memoria_proceso_mb: float = None) -> int:
+        """Marca el trabajo como completado y devuelve el total de chunks del documento."""
+        trabajo = self.db.finalizar_trabajo_ingesta(
+            documento_id, 'completado', total_paginas=total_paginas, memoria_proceso_mb=memoria_proceso_mb
+        )
+        return trabajo['total_chunks'] if trabajo else 0
+
+    def registrar_metricas(self, paginas: List[Dict], total_chunks: int, tiempo_procesamiento: float) -> None:
+        """Registra las métricas de procesamiento de un documento."""
+        self._registrar_procesamiento(
+            len(paginas),
+            any(p['tiene_tablas'] for p in paginas),
+            sum(len(p['texto']) for p in paginas),
+            total_chunks,
+            tiempo_procesamiento
+        )
+
+    def _registrar_procesamiento(self, num_paginas: int, tiene_tablas: bool, caracteres: int,
+                                 total_chunks: int, tiempo_procesamiento: float) -> None:
+        """Registra las métricas agregadas de un documento, ya procesado en bloque o en streaming."""
+        with self._lock_metricas:
             self.metricas.registrar_procesamiento_documento(
-                tiene_texto=False,
-                tiene_tablas=False,
-                tiene_metadatos=False,
-                num_chunks=0,
-                caracteres_totales=0,
+                tiene_texto=num_paginas > 0,
+                tiene_tablas=tiene_tablas,
+                tiene_metadatos=num_paginas > 0,
+                num_chunks=total_chunks,
+                caracteres_totales=caracteres,
                 tiempo_procesamiento=tiempo_procesamiento
             )
-            return False
\ No newline at end of file
+
+    def registrar_metricas_pipeline(self, etapas: List[Dict]) -> None:
+        """Registra las métricas por etapa de una ejecución del pipeline."""
+        with self._lock_metricas:
+            self.metricas.registrar_etapas_ingesta(etapas)
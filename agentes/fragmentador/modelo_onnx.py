@@ -0,0 +1,115 @@
+"""
+Módulo para exportar y ejecutar el modelo de embeddings cuantizado con ONNX Runtime.
+"""
+
+import os
+import json
+import numpy as np
+from typing import List, Union
+
+ARCHIVO_MODELO = 'modelo_int8.onnx'
+ARCHIVO_AJUSTES = 'ajustes_onnx.json'
+
+class OnnxEmbeddingModel:
+    """Ejecuta un modelo de sentence-transformers exportado a ONNX y cuantizado a int8 en CPU."""
+
+    def __init__(self, ruta: str, hilos: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(ruta, ARCHIVO_AJUSTES), 'r') as f:
+            self.ajustes = json.load(f)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(ruta)
+        self.max_seq_length = self.ajustes['max_seq_length']
+
+        opciones = ort.SessionOptions()
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        self.sesion = ort.InferenceSession(
+            os.path.join(ruta, ARCHIVO_MODELO),
+            opciones,
+            providers=['CPUExecutionProvider']
+        )
+        self.entradas = {entrada.name for entrada in self.sesion.get_inputs()}
+
+    def encode(self, textos: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Genera embeddings con la misma interfaz que SentenceTransformer.encode."""
+        es_unico = isinstance(textos, str)
+        if es_unico:
+            textos = [textos]
+        if not textos:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Agrupar textos de longitud parecida para reducir el relleno de cada lote
+        orden = np.argsort([-len(texto) for texto in textos])
+        lotes = []
+        for inicio in range(0, len(textos), batch_size):
+            lote = [textos[i] for i in orden[inicio:inicio + batch_size]]
+            lotes.append(self._codificar_lote(lote))
+
+        embeddings = np.empty((len(textos), lotes[0].shape[1]), dtype=np.float32)
+        embeddings[orden] = np.vstack(lotes)
+        return embeddings[0] if es_unico else embeddings
+
+    def _codificar_lote(self, textos: List[str]) -> np.ndarray:
+        """Tokeniza, ejecuta el modelo y aplica el pooling medio del modelo original."""
+        tokens = self.tokenizer(
+            textos,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors='np'
+        )
+        entradas = {nombre: valor.astype(np.int64) for nombre, valor in tokens.items() if nombre in self.entradas}
+        salida = self.sesion.run(None, entradas)[0]
+
+        mascara = tokens['attention_mask'][..., None].astype(np.float32)
+        embeddings = (salida * mascara).sum(axis=1) / np.clip(mascara.sum(axis=1), 1e-9, None)
+        if self.ajustes.get('normalizar', True):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+def exportar_modelo_onnx(model_name: str, destino: str) -> str:
+    """Exporta el transformer de un modelo de sentence-transformers a ONNX y lo cuantiza a int8."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(destino, exist_ok=True)
+    modelo = SentenceTransformer(model_name, device='cpu')
+    transformer = modelo[0].auto_model.eval()
+    tokenizer = modelo.tokenizer
+
+    # Exportar el modelo en precisión completa con ejes dinámicos de lote y secuencia
+    ejemplo = tokenizer(["Texto de ejemplo para exportar el modelo"], return_tensors='pt')
+    nombres_entradas = [nombre for nombre in ('input_ids', 'attention_mask', 'token_type_ids') if nombre in ejemplo]
+    ejes = {nombre: {0: 'lote', 1: 'secuencia'} for nombre in nombres_entradas}
+    ejes['last_hidden_state'] = {0: 'lote', 1: 'secuencia'}
+    ruta_fp32 = os.path.join(destino, 'modelo_fp32.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(ejemplo[nombre] for nombre in nombres_entradas),
+            ruta_fp32,
+            input_names=nombres_entradas,
+            output_names=['last_hidden_state'],
+            dynamic_axes=ejes,
+            opset_version=14
+        )
+
+    # Cuantizar pesos a int8 (cuantización dinámica, adecuada para CPU)
+    ruta_int8 = os.path.join(destino, ARCHIVO_MODELO)
+    quantize_dynamic(ruta_fp32, ruta_int8, weight_type=QuantType.QInt8)
+    os.remove(ruta_fp32)
+
+    tokenizer.save_pretrained(destino)
+    with open(os.path.join(destino, ARCHIVO_AJUSTES), 'w') as f:
+        json.dump({
+            'modelo': model_name,
+            'max_seq_length': modelo.max_seq_length,
+            'normalizar': any(type(modulo).__name__ == 'Normalize' for modulo in modelo)
+        }, f, indent=2)
+
+    return ruta_int8
@@ -0,0 +1,169 @@
+"""
+Módulo para ejecutar la ingesta de documentos como un pipeline de etapas concurrentes.
+"""
+
+import time
+import queue
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Marca de fin de trabajo para los workers de cada etapa
+_FIN = object()
+
+@dataclass
+class MetricasEtapa:
+    etapa: str
+    workers: int
+    documentos: int = 0
+    errores: int = 0
+    tiempo_ocupado: float = 0.0
+    tiempo_espera: float = 0.0 # Bloqueado esperando entrada o hueco en la cola siguiente
+
+class PipelineIngesta:
+    """Une descarga, extracción, vectorización y almacenamiento con colas acotadas entre etapas."""
+
+    def __init__(self, agente, workers: Dict[str, int], tamano_cola: int = 4):
+        self.agente = agente
+        self.tamano_cola = max(1, tamano_cola)
+        self.etapas: List[Tuple[str, Callable[[Dict], Optional[Dict]]]] = [
+            ('descarga', self._descargar),
+            ('extraccion', self._extraer),
+            ('vectorizacion', self._vectorizar),
+            ('almacenamiento', self._almacenar)
+        ]
+        self.metricas = {
+            nombre: MetricasEtapa(etapa=nombre, workers=max(1, workers.get(nombre, 1)))
+            for nombre, _ in self.etapas
+        }
+        self.resultados: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def procesar(self, documentos: List[Tuple[int, str]]) -> Dict[int, int]:
+        """Procesa los documentos y devuelve el número de chunks almacenados por documento."""
+        if not documentos:
+            return {}
+
+        # Una cola acotada por etapa: si una etapa se retrasa, las anteriores se bloquean
+        colas = [queue.Queue(maxsize=self.tamano_cola) for _ in self.etapas]
+        pendientes = [self.metricas[nombre].workers for nombre, _ in self.etapas]
+        hilos = []
+
+        for indice, (nombre, funcion) in enumerate(self.etapas):
+            for n in range(self.metricas[nombre].workers):
+                hilo = threading.Thread(
+                    target=self._worker,
+                    args=(indice, funcion, colas, pendientes),
+                    name=f"ingesta-{nombre}-{n+1}",
+                    daemon=True
+                )
+                hilo.start()
+                hilos.append(hilo)
+
+        for documento_id, pdf_url in documentos:
+            self.resultados[documento_id] = 0
+            colas[0].put({'documento_id': documento_id, 'pdf_url': pdf_url, 'inicio': time.time()})
+        for _ in range(self.metricas[self.etapas[0][0]].workers):
+            colas[0].put(_FIN)
+
+        for hilo in hilos:
+            hilo.join()
+
+        self.agente.registrar_metricas_pipeline(self.obtener_metricas())
+        return self.resultados
+
+    def obtener_metricas(self) -> List[Dict]:
+        """Devuelve las métricas acumuladas de cada etapa."""
+        return [asdict(metricas) for metricas in self.metricas.values()]
+
+    def _worker(self, indice: int, funcion: Callable, colas: List[queue.Queue], pendientes: List[int]):
+        """Consume elementos de la cola de su etapa y entrega el resultado a la siguiente."""
+        nombre = self.etapas[indice][0]
+        metricas = self.metricas[nombre]
+        es_ultima = indice == len(self.etapas) - 1
+
+        while True:
+            inicio_espera = time.time()
+            elemento = colas[indice].get()
+            espera = time.time() - inicio_espera
+            if elemento is _FIN:
+                break
+
+            inicio = time.time()
+            try:
+                resultado = funcion(elemento)
+            except Exception as e:
+                print(f"Error en etapa {nombre} del documento {elemento['documento_id']}: {str(e)}")
+                elemento['error'] = str(e)
+                resultado = None
+            ocupado = time.time() - inicio
+
+            # Sin sustituir el error concreto que la etapa ya haya registrado en el trabajo
+            if resultado is None and not elemento.get('omitido') and not elemento.get('fallo_registrado'):
+                detalle = f": {elemento['error']}" if elemento.get('error') else ""
+                self.agente.fallar(elemento['documento_id'], f"Fallo en la etapa de {nombre}{detalle}")
+
+            if resultado is not None and not es_ultima:
+                inicio_espera = time.time()
+                colas[indice + 1].put(resultado)
+                espera += time.time() - inicio_espera
+
+            with self._lock:
+                metricas.documentos += 1
+                metricas.errores += resultado is None and not elemento.get('omitido')
+                metricas.tiempo_ocupado += ocupado
+                metricas.tiempo_espera += espera
+
+        # El último worker de la etapa avisa del fin a todos los de la siguiente
+        with self._lock:
+            pendientes[indice] -= 1
+            ultimo = pendientes[indice] == 0
+        if ultimo and not es_ultima:
+            for _ in range(self.metricas[self.etapas[indice + 1][0]].workers):
+                colas[indice + 1].put(_FIN)
+
+    # --- Etapas ---
+
+    def _descargar(self, elemento: Dict) -> Optional[Dict]:
+        if self.agente.db.documento_ingesta_completa(elemento['documento_id']):
+            # Documento ya procesado anteriormente: se cuenta como éxito sin repetir la ingesta
+            with self._lock:
+                self.resultados[elemento['documento_id']] = 1
+            elemento['omitido'] = True
+            return None
+        elemento['checkpoint'] = self.agente.iniciar(elemento['documento_id'], elemento['pdf_url'])
+        elemento['pdf_stream'] = self.agente.descargar(elemento['pdf_url'], elemento['documento_id'])
+        return elemento if elemento['pdf_stream'] else None
+
+    def _extraer(self, elemento: Dict) -> Optional[Dict]:
+        if self.agente.usar_streaming(elemento['documento_id'], elemento['pdf_stream']):
+            # Documento muy largo: se procesa página a página aquí, sin pasar por las etapas siguientes
+            total_chunks = self.agente.procesar_streaming(
+                elemento['documento_id'], elemento.pop('pdf_stream'), elemento['checkpoint']
+            )
+            with self._lock:
+                self.resultados[elemento['documento_id']] = total_chunks
+            # El modo streaming completa o marca como fallido el trabajo por sí mismo
+            elemento['omitido'] = total_chunks > 0
+            elemento['fallo_registrado'] = total_chunks <= 0
+            return None
+        elemento['paginas'] = self.agente.extraer(elemento.pop('pdf_stream'), elemento['pdf_url'])
+        if not elemento['paginas']:
+            return None
+        self.agente.indexar_secciones(elemento['documento_id'], elemento['paginas'])
+        return elemento
+
+    def _vectorizar(self, elemento: Dict) -> Optional[Dict]:
+        pendientes = self.agente.pendientes(elemento['paginas'], elemento['checkpoint'])
+        reutilizadas = self.agente.reutilizar(elemento['documento_id'], pendientes)
+        elemento['paginas_vectorizadas'] = reutilizadas + self.agente.vectorizar(pendientes)
+        return elemento
+
+    def _almacenar(self, elemento: Dict) -> Optional[Dict]:
+        total_chunks = self.agente.almacenar(
+            elemento['documento_id'], elemento.pop('paginas_vectorizadas'), len(elemento['paginas'])
+        )
+        with self._lock:
+            self.resultados[elemento['documento_id']] = total_chunks
+        self.agente.registrar_metricas(elemento['paginas'], total_chunks, time.time() - elemento['inicio'])
+        return elemento
@@ -2,18 +2,46 @@
 Módulo para generar títulos de sección.
 """
 
-import re
+from typing import Dict, List, Optional
+
+from .fragmentador_texto import PATRON_MARCADOR_TABLA
 
 class SectionTitleGenerator:
     """Genera títulos representativos para cada fragmento de texto."""
-    
-    def generate(self, chunk: str, numero_pagina: int, chunk_num: int) -> str:
+
+    def generate(self, chunk: str, numero_pagina: int, chunk_num: int, seccion: Optional[Dict] = None) -> str:
         """Genera un título de sección para un fragmento de texto."""
         # Usar marcado especial si es una tabla
-        if re.match(r'--- TABLA \d+ PÁG \d+ ---', chunk):
-            match = re.search(r'--- TABLA (\d+) PÁG (\d+) ---', chunk)
-            tabla_num = match.group(1) if match else "?"
-            return f"TABLA {tabla_num} (PÁG {numero_pagina})"
-        
-        # Usar numeración estándar si es texto
-        return f"Página {numero_pagina} - Chunk {chunk_num}"
\ No newline at end of file
+        if (match := PATRON_MARCADOR_TABLA.match(chunk)):
+            tabla_num = match.group(1)
+            titulo_tabla = f"TABLA {tabla_num} (PÁG {numero_pagina})"
+            # El prefijo TABLA va primero: obtener_chunks_con_tablas busca las tablas por él
+            return f"{titulo_tabla} - {seccion['titulo']}" if seccion else titulo_tabla
+
+        # Usar el encabezado detectado y, si no hay, numeración estándar
+        if seccion:
+            return seccion['titulo']
+        return f"Página {numero_pagina} - Chunk {chunk_num}"
+
+    def asignar_secciones(self, pagina: Dict, chunks: List[str]) -> List[Optional[Dict]]:
+        """Asigna a cada chunk la sección vigente en su punto medio de la página."""
+        secciones = pagina.get('secciones', [])
+        inicial = pagina.get('seccion_inicial')
+        texto = pagina['texto']
+
+        asignadas, cursor = [], 0
+        for chunk in chunks:
+            if (match := PATRON_MARCADOR_TABLA.match(chunk)):
+                # Las tablas van al final del texto: se ubican por su posición vertical en la página
+                top = pagina.get('posiciones_tablas', {}).get(int(match.group(1)))
+                anteriores = [s for s in secciones if top is not None and s['top'] <= top]
+                asignadas.append(anteriores[-1] if anteriores else inicial)
+                continue
+
+            inicio = texto.find(chunk[:80], cursor)
+            if inicio >= 0:
+                cursor = inicio
+            medio = cursor + len(chunk) // 2
+            anteriores = [s for s in secciones if s['posicion'] <= medio]
+            asignadas.append(anteriores[-1] if anteriores else inicial)
+        return asignadas
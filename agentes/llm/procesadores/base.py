@@ -7,11 +7,12 @@ from openai import AzureOpenAI
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
 
 from nucleo.configuracion.configuracion import Config
 from nucleo.base_datos.modelos import Database
 from servicios.monitoreo.recolector_metricas import MetricasManager
+from agentes.fragmentador.generador_embedding import EmbeddingGenerator
+from agentes.fragmentador.detector_secciones import normalizar_titulo
 
 @dataclass
 class ProcessorContext:
@@ -29,8 +30,8 @@ class BaseFieldProcessor(ABC):
         self.embedder = self._get_embedder()
     
     def _get_embedder(self):
-        """Inicializa y cachea el modelo de embeddings."""
-        return SentenceTransformer('all-MiniLM-L6-v2')
+        """Inicializa el generador de embeddings con caché compartida."""
+        return EmbeddingGenerator()
     
     @abstractmethod
     def process(self) -> bool:
@@ -43,15 +44,27 @@ class BaseFieldProcessor(ABC):
         """Nombre del campo que procesa esta clase."""
         pass
     
-    def _buscar_chunks_relevantes(self, terminos: List[str], documento_id: Optional[int] = None, limite: int = 3) -> List[Dict]:
-        """Busca chunks similares a los términos dados usando embeddings."""
+    def _buscar_chunks_relevantes(self, terminos: List[str], documento_id: Optional[int] = None, limite: int = 3,
+                                  secciones: Optional[List[str]] = None) -> List[Dict]:
+        """Busca los chunks de las secciones indicadas y, si no existen, chunks similares a los términos dados."""
         chunks_encontrados = []
         doc_id = documento_id or self.context.documento_id
-        
+
+        if doc_id and secciones:
+            # Consulta indexada por título de sección antes de recurrir a la búsqueda vectorial
+            chunks_encontrados = self.db.buscar_chunks_por_seccion(
+                documento_id=doc_id,
+                titulos_normalizados=[normalizar_titulo(seccion) for seccion in secciones],
+                limite=limite * len(terminos)
+            )
+            if chunks_encontrados:
+                return chunks_encontrados
+
         if doc_id:
-            for termino in terminos:
+            # Generar todos los embeddings en un lote (los términos fijos suelen estar en caché)
+            embeddings = self.embedder.generate(terminos)
+            for embedding in embeddings:
                 try:
-                    embedding = self.embedder.encode(termino)
                     chunks = self.db.buscar_chunks_por_similitud(
                         documento_id=doc_id, 
                         vector_consulta=embedding.tolist(), 
@@ -132,6 +132,7 @@ class FechaInicioProcessor(BaseFieldProcessor):
                 ["presentación de solicitudes", "plazo de solicitud", "fecha de inicio", "periodo de solicitud", 
                  "abierto desde", "convocatoria abierta", "plazo de presentación", "permanentemente abierta",
                  "presentación de solicitudes"],
+                secciones=["plazo de presentación", "presentación de solicitudes", "plazo de solicitud"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -185,6 +186,7 @@ class FechaFinProcessor(BaseFieldProcessor):
             chunks = self._buscar_chunks_relevantes(
                 ["cierre de convocatoria", "fecha límite", "finalización plazo", "presentación de solicitudes"
                  "fecha de fin", "hasta", "convocatoria hasta", "plazo finaliza", "permanentemente abierta"],
+                secciones=["plazo de presentación", "presentación de solicitudes", "plazo de solicitud"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -238,6 +240,7 @@ class ObjetivoProcessor(BaseFieldProcessor):
             chunks = self._buscar_chunks_relevantes(
                 ["objetivo", "finalidad", "propósito", "definición", "objeto",
                  "resuelve", "objetivos de la convocatoria", "fin de la ayuda"],
+                secciones=["objeto", "finalidad", "objetivo"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -288,6 +291,7 @@ class BeneficiariosProcessor(BaseFieldProcessor):
         for doc in self.context.documentos[:3]:  # Limitar a 3 documentos principales
             chunks = self._buscar_chunks_relevantes(
                 ["entidades beneficiarias", "beneficiarios", "destinatarios"],
+                secciones=["beneficiarios", "entidades beneficiarias", "destinatarios"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -540,6 +544,7 @@ class DuracionMinimaProcessor(BaseFieldProcessor):
                 ["duración mínima", "meses", "años", "plazo", "tiempo mínimo", "plazo mínimo", "mínimo de meses", 
                  "periodo mínimo", "ejecución mínima", "mínimo temporal", "menor duración", "mínimo requerido", 
                  "dura al menos", "mínimo vigencia", "mínimo temporalidad", "como mínimo", "no menos de"],
+                secciones=["duración", "plazo de ejecución", "periodo de ejecución"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -589,6 +594,7 @@ class DuracionMaximaProcessor(BaseFieldProcessor):
                 ["duración máxima", "meses", "años", "plazo", "tiempo máximo", "plazo máximo", 
                  "máximo de meses", "periodo máximo", "ejecución máxima", "máximo temporal", "mayor duración", 
                  "máximo permitido", "dura como máximo", "máximo vigencia", "máximo temporalidad", "como máximo"],
+                secciones=["duración", "plazo de ejecución", "periodo de ejecución"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -808,6 +814,7 @@ class FormaPlazoCobroProcessor(BaseFieldProcessor):
                 ["forma de pago", "modalidad de abono", "plazo de cobro", "pago único", "anticipo",
                  "liquidación", "justificación previa al pago", "desembolsos", "calendario de pagos",
                  "condiciones de financiación", "requisitos para el cobro", "anticipo de la ayuda"],
+                secciones=["forma de pago", "pago", "abono"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -1008,6 +1015,7 @@ class CostesElegiblesProcessor(BaseFieldProcessor):
                 ["costes elegibles", "gastos subvencionables", "costes subvencionables",
                  "gastos elegibles", "partidas elegibles", "costes financiables", "personal investigador", 
                  "materiales", "equipamiento", "gastos indirectos", "amortizaciones"],
+                secciones=["gastos subvencionables", "costes subvencionables", "costes elegibles", "gastos elegibles", "conceptos subvencionables"],
                 documento_id=doc['id'],
                 limite=3
             )
@@ -7,11 +7,12 @@ from enum import Enum, auto
 from dataclasses import dataclass
 from typing import Dict, Optional
 from urllib.parse import urlparse
-from sentence_transformers import SentenceTransformer
 
 from nucleo.configuracion.configuracion import Config
 from nucleo.base_datos.modelos import Database
 from agentes.rastreador.gestor_extraccion import CrawlerAgent
+from agentes.rastreador.planificador_rastreo import PlanificadorRastreo
+from agentes.fragmentador.generador_embedding import EmbeddingGenerator
 from agentes.llm.gestor_llm import LLMAgent
 from servicios.monitoreo.recolector_metricas import MetricasManager
 
@@ -163,8 +164,13 @@ class Orquestador:
         self.crawler = CrawlerAgent()
         self.llm = LLMAgent()
         self.metricas = MetricasManager()
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedder = EmbeddingGenerator()
         self.organismos_permitidos = {'ader.es', 'cdti.es', 'comunidad.madrid', 'andaluciatrade.es'}
+        # Agente propio para no compartir navegador ni sesión con las peticiones del usuario
+        self.planificador_rastreo = PlanificadorRastreo(config=self.config, db=self.db) \
+            if self.config.RASTREO_CONFIG['activo'] else None
+        if self.planificador_rastreo:
+            self.planificador_rastreo.iniciar()
 
     def main(self):
         """Implementa la interfaz de usuario por consola."""
@@ -0,0 +1,111 @@
+"""
+Módulo para capturar los PDFs que el navegador recibe mientras carga una página y despliega sus secciones.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Set
+
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+
+from .verificador_pdf import FIRMA_PDF, TAMANO_CABECERA
+
+TIPOS_PDF = ('application/pdf', 'application/x-pdf')
+
+class CapturaPdf:
+    """Anota las respuestas servidas como PDF durante el rastreo y guarda su contenido en el almacén.
+
+    Se registra con page.on('response', captura.manejar) o, con la API asíncrona, captura.manejar_async.
+    Cada PDF guardado queda indexado bajo su URL final y las de sus redirecciones, de modo que el
+    verificador lo encuentra vigente en el almacén y no vuelve a pedirlo. Los que superan max_bytes,
+    o cuyo cuerpo no está disponible (por ejemplo, al servirse como descarga), se anotan solo con sus
+    cabeceras y se verifican como cualquier otro enlace.
+    """
+
+    def __init__(self, almacen: AlmacenPdf, max_bytes: int = 50 * 1024 * 1024):
+        self.almacen = almacen
+        self.max_bytes = max_bytes
+        self.capturados: Dict[str, Dict] = {} # URL -> cabeceras de la respuesta
+        self.bytes_guardados = 0
+        self._pendientes: List = []
+        self._tareas: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def es_pdf(response) -> bool:
+        tipo = response.headers.get('content-type', '').split(';')[0].strip().lower()
+        return response.status == 200 and tipo in TIPOS_PDF
+
+    def manejar(self, response) -> None:
+        """Anota la respuesta; el cuerpo se lee después en guardar(), antes de cerrar el contexto."""
+        if self._anotar(response):
+            self._pendientes.append(response)
+
+    def guardar(self) -> List[str]:
+        """Guarda los cuerpos de las respuestas anotadas y devuelve sus URLs."""
+        urls = []
+        for response in self._pendientes:
+            cuerpo = None
+            if self._cabe(response):
+                try:
+                    cuerpo = response.body()
+                except Exception:
+                    pass
+            if self._almacenar(response, cuerpo):
+                urls.append(response.url)
+        self._pendientes = []
+        return urls
+
+    def manejar_async(self, response, al_capturar: Callable[[str], None]) -> None:
+        """Lee y guarda el cuerpo en una tarea propia y pasa la URL a al_capturar cuando ya está en el almacén."""
+        if self._anotar(response):
+            tarea = asyncio.get_running_loop().create_task(self._guardar_async(response, al_capturar))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def esperar_async(self) -> None:
+        """Espera a las capturas en curso; debe llamarse antes de cerrar el contexto."""
+        if self._tareas:
+            await asyncio.gather(*self._tareas, return_exceptions=True)
+
+    async def _guardar_async(self, response, al_capturar: Callable[[str], None]) -> None:
+        cuerpo = None
+        if self._cabe(response):
+            try:
+                cuerpo = await response.body()
+            except Exception:
+                pass
+        # La escritura en disco no debe detener el bucle de eventos
+        if await asyncio.to_thread(self._almacenar, response, cuerpo):
+            al_capturar(response.url)
+
+    def _anotar(self, response) -> bool:
+        if not self.es_pdf(response) or response.url in self.capturados:
+            return False
+        self.capturados[response.url] = dict(response.headers)
+        return True
+
+    def _cabe(self, response) -> bool:
+        longitud = response.headers.get('content-length', '')
+        return self.max_bytes > 0 and (not longitud.isdigit() or int(longitud) <= self.max_bytes)
+
+    def _almacenar(self, response, cuerpo: Optional[bytes]) -> bool:
+        """Guarda el cuerpo si es un PDF; sin cuerpo, la URL se da por buena y la verificará el verificador."""
+        if cuerpo is None or len(cuerpo) > self.max_bytes:
+            return True
+        # El Content-Type no basta: algunos servidores envían páginas de error como application/pdf
+        if FIRMA_PDF not in cuerpo[:TAMANO_CABECERA]:
+            return False
+        ultima_modificacion = response.headers.get('last-modified')
+        hash_sha256, tamano = self.almacen.guardar([cuerpo], response.url, ultima_modificacion)
+        self.bytes_guardados += tamano
+        for url in self._redirecciones(response):
+            self.almacen.indexar_url(url, hash_sha256, ultima_modificacion)
+        return True
+
+    def _redirecciones(self, response) -> List[str]:
+        """URLs que redirigieron a la respuesta: suelen ser las que aparecen en los enlaces de la página."""
+        urls = []
+        peticion = response.request.redirected_from
+        while peticion is not None:
+            urls.append(peticion.url)
+            peticion = peticion.redirected_from
+        return urls
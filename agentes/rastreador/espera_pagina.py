@@ -0,0 +1,148 @@
+"""
+Módulo para esperar a que una página de convocatoria esté lista comprobando condiciones del DOM.
+"""
+
+import time
+import itertools
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+# Devuelve true cuando el número de enlaces lleva estableMs sin cambiar; el estado se guarda en window[clave]
+SCRIPT_ENLACES_ESTABLES = '''([clave, selector, estableMs]) => {
+    const n = document.querySelectorAll(selector).length;
+    const ahora = performance.now();
+    const estado = window[clave];
+    if (!estado || estado.n !== n) {
+        window[clave] = {n: n, desde: ahora};
+        return false;
+    }
+    return ahora - estado.desde >= estableMs;
+}'''
+
+# Devuelve true cuando todos los paneles desplegados son visibles (o ya no existen)
+SCRIPT_PANELES_VISIBLES = '''ids => ids.every(id => {
+    const panel = document.getElementById(id);
+    return !panel || panel.getClientRects().length > 0;
+})'''
+
+@dataclass
+class AjustesEspera:
+    selector_listo: str = 'a[href]' # Su presencia indica que el contenido principal se ha cargado
+    selector_enlaces: str = 'a[href], [data-href], [data-pdf]'
+    estable_ms: int = 500 # Tiempo sin cambios en el número de enlaces para darlos por cargados
+    max_espera_ms: int = 10000 # Tope de cada espera: al agotarse se continúa con lo que haya
+    max_espera_paneles_ms: int = 2000
+
+@dataclass
+class TiemposRastreo:
+    url: str
+    organismo: str
+    tiempo_carga: float = 0.0
+    tiempo_espera: float = 0.0
+    tiempo_trabajo: float = 0.0
+    enlaces: int = 0
+    listo: bool = True # False si alguna condición agotó su tope
+    bloqueo_recursos: bool = False
+    peticiones_bloqueadas: int = 0
+    bytes_evitados: int = 0
+    estrategia: str = 'navegador' # 'html' si se resolvió sin navegador
+
+class EsperaPagina:
+    """Sustituye las pausas fijas del rastreo por esperas a condiciones del DOM y mide su coste.
+
+    Cada método tiene una versión para la API síncrona de Playwright y otra (sufijo _async) para la asíncrona.
+    """
+
+    _claves = itertools.count()
+
+    def __init__(self, url: str, organismo: str, ajustes: Optional[AjustesEspera] = None):
+        self.ajustes = ajustes or AjustesEspera()
+        self.tiempos = TiemposRastreo(url=url, organismo=organismo)
+        self._inicio = time.time()
+
+    def registrar_carga(self, inicio: float) -> None:
+        """Anota la duración de la navegación iniciada en inicio."""
+        self.tiempos.tiempo_carga += time.time() - inicio
+
+    def finalizar(self, enlaces: int, bloqueo=None) -> Dict:
+        """Cierra la medición: el tiempo que no es carga ni espera es trabajo útil."""
+        self.tiempos.enlaces = enlaces
+        if bloqueo:
+            self.tiempos.bloqueo_recursos = True
+            self.tiempos.peticiones_bloqueadas = bloqueo.peticiones_bloqueadas
+            self.tiempos.bytes_evitados = bloqueo.bytes_evitados
+        self.tiempos.tiempo_trabajo = max(
+            0.0, time.time() - self._inicio - self.tiempos.tiempo_carga - self.tiempos.tiempo_espera
+        )
+        return asdict(self.tiempos)
+
+    def esperar_contenido(self, page) -> bool:
+        """Espera a que aparezca el contenido principal y a que el número de enlaces se estabilice."""
+        inicio = time.time()
+        try:
+            page.wait_for_selector(self.ajustes.selector_listo, state='attached', timeout=self.ajustes.max_espera_ms)
+            page.wait_for_function(SCRIPT_ENLACES_ESTABLES, arg=self._argumentos_estabilidad(),
+                                   polling=100, timeout=self.ajustes.max_espera_ms)
+            return True
+        except Exception:
+            self.tiempos.listo = False
+            return False
+        finally:
+            self.tiempos.tiempo_espera += time.time() - inicio
+
+    def esperar_paneles(self, page, paneles: List[str]) -> bool:
+        """Espera a que los paneles desplegados sean visibles y a que sus enlaces terminen de cargarse."""
+        inicio = time.time()
+        try:
+            if paneles:
+                page.wait_for_function(SCRIPT_PANELES_VISIBLES, arg=paneles,
+                                       polling=100, timeout=self.ajustes.max_espera_paneles_ms)
+            page.wait_for_function(SCRIPT_ENLACES_ESTABLES, arg=self._argumentos_estabilidad(),
+                                   polling=100, timeout=self.ajustes.max_espera_paneles_ms)
+            return True
+        except Exception:
+            self.tiempos.listo = False
+            return False
+        finally:
+            self.tiempos.tiempo_espera += time.time() - inicio
+
+    async def esperar_contenido_async(self, page) -> bool:
+        inicio = time.time()
+        try:
+            await page.wait_for_selector(self.ajustes.selector_listo, state='attached',
+                                         timeout=self.ajustes.max_espera_ms)
+            await page.wait_for_function(SCRIPT_ENLACES_ESTABLES, arg=self._argumentos_estabilidad(),
+                                         polling=100, timeout=self.ajustes.max_espera_ms)
+            return True
+        except Exception:
+            self.tiempos.listo = False
+            return False
+        finally:
+            self.tiempos.tiempo_espera += time.time() - inicio
+
+    async def esperar_paneles_async(self, page, paneles: List[str]) -> bool:
+        inicio = time.time()
+        try:
+            if paneles:
+                await page.wait_for_function(SCRIPT_PANELES_VISIBLES, arg=paneles,
+                                             polling=100, timeout=self.ajustes.max_espera_paneles_ms)
+            await page.wait_for_function(SCRIPT_ENLACES_ESTABLES, arg=self._argumentos_estabilidad(),
+                                         polling=100, timeout=self.ajustes.max_espera_paneles_ms)
+            return True
+        except Exception:
+            self.tiempos.listo = False
+            return False
+        finally:
+            self.tiempos.tiempo_espera += time.time() - inicio
+
+    def _argumentos_estabilidad(self) -> List:
+        # Una clave nueva por espera para no heredar el recuento de la anterior
+        return [f"__enlaces_estables_{next(self._claves)}", self.ajustes.selector_enlaces, self.ajustes.estable_ms]
+
+def panel_controlado(aria_controls: Optional[str], data_target: Optional[str]) -> Optional[str]:
+    """Devuelve el id del panel que despliega un control, según sus atributos ARIA o de Bootstrap."""
+    if aria_controls:
+        return aria_controls.split()[0]
+    if data_target and data_target.startswith('#') and len(data_target) > 1:
+        return data_target[1:]
+    return None
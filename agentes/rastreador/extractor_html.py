@@ -0,0 +1,133 @@
+"""
+Módulo para extraer URLs de documentos PDF del HTML servido, sin navegador.
+"""
+
+import time
+import hashlib
+import requests
+from dataclasses import dataclass, field, asdict
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from .extractor_url_pdf import resolver_enlace_pdf
+from .espera_pagina import TiemposRastreo
+from servicios.utilidades.validadores_http import ValidadoresHttp
+
+# Contenedores vacíos en los que un framework de JavaScript monta toda la página
+IDS_APLICACION_JS = {'root', 'app', '__next', '__nuxt'}
+
+CLASES_PLEGABLES = {'collapse', 'collapsed', 'show-more', 'expand-section', 'accordion-button'}
+
+class _AnalizadorEnlaces(HTMLParser):
+    """Recoge los enlaces de la página y las señales de que necesita JavaScript para mostrarlos."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base: Optional[str] = None
+        self.enlaces: List[str] = []
+        self.plegables = 0
+        self.marcadores_js = 0
+        self._en_noscript = False
+
+    def handle_starttag(self, tag, attrs):
+        atributos = {nombre: valor or '' for nombre, valor in attrs}
+        if tag == 'base' and atributos.get('href') and not self.base:
+            self.base = atributos['href']
+        if atributos.get('href') and (tag == 'a' or atributos.get('role') == 'link'):
+            self.enlaces.append(atributos['href'])
+        for atributo in ('data-href', 'data-pdf'):
+            if atributos.get(atributo):
+                self.enlaces.append(atributos[atributo])
+        if tag in ('iframe', 'embed') and atributos.get('src'):
+            self.enlaces.append(atributos['src'])
+
+        if (atributos.get('aria-expanded') == 'false'
+                or 'collapse' in (atributos.get('data-toggle'), atributos.get('data-bs-toggle'))
+                or CLASES_PLEGABLES & set(atributos.get('class', '').split())):
+            self.plegables += 1
+        if atributos.get('id') in IDS_APLICACION_JS or 'ng-app' in atributos or 'data-reactroot' in atributos:
+            self.marcadores_js += 1
+        if tag == 'noscript':
+            self._en_noscript = True
+
+    def handle_endtag(self, tag):
+        if tag == 'noscript':
+            self._en_noscript = False
+
+    def handle_data(self, data):
+        if self._en_noscript and 'javascript' in data.lower():
+            self.marcadores_js += 1
+
+@dataclass
+class ResultadoHtml:
+    pdf_urls: List[str] = field(default_factory=list)
+    es_html: bool = False
+    necesita_navegador: bool = True # Sin enlaces, o con indicios de contenido generado con JavaScript
+    revalidado: bool = False # El servidor respondió 304 y se reutilizaron los enlaces anteriores
+    tiempos: Optional[Dict] = None
+
+class HtmlPdfExtractor:
+    """Obtiene los enlaces a PDF con una petición HTTP normal, para evitar Chromium cuando no hace falta."""
+
+    def __init__(self, validadores: Optional[ValidadoresHttp] = None):
+        self.validadores = validadores or ValidadoresHttp()
+
+    def extraer_pdfs(self, url: str, session: requests.Session, timeout: int, organismo: str,
+                     silent: bool = False) -> ResultadoHtml:
+        """Descarga la página y extrae sus enlaces a PDF; ante un error lo informa y deja el rastreo al navegador."""
+        resultado = ResultadoHtml()
+        tiempos = TiemposRastreo(url=url, organismo=organismo, estrategia='html')
+        inicio = time.time()
+        try:
+            # Solo merece la pena revalidar si se conservan los enlaces extraídos la vez anterior
+            validador = self.validadores.obtener(url)
+            if validador and validador['enlaces'] is None:
+                validador = None
+            # Cerrar la respuesta devuelve la conexión y el hueco del host aunque falle el análisis
+            with session.get(url, timeout=timeout, headers=self.validadores.cabeceras(validador)) as response:
+                tiempos.tiempo_carga = time.time() - inicio
+                if response.status_code == 304 and validador:
+                    self.validadores.revalidado(url)
+                    resultado.revalidado = True
+                    self._reutilizar(resultado, validador)
+                else:
+                    response.raise_for_status()
+                    if 'html' not in response.headers.get('content-type', '').lower():
+                        return resultado
+
+                    inicio_analisis = time.time()
+                    hash_sha256 = hashlib.sha256(response.content).hexdigest()
+                    if validador and validador['hash_sha256'] == hash_sha256:
+                        # Mismo contenido aunque el servidor no admita peticiones condicionales
+                        self._reutilizar(resultado, validador)
+                    else:
+                        self._analizar(resultado, response)
+                    self.validadores.guardar(url, response, hash_sha256, resultado.pdf_urls, resultado.necesita_navegador)
+                    tiempos.tiempo_trabajo = time.time() - inicio_analisis
+            tiempos.enlaces = len(resultado.pdf_urls)
+            resultado.tiempos = asdict(tiempos)
+        except Exception as e:
+            if not silent: print(f"Error extraer enlaces del HTML de {url}: {str(e)}")
+        return resultado
+
+    def _reutilizar(self, resultado: ResultadoHtml, validador: Dict) -> None:
+        resultado.pdf_urls = list(validador['enlaces'])
+        resultado.necesita_navegador = bool(validador['requiere_navegador'])
+        resultado.es_html = True
+
+    def _analizar(self, resultado: ResultadoHtml, response: requests.Response) -> None:
+        """Extrae los enlaces a PDF del HTML y decide si la página necesita navegador."""
+        analizador = _AnalizadorEnlaces()
+        analizador.feed(response.text)
+        analizador.close()
+
+        base = urljoin(response.url, analizador.base) if analizador.base else response.url
+        pdf_urls: Dict[str, None] = {}
+        for enlace in analizador.enlaces:
+            if (absolute_url := resolver_enlace_pdf(base, enlace)):
+                pdf_urls[absolute_url] = None
+
+        resultado.pdf_urls = list(pdf_urls)
+        resultado.es_html = True
+        resultado.necesita_navegador = not pdf_urls or analizador.plegables > 0 or analizador.marcadores_js > 0
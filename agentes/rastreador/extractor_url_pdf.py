@@ -3,114 +3,131 @@ Módulo para extraer URLs de documentos PDF con manejo de reintentos y expansió
 """
 
 import time
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 from urllib.parse import urljoin
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from .pool_navegadores import PoolNavegadores
+from .espera_pagina import EsperaPagina, panel_controlado
+from .bloqueo_recursos import BloqueoRecursos
+from .validador_url import UrlValidator
+from .perfiles_organismo import SELECTOR_ENLACES, PerfilOrganismo, perfil_organismo
+from .captura_pdf import CapturaPdf
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+from servicios.utilidades.planificador_hosts import PlanificadorHosts
+from servicios.utilidades.adaptador_ssl import ESTADOS_LIMITE
+
+SCRIPT_ENLACES = '''elements => elements.map(el => {
+    try {
+        return el.href || el.getAttribute('data-href') || 
+               el.getAttribute('data-pdf') || null;
+    } catch (e) {
+        return null;
+    }
+}).filter(Boolean)'''
+
+def resolver_enlace_pdf(url_base: str, enlace: str) -> Optional[str]:
+    """Devuelve la URL absoluta del enlace si parece un PDF, o None."""
+    if not enlace or 'pdf' not in enlace.lower():
+        return None
+    absolute_url = urljoin(url_base, enlace)
+    return absolute_url if absolute_url.startswith('http') else None
+
+@dataclass
+class ResultadoNavegador:
+    pdf_urls: List[str] = field(default_factory=list)
+    tiempos: Optional[Dict] = None # Mediciones de carga, espera y trabajo del intento que terminó
 
 class PdfUrlExtractor:
     """Extrae URLs de de documentos PDF desde una página web."""
 
-    def __init__(self, config):
+    def __init__(self, config, almacen: Optional[AlmacenPdf] = None):
         self.config = config
+        self.almacen = almacen or AlmacenPdf()
+        self.planificador = PlanificadorHosts.compartido(config)
+        self.pool = PoolNavegadores(config, usos_por_contexto=config.SCRAPING_CONFIG['usos_por_contexto'])
+        self.url_validator = UrlValidator()
 
-    def _expandir_secciones_ocultas(self, page):
-        """Expande secciones colapsadas o con contenido oculto de la página."""
-        selectores = [
-            'button[aria-expanded="false"]',
-            '.accordion-button:not(.collapsed)',
-            '.show-more',
-            '.expand-section',
-            '[data-toggle="collapse"]'
-        ]
-        
-        for selector in selectores:
-            elements = page.query_selector_all(selector)
-            for element in elements:
-                try:
-                    element.click()
-                    page.wait_for_timeout(300)
-                except Exception:
-                    continue
+    def _expandir_secciones_ocultas(self, page, perfil: PerfilOrganismo) -> List[str]:
+        """Expande las secciones colapsadas de la página y devuelve los ids de los paneles desplegados."""
+        paneles = []
+        for element in page.query_selector_all(perfil.selector_expandibles):
+            try:
+                # Un control oculto no debe bloquear el rastreo hasta el timeout general
+                element.click(timeout=2000)
+                if (panel := panel_controlado(element.get_attribute('aria-controls'),
+                                              element.get_attribute('data-target'))):
+                    paneles.append(panel)
+            except Exception:
+                continue
+        return paneles
 
-    def extraer_pdfs(self, url: str, max_retries: int, base_wait_time: int, silent: bool) -> List[str]:
-        """Extrae URLs de documentos PDF de la página especificada."""
+    def extraer_pdfs(self, url: str, max_retries: int, base_wait_time: int, silent: bool) -> ResultadoNavegador:
+        """Extrae URLs de documentos PDF de la página especificada, con los tiempos de su rastreo."""
         pdf_urls = set()
         retries = 0
+        organismo = self.url_validator.determinar_organismo(url)
+        perfil = perfil_organismo(organismo)
 
         while retries < max_retries:
+            bloqueo = BloqueoRecursos(organismo, perfil.bloqueo) if self.config.SCRAPING_CONFIG['bloquear_recursos'] else None
+            captura = (CapturaPdf(self.almacen, self.config.SCRAPING_CONFIG['captura_max_mb'] * 1024 * 1024)
+                       if self.config.SCRAPING_CONFIG['capturar_pdfs'] else None)
             try:
-                with sync_playwright() as p:
-                    # Lanzar navegador con opciones avanzadas
-                    browser = p.chromium.launch(
-                        headless=self.config.SCRAPING_CONFIG['headless'],
-                        args=[
-                            '--disable-blink-features=AutomationControlled',
-                            '--ignore-certificate-errors',
-                            '--start-maximized',
-                            '--no-sandbox',
-                            '--disable-setuid-sandbox',
-                            '--disable-dev-shm-usage'
-                        ],
-                        timeout=30000
-                    )
-                    context = browser.new_context(
-                        user_agent=self.config.SCRAPING_CONFIG['user_agent'],
-                        viewport={'width': 1920, 'height': 1080},
-                        ignore_https_errors=True,
-                        java_script_enabled=True,
-                        bypass_csp=True
-                    )
-
+                # Contexto aislado de un navegador persistente, en lugar de lanzar Chromium en cada intento
+                with self.pool.contexto() as context:
                     # Configurar tiempo de espera más largo para páginas pesadas
                     page = context.new_page()
+                    if bloqueo:
+                        page.route('**/*', bloqueo.manejar)
+                    if captura:
+                        # Los PDFs que cargan la página o sus secciones al desplegarse, aunque su URL no lo parezca
+                        page.on('response', captura.manejar)
                     page.set_default_timeout(30000)
-                    page.goto(url, wait_until="networkidle", timeout=60000)
-                    page.wait_for_timeout(5000)
+                    self.planificador.esperar(url)
+                    # La medición empieza con la navegación, no con la espera al ritmo del host
+                    espera = EsperaPagina(url, organismo, perfil.espera)
+                    inicio = time.time()
+                    response = page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                    espera.registrar_carga(inicio)
+                    if response and response.status in ESTADOS_LIMITE:
+                        self.planificador.penalizar(url, response.headers.get('retry-after'))
+                        raise Exception(f"El servidor pide reducir el ritmo (HTTP {response.status})")
+                    # En lugar de networkidle y una pausa fija, esperar a que los enlaces dejen de cambiar
+                    espera.esperar_contenido(page)
                     
                     # Verificar si la página contiene CAPTCHA
                     if "captcha" in page.content().lower() and not silent:
                         print(f"Advertencia: CAPTCHA detectado en {url}")
                         break
 
-                    self._expandir_secciones_ocultas(page)
+                    paneles = self._expandir_secciones_ocultas(page, perfil)
+                    espera.esperar_paneles(page, paneles)
                     
                     all_links = []
                     try:
-                        all_links = page.eval_on_selector_all(
-                            'a[href], [role="link"][href], [data-href], [data-pdf]',
-                            '''elements => elements.map(el => {
-                                try {
-                                    return el.href || el.getAttribute('data-href') || 
-                                           el.getAttribute('data-pdf') || null;
-                                } catch (e) {
-                                    return null;
-                                }
-                            }).filter(Boolean)'''
-                        )
+                        all_links = page.eval_on_selector_all(SELECTOR_ENLACES, SCRIPT_ENLACES)
                     except Exception as e:
                         if not silent: print(f"Error extraer enlaces: {str(e)}")
                     
                     # Filtrar y validar enlaces
                     for link in all_links:
-                        if link.lower().endswith('.pdf') or 'pdf' in link.lower():
-                            absolute_url = urljoin(url, link)
-                            if absolute_url.startswith('http'):
-                                pdf_urls.add(absolute_url)
+                        if (absolute_url := resolver_enlace_pdf(url, link)):
+                            pdf_urls.add(absolute_url)
 
                     # Buscar iframes y embeds que contengan PDFs
                     iframes = page.query_selector_all('iframe, embed')
                     for iframe in iframes:
                         try:
-                            src = iframe.get_attribute('src')
-                            if src and ('pdf' in src.lower() or src.lower().endswith('.pdf')):
-                                absolute_url = urljoin(url, src)
-                                if absolute_url.startswith('http'):
-                                    pdf_urls.add(absolute_url)
+                            if (absolute_url := resolver_enlace_pdf(url, iframe.get_attribute('src'))):
+                                pdf_urls.add(absolute_url)
                         except Exception: continue
+
+                    if captura:
+                        pdf_urls.update(captura.guardar())
                     
-                    context.close()
-                    browser.close()
-                    return list(pdf_urls)
+                    return ResultadoNavegador(list(pdf_urls), espera.finalizar(len(pdf_urls), bloqueo))
                     
             except PlaywrightTimeoutError:
                 retries, wait_time = self._manejar_reintento(retries, max_retries, base_wait_time, silent)
@@ -120,7 +137,7 @@ class PdfUrlExtractor:
                 if not silent: print(f"Error Playwright: {str(e)}")
                 time.sleep(wait_time)
         
-        return list(pdf_urls)
+        return ResultadoNavegador(list(pdf_urls))
 
     def _manejar_reintento(self, retries: int, max_retries: int, base_wait_time: int, silent: bool):
         """Calcula el tiempo de espera y actualiza el contador de reintentos."""
@@ -0,0 +1,66 @@
+"""
+Módulo para repartir las URLs de convocatorias entre agentes de rastreo a través de la base de datos.
+"""
+
+import os
+import uuid
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from nucleo.configuracion.configuracion import Config
+from nucleo.base_datos.modelos import Database
+
+class FronteraUrls:
+    """Frontera de URLs persistente: cada URL la procesa un único agente, aunque haya varios en distintas máquinas.
+
+    Un agente reclama la URL con una concesión temporal que renueva mientras la procesa; si el agente
+    se detiene sin finalizarla, la concesión vence y otro puede reclamarla.
+    """
+
+    def __init__(self, db: Optional[Database] = None, config: Optional[Config] = None):
+        ajustes = (config or Config()).FRONTERA_CONFIG
+        self.db = db or Database()
+        self.concesion_segundos = ajustes['concesion_segundos']
+        self.max_intentos = ajustes['max_intentos']
+        self.trabajador = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def encolar(self, url: str, prioridad: int = 0) -> bool:
+        return self.db.encolar_url_frontera(url, prioridad)
+
+    def reclamar(self, url: str, repetir_completada: bool = False) -> Optional[bool]:
+        """Reclama una URL concreta; False si otro agente la está procesando o ya se completó, None si falla la base de datos."""
+        return self.db.reclamar_url_frontera(url, self.trabajador, self.concesion_segundos, repetir_completada)
+
+    def siguiente(self) -> Optional[str]:
+        """Reclama la URL pendiente de más prioridad, o None si no queda ninguna disponible."""
+        entrada = self.db.reclamar_siguiente_frontera(self.trabajador, self.concesion_segundos, self.max_intentos)
+        return entrada['url'] if entrada else None
+
+    @contextmanager
+    def concesion(self, url: str) -> Iterator[Dict]:
+        """Renueva la concesión de una URL reclamada mientras se procesa y la finaliza al salir.
+
+        Si al salir el diccionario entregado tiene 'error', o se produce una excepción, la URL queda fallida.
+        """
+        estado = {'error': None}
+        detener = threading.Event()
+        renovacion = threading.Thread(target=self._renovar, args=(url, detener), daemon=True)
+        renovacion.start()
+        try:
+            yield estado
+        except Exception as e:
+            estado['error'] = str(e)
+            raise
+        finally:
+            detener.set()
+            self.db.finalizar_url_frontera(url, self.trabajador, 'fallido' if estado['error'] else 'completado',
+                                           estado['error'])
+
+    def _renovar(self, url: str, detener: threading.Event) -> None:
+        # Renovar con margen: a un tercio de la concesión
+        while not detener.wait(self.concesion_segundos / 3):
+            if not self.db.renovar_concesion_frontera(url, self.trabajador, self.concesion_segundos):
+                print(f"Concesión perdida para {url}")
+                return
@@ -3,19 +3,25 @@ Agente que coordina el flujo completo de scraping, validación y procesamiento
 de convocatorias y sus documentos PDF asociados.
 """
 
-import requests
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 from nucleo.configuracion.configuracion import Config
 from nucleo.base_datos.modelos import Database
-from servicios.utilidades.adaptador_ssl import CustomSSLAdapter
+from servicios.utilidades.cliente_http import ClienteHttp
+from servicios.utilidades.validadores_http import ValidadoresHttp
 from agentes.fragmentador.gestor_fragmentacion import ChunkingAgent
 from agentes.llm.gestor_llm import LLMAgent
 from servicios.monitoreo.recolector_metricas import MetricasManager
 
 from .validador_url import UrlValidator
 from .extractor_url_pdf import PdfUrlExtractor
+from .extractor_html import HtmlPdfExtractor
 from .verificador_pdf import PdfVerifier
+from .rastreador_asincrono import RastreadorAsincrono
+from .verificacion_paralela import VerificacionParalela
+from .frontera_urls import FronteraUrls
+from .perfiles_organismo import perfil_organismo
 
 class CrawlerAgent:
     """Agente principial de scraping y procesamiento de convocatorias."""
@@ -30,38 +36,62 @@ class CrawlerAgent:
         self.pdf_processor = ChunkingAgent()
         self.llm = LLMAgent()
         self.metricas = MetricasManager()
-        self.session = self._configurar_sesion()
-        self.url_procesadas = set()
+        # Sesión compartida con el verificador y el descargador para reutilizar conexiones por host
+        self.cliente_http = ClienteHttp.compartido(self.config)
+        self.session = self.cliente_http.session
+        self.frontera = FronteraUrls(self.db, self.config)
         self.url_validator = UrlValidator()
-        self.pdf_extractor = PdfUrlExtractor(self.config)
-        self.pdf_verifier = PdfVerifier()
+        self.validadores_http = ValidadoresHttp(self.db)
+        self.html_extractor = HtmlPdfExtractor(self.validadores_http)
+        self.pdf_verifier = PdfVerifier(validadores=self.validadores_http)
+        # Los PDFs capturados al rastrear con el navegador quedan en el almacén del verificador
+        self.pdf_extractor = PdfUrlExtractor(self.config, self.pdf_verifier.almacen)
+        # En modo asíncrono todos los agentes del proceso comparten navegador y límites por host
+        self.rastreador_async = (RastreadorAsincrono.compartido(self.config)
+                                 if self.config.SCRAPING_CONFIG['asincrono'] else None)
 
     def set_silent(self, silent: bool):
         """Activa o desactiva el modo silencioso."""        
         self.silent = silent
 
-    def _configurar_sesion(self):
-        """Configura una sesión HTTP con headers y adaptador SSL personalizado."""        
-        session = requests.Session()
-        adapter = CustomSSLAdapter(max_retries=self.max_retries)
-        session.mount('https://', adapter)
-        session.mount('http://', adapter)
-        
-        session.headers.update({
-            'User-Agent': self.config.SCRAPING_CONFIG['user_agent'],
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
-        
-        session.verify = False # Verificación SSL desactivada
-        session.trust_env = False
-        return session
-
     def procesar_convocatoria(self, url: str) -> Dict:
-        """Procesa una convocatoria desde su URL."""        
+        """Procesa una convocatoria desde su URL."""
+        if not self.url_validator.es_valida(url):
+            return {'error': 'url_invalida', 'detalle': 'URL no válida'}
+
+        if self.db.obtener_convocatoria_por_url(url):
+            return {'error': 'duplicada', 'detalle': 'Convocatoria ya registrada'}
+
+        # La frontera impide que dos agentes, de este u otro proceso, procesen la misma URL
+        reclamada = self.frontera.reclamar(url)
+        if reclamada is None:
+            return {'error': 'bd_error', 'detalle': 'Error BD: no se pudo reclamar la URL en la frontera'}
+        if not reclamada:
+            return {'error': 'duplicada', 'detalle': 'Convocatoria ya procesada o en proceso'}
+        return self._procesar_url_reclamada(url)
+
+    def procesar_frontera(self, limite: Optional[int] = None) -> int:
+        """Procesa URLs pendientes de la frontera compartida hasta agotarlas o alcanzar el límite."""
+        procesadas = 0
+        while (limite is None or procesadas < limite) and (url := self.frontera.siguiente()):
+            self._procesar_url_reclamada(url)
+            procesadas += 1
+        return procesadas
+
+    def _procesar_url_reclamada(self, url: str) -> Dict:
+        with self.frontera.concesion(url) as concesion:
+            # Una URL ya registrada vuelve a la frontera cuando su revisión falló o se interrumpió
+            if (convocatoria := self.db.obtener_convocatoria_por_url(url)):
+                resultado = self._actualizar_convocatoria(convocatoria)
+            else:
+                resultado = self._procesar_convocatoria(url)
+            if 'error' in resultado and resultado['error'] != 'duplicada':
+                concesion['error'] = resultado['detalle']
+            elif resultado.get('descartados'):
+                concesion['error'] = self._detalle_descartados(resultado['descartados'])
+        return resultado
+
+    def _procesar_convocatoria(self, url: str) -> Dict:
         try:
             self.metricas.registrar_inicio_extraccion()
 
@@ -103,7 +133,8 @@ class CrawlerAgent:
                 'estado': 'éxito',
                 'convocatoria': convocatoria_actualizada,
                 'documentos': resultado_documentos['documentos'],
-                'total_documentos': len(resultado_documentos['documentos'])
+                'total_documentos': len(resultado_documentos['documentos']),
+                'descartados': resultado_documentos['descartados']
             }
 
         except Exception as e:
@@ -114,61 +145,22 @@ class CrawlerAgent:
 
     def procesar_documentos_convocatoria(self, id_convocatoria: int, url_convocatoria: str) -> Dict:
         """Extrae y procesa los PDFs asociados a una convocatoria."""
-        resultado = {'exito': False, 'mensaje': '', 'documentos': []}
+        resultado = {'exito': False, 'mensaje': '', 'documentos': [], 'descartados': []}
         
-        if not url_convocatoria or url_convocatoria in self.url_procesadas:
-            resultado['mensaje'] = "URL inválida o ya procesada"
+        if not url_convocatoria:
+            resultado['mensaje'] = "URL inválida"
             return resultado
-            
-        self.url_procesadas.add(url_convocatoria)
 
         try:
-            pdf_urls = self.pdf_extractor.extraer_pdfs(
-                url_convocatoria,
-                max_retries=self.max_retries,
-                base_wait_time=self.base_wait_time,
-                silent=self.silent
-            )
-            
-            pdfs_validos = [
-                url for url in pdf_urls 
-                if self.pdf_verifier.verificar_es_pdf(url, self.session, self.config.SCRAPING_CONFIG['timeout'])
-            ]
+            pdfs_validos, resultado['descartados'] = self._extraer_pdfs_validos(url_convocatoria)
+            self.db.registrar_rastreo_convocatoria(id_convocatoria)
             
             if not pdfs_validos:
-                resultado['mensaje'] = "No se encontraron PDFs válidos"
+                resultado['mensaje'] = (self._detalle_descartados(resultado['descartados'])
+                                        if resultado['descartados'] else "No se encontraron PDFs válidos")
                 return resultado
             
-            documentos_procesados = []
-
-            for pdf_url in pdfs_validos:
-                try:
-                    metadatos = self.pdf_verifier.obtener_metadatos_pdf(
-                        pdf_url, 
-                        self.session, 
-                        self.config.SCRAPING_CONFIG['timeout']
-                    )
-
-                    if not metadatos: 
-                        continue
-
-                    exito, _, doc_id = self.db.insertar_documento(metadatos)
-                    if not exito: 
-                        continue
-
-                    if not self.db.asociar_documento_convocatoria(id_convocatoria, doc_id): 
-                        continue
-                    
-                    num_chunks = self.pdf_processor.procesar_documento(doc_id, pdf_url)
-                    
-                    if num_chunks <= 0: 
-                        continue
-
-                    if (doc_actualizado := self.db.documento_existe_por_id(doc_id)):
-                        documentos_procesados.append(doc_actualizado)
-
-                except Exception: 
-                    continue
+            documentos_procesados = self._registrar_documentos(id_convocatoria, pdfs_validos)
                         
             if documentos_procesados:
                 resultado.update({
@@ -184,7 +176,179 @@ class CrawlerAgent:
         except Exception as e:
             resultado['mensaje'] = f"Error procesando documentos: {str(e)}"
             return resultado
+
+    def actualizar_convocatoria(self, convocatoria: Dict) -> Dict:
+        """Vuelve a rastrear una convocatoria registrada e incorpora solo sus documentos nuevos o modificados."""
+        id_convocatoria = convocatoria['id']
+        reclamada = self.frontera.reclamar(convocatoria['enlace_convocatoria'], repetir_completada=True)
+        if reclamada is None:
+            return {'error': 'bd_error', 'detalle': 'Error BD: no se pudo reclamar la URL en la frontera',
+                    'convocatoria_id': id_convocatoria}
+        if not reclamada:
+            return {'estado': 'en_curso', 'convocatoria_id': id_convocatoria, 'total_documentos': 0}
+        with self.frontera.concesion(convocatoria['enlace_convocatoria']) as concesion:
+            resultado = self._actualizar_convocatoria(convocatoria)
+            if 'error' in resultado:
+                concesion['error'] = resultado['detalle']
+            elif resultado.get('descartados'):
+                concesion['error'] = self._detalle_descartados(resultado['descartados'])
+        return resultado
+
+    def _actualizar_convocatoria(self, convocatoria: Dict) -> Dict:
+        id_convocatoria = convocatoria['id']
+        try:
+            pdfs_validos, descartados = self._extraer_pdfs_validos(convocatoria['enlace_convocatoria'])
+            conocidos = {doc['hash_sha256'] for doc in self.db.obtener_documentos_por_convocatoria(id_convocatoria)}
+            nuevos = [metadatos for metadatos in pdfs_validos if metadatos['hash_sha256'] not in conocidos]
+            if not nuevos:
+                return {'estado': 'sin_cambios', 'convocatoria_id': id_convocatoria, 'total_documentos': 0,
+                        'descartados': descartados}
+
+            # Una nueva versión de un documento ya asociado sustituye a la anterior en la convocatoria
+            documentos = self._registrar_documentos(id_convocatoria, nuevos, sustituir_versiones=True)
+            if documentos:
+                self.completar_informacion_con_llm(id_convocatoria, documentos)
+            return {
+                'estado': 'actualizada',
+                'convocatoria_id': id_convocatoria,
+                'documentos': documentos,
+                'total_documentos': len(documentos),
+                'descartados': descartados
+            }
+        except Exception as e:
+            return {'error': 'error_general', 'detalle': f'Error actualizando convocatoria: {str(e)}'}
+        finally:
+            # También tras un fallo, para no reintentarla en cada ronda
+            self.db.registrar_rastreo_convocatoria(id_convocatoria)
+
+    def _registrar_documentos(self, id_convocatoria: int, pdfs_validos: List[Dict],
+                              sustituir_versiones: bool = False) -> List[Dict]:
+        """Registra y asocia los PDFs a la convocatoria, los procesa y devuelve los que quedaron vectorizados."""
+        documentos_registrados = []
+
+        for metadatos in pdfs_validos:
+            try:
+                pdf_url = metadatos['enlace_documento']
+                exito, _, doc_id = self.db.insertar_documento(metadatos)
+                if not exito: 
+                    continue
+
+                if not self.db.asociar_documento_convocatoria(id_convocatoria, doc_id): 
+                    continue
+                if sustituir_versiones:
+                    self.db.desasociar_version_anterior(id_convocatoria, doc_id)
+
+                # Evitar procesar dos veces el mismo documento publicado en varias URLs
+                if any(doc_id == registrado for registrado, _ in documentos_registrados):
+                    continue
+                documentos_registrados.append((doc_id, pdf_url))
+
+            except Exception: 
+                continue
+
+        # Procesar todos los documentos a la vez para solapar descarga, extracción y vectorización
+        chunks_por_documento = self.pdf_processor.procesar_documentos(documentos_registrados)
+
+        documentos_procesados = []
+        for doc_id, _ in documentos_registrados:
+            if chunks_por_documento.get(doc_id, 0) <= 0:
+                continue
+            if (doc_actualizado := self.db.documento_existe_por_id(doc_id)):
+                documentos_procesados.append(doc_actualizado)
+        return documentos_procesados
         
+    def _extraer_pdfs_validos(self, url_convocatoria: str) -> Tuple[List[Dict], List[str]]:
+        """Extrae los enlaces a PDF de la página de la convocatoria.
+
+        Devuelve los metadatos de los que son PDFs reales y los enlaces que no se verificaron por falta de tiempo.
+        """
+        ajustes = self.config.SCRAPING_CONFIG
+        # Los candidatos se verifican en paralelo en cuanto se descubren, mientras continúa la extracción
+        verificacion = VerificacionParalela(
+            self.pdf_verifier, self.session, ajustes['timeout'],
+            workers=ajustes['verificaciones_simultaneas'],
+            max_por_host=ajustes['verificaciones_por_host'],
+            presupuesto_segundos=ajustes['presupuesto_verificacion']
+        )
+        dominio = urlparse(url_convocatoria).hostname or ''
+        organismo = self.url_validator.determinar_organismo(url_convocatoria)
+        # La estrategia fijada en el perfil del organismo prevalece sobre la aprendida para el dominio
+        estrategia = perfil_organismo(organismo).estrategia or self.db.obtener_estrategia_dominio(dominio)
+
+        pdfs_html = []
+        if estrategia != 'navegador':
+            # Vía rápida: muchas páginas sirven los enlaces en el HTML, sin necesidad de Chromium
+            resultado = self.html_extractor.extraer_pdfs(url_convocatoria, self.session, ajustes['timeout'], organismo,
+                                                         self.silent)
+            if resultado.tiempos:
+                self.metricas.registrar_tiempos_rastreo([resultado.tiempos])
+            pdfs_html = resultado.pdf_urls
+            for pdf_url in pdfs_html:
+                verificacion.enviar(pdf_url)
+
+        # Los indicios de JavaScript se ignoran en dominios donde el HTML ya demostró bastar
+        if pdfs_html and (estrategia == 'html' or not resultado.necesita_navegador):
+            self.db.registrar_estrategia_dominio(dominio, 'html')
+        else:
+            pdf_urls = self._extraer_pdfs_navegador(url_convocatoria, verificacion.enviar)
+            # El navegador solo compensa en el dominio si encuentra enlaces que el HTML no tenía
+            if estrategia != 'navegador' and pdf_urls:
+                self.db.registrar_estrategia_dominio(dominio, 'navegador' if set(pdf_urls) - set(pdfs_html) else 'html')
+
+        pdfs_validos = verificacion.resultados()
+        self.metricas.registrar_verificacion(url_convocatoria, verificacion.estadisticas)
+        if verificacion.descartados:
+            # No se ocultan aunque silent esté activo: la convocatoria queda incompleta hasta otro rastreo
+            print(f"Advertencia: {len(verificacion.descartados)} enlaces de {url_convocatoria} sin verificar "
+                  f"por falta de tiempo: {', '.join(verificacion.descartados)}")
+        if not self.silent:
+            estadisticas = verificacion.estadisticas
+            print(f"Verificados {estadisticas['comprobados']} enlaces en {estadisticas['duracion']:.1f} s "
+                  f"({estadisticas['enlaces_por_segundo']:.1f} enlaces/s): {estadisticas['validos']} PDFs válidos")
+            if (conexiones := self.cliente_http.estadisticas().get(dominio)):
+                print(f"Conexiones con {dominio}: {conexiones['conexiones']} para {conexiones['peticiones']} peticiones "
+                      f"({conexiones['reutilizacion']:.0%} reutilizadas, {conexiones['http2']} por HTTP/2)")
+        return pdfs_validos, verificacion.descartados
+
+    def _detalle_descartados(self, descartados: List[str]) -> str:
+        """Motivo con el que la URL queda fallida en la frontera, para que otro rastreo verifique los enlaces."""
+        return f"{len(descartados)} enlaces sin verificar por falta de tiempo"
+
+    def _extraer_pdfs_navegador(self, url_convocatoria: str, al_encontrar: Callable[[str], None]) -> List[str]:
+        """Rastrea la página con Playwright, pasando cada enlace a PDF encontrado a al_encontrar."""
+        if not self.rastreador_async:
+            resultado = self.pdf_extractor.extraer_pdfs(
+                url_convocatoria,
+                max_retries=self.max_retries,
+                base_wait_time=self.base_wait_time,
+                silent=self.silent
+            )
+            self.metricas.registrar_usos_navegador(self.pdf_extractor.pool.extraer_usos())
+            if resultado.tiempos:
+                self.metricas.registrar_tiempos_rastreo([resultado.tiempos])
+            for pdf_url in resultado.pdf_urls:
+                al_encontrar(pdf_url)
+            return resultado.pdf_urls
+
+        # El rastreador asíncrono avisa de cada enlace en cuanto aparece
+        resultado = self.rastreador_async.extraer_pdfs(
+            url_convocatoria,
+            max_retries=self.max_retries,
+            base_wait_time=self.base_wait_time,
+            silent=self.silent,
+            al_encontrar=al_encontrar
+        )
+        if resultado.tiempos:
+            self.metricas.registrar_tiempos_rastreo([resultado.tiempos])
+        return resultado.pdf_urls
+
+    def completar_informacion_con_llm_documentos(self, documento_ids: List[int]) -> None:
+        """Enriquece documentos sin convocatoria asociada usando un modelo LLM."""
+        try:
+            self.llm.completar_informacion_documentos(documento_ids)
+        except Exception as e:
+            print(f"Error LLM: {str(e)}")
+
     def completar_informacion_con_llm(self, convocatoria_id: int, documentos: List[Dict]) -> None:
         """Enriquece los documentos y la convocatoria usando un modelo LLM."""
         try:
@@ -0,0 +1,62 @@
+"""
+Módulo con los perfiles de rastreo de cada organismo: qué desplegar, cómo esperar y qué bloquear.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from .espera_pagina import AjustesEspera
+from .bloqueo_recursos import PerfilBloqueo, TIPOS_BLOQUEADOS
+
+# Controles que ocultan contenido hasta que se pulsan
+SELECTORES_EXPANDIBLES = (
+    'button[aria-expanded="false"]',
+    '.accordion-button.collapsed',
+    '.show-more',
+    '.expand-section',
+    '[data-toggle="collapse"]'
+)
+
+SELECTOR_ENLACES = 'a[href], [role="link"][href], [data-href], [data-pdf]'
+
+@dataclass
+class PerfilOrganismo:
+    nombre: str
+    expandibles: Tuple[str, ...] = SELECTORES_EXPANDIBLES
+    espera: AjustesEspera = field(default_factory=AjustesEspera)
+    bloqueo: PerfilBloqueo = field(default_factory=PerfilBloqueo)
+    estrategia: Optional[str] = None # 'html' o 'navegador' fijas; None: la aprendida para el dominio
+
+    @property
+    def selector_expandibles(self) -> str:
+        return ', '.join(self.expandibles)
+
+PERFIL_GENERICO = PerfilOrganismo(nombre='OTRO')
+
+# Organismos con ajustes propios. Los desplegables propios solo se añaden tras comprobarlos
+# en las páginas reales del organismo
+PERFILES_ORGANISMO: Dict[str, PerfilOrganismo] = {
+    'ADER': PerfilOrganismo(
+        nombre='ADER',
+        espera=AjustesEspera(estable_ms=300, max_espera_ms=8000)
+    ),
+    'CDTI': PerfilOrganismo(
+        nombre='CDTI',
+        espera=AjustesEspera(estable_ms=1000, max_espera_ms=20000),
+        # Sus desplegables dependen de las hojas de estilo para mostrar u ocultar los paneles
+        bloqueo=PerfilBloqueo(tipos=TIPOS_BLOQUEADOS - {'stylesheet'})
+    ),
+    'Comunidad de Madrid': PerfilOrganismo(
+        nombre='Comunidad de Madrid',
+        espera=AjustesEspera(estable_ms=800, max_espera_ms=15000),
+        bloqueo=PerfilBloqueo(tipos=TIPOS_BLOQUEADOS - {'stylesheet'})
+    ),
+    'TRADE': PerfilOrganismo(
+        nombre='TRADE',
+        espera=AjustesEspera(estable_ms=800)
+    )
+}
+
+def perfil_organismo(organismo: str) -> PerfilOrganismo:
+    """Devuelve el perfil del organismo o el genérico si no tiene uno propio."""
+    return PERFILES_ORGANISMO.get(organismo, PERFIL_GENERICO)
@@ -0,0 +1,112 @@
+"""
+Módulo para volver a rastrear periódicamente las convocatorias registradas, con prioridad según su plazo.
+"""
+
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from nucleo.configuracion.configuracion import Config
+from nucleo.base_datos.modelos import Database
+
+from .gestor_extraccion import CrawlerAgent
+
+PATRON_FECHA = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+PATRON_ANIO = re.compile(r'\d{4}')
+
+# Respuestas del procesador de fecha_fin para plazos sin fecha de cierre
+PLAZOS_ABIERTOS = ('permanente', 'todo el año', 'continu', 'abierta')
+
+def intervalo_rastreo(fecha_fin: Optional[str], ajustes: Dict, hoy: Optional[date] = None) -> timedelta:
+    """Cada cuánto revisar una convocatoria: a menudo mientras está abierta, menos tras su cierre."""
+    hoy = hoy or date.today()
+    texto = (fecha_fin or '').strip().lower()
+
+    fin = None
+    if (coincidencia := PATRON_FECHA.search(texto)):
+        try:
+            fin = date(*map(int, coincidencia.groups()))
+        except ValueError:
+            pass
+    elif PATRON_ANIO.fullmatch(texto) and int(texto) < hoy.year:
+        fin = date(int(texto), 12, 31)
+
+    if fin is None:
+        if any(plazo in texto for plazo in PLAZOS_ABIERTOS):
+            return timedelta(hours=ajustes['horas_abierta'])
+        # 'No', el año en curso o texto libre
+        return timedelta(hours=ajustes['horas_sin_fecha'])
+    if fin >= hoy:
+        return timedelta(hours=ajustes['horas_abierta'])
+    # Tras el cierre se siguen publicando resoluciones y correcciones durante un tiempo
+    if (hoy - fin).days <= ajustes['dias_tras_cierre']:
+        return timedelta(days=ajustes['dias_cerrada_reciente'])
+    return timedelta(days=ajustes['dias_cerrada'])
+
+class PlanificadorRastreo:
+    """Revisa en segundo plano las páginas de las convocatorias y añade los documentos que aparezcan.
+
+    En cada ronda se procesan primero las URLs pendientes de la frontera compartida y después se
+    eligen las convocatorias cuyo intervalo de revisión ha vencido, empezando por las que más lo
+    han superado en proporción a su intervalo.
+    """
+
+    def __init__(self, crawler: Optional[CrawlerAgent] = None, config: Optional[Config] = None,
+                 db: Optional[Database] = None):
+        self.config = config or Config()
+        self.ajustes = self.config.RASTREO_CONFIG
+        self.db = db or Database()
+        self.crawler = crawler or CrawlerAgent()
+        self.crawler.set_silent(True)
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def pendientes(self, ahora: Optional[datetime] = None) -> List[Dict]:
+        """Devuelve las convocatorias que toca revisar, de mayor a menor prioridad."""
+        ahora = ahora or datetime.now(timezone.utc)
+        pendientes = []
+        for convocatoria in self.db.obtener_convocatorias_para_rastreo():
+            intervalo = intervalo_rastreo(convocatoria['fecha_fin'], self.ajustes, ahora.date())
+            ultimo = convocatoria['fecha_ultimo_rastreo'] or convocatoria['fecha_registro']
+            retraso = (ahora - ultimo) / intervalo if ultimo else float('inf')
+            if retraso >= 1:
+                pendientes.append((retraso, convocatoria))
+        pendientes.sort(key=lambda par: par[0], reverse=True)
+        return [convocatoria for _, convocatoria in pendientes[:self.ajustes['max_por_ronda']]]
+
+    def ejecutar_ronda(self) -> Dict:
+        """Revisa las convocatorias pendientes y devuelve un resumen de la ronda."""
+        resumen = {'revisadas': 0, 'actualizadas': 0, 'documentos_nuevos': 0, 'errores': 0}
+        # Antes, las URLs encoladas en la frontera o abandonadas por un agente que se detuvo
+        resumen['frontera'] = self.crawler.procesar_frontera(self.ajustes['max_por_ronda'])
+        for convocatoria in self.pendientes():
+            if self._detener.is_set():
+                break
+            resultado = self.crawler.actualizar_convocatoria(convocatoria)
+            resumen['revisadas'] += 1
+            if 'error' in resultado:
+                resumen['errores'] += 1
+            elif resultado['total_documentos']:
+                resumen['actualizadas'] += 1
+                resumen['documentos_nuevos'] += resultado['total_documentos']
+        return resumen
+
+    def iniciar(self) -> None:
+        """Lanza las rondas periódicas en un hilo en segundo plano."""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name='rastreo-periodico', daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            try:
+                self.ejecutar_ronda()
+            except Exception as e:
+                print(f"Error en el rastreo periódico: {str(e)}")
+            self._detener.wait(self.ajustes['periodo_minutos'] * 60)
@@ -0,0 +1,181 @@
+"""
+Módulo para mantener un navegador Chromium persistente y reutilizar sus contextos entre rastreos.
+"""
+
+import time
+import atexit
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from playwright.sync_api import sync_playwright
+
+ARGUMENTOS_CHROMIUM = [
+    '--disable-blink-features=AutomationControlled',
+    '--ignore-certificate-errors',
+    '--start-maximized',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage'
+]
+
+def opciones_contexto(config) -> Dict:
+    """Opciones comunes de los contextos de rastreo."""
+    return {
+        'user_agent': config.SCRAPING_CONFIG['user_agent'],
+        'viewport': {'width': 1920, 'height': 1080},
+        'ignore_https_errors': True,
+        'java_script_enabled': True,
+        'bypass_csp': True
+    }
+
+@dataclass
+class MetricasPool:
+    lanzamientos: int = 0
+    tiempo_lanzamiento: float = 0.0
+    contextos_creados: int = 0
+    tiempo_creacion_contextos: float = 0.0
+    contextos_entregados: int = 0
+    contextos_reciclados: int = 0
+    caidas: int = 0
+    tiempo_en_uso: float = 0.0
+    inicio: float = field(default_factory=time.time)
+
+    @property
+    def lanzamiento_medio(self) -> float:
+        return self.tiempo_lanzamiento / self.lanzamientos if self.lanzamientos else 0.0
+
+    @property
+    def creacion_contexto_media(self) -> float:
+        return self.tiempo_creacion_contextos / self.contextos_creados if self.contextos_creados else 0.0
+
+    @property
+    def utilizacion(self) -> float:
+        """Fracción de la vida del pool con un contexto en uso."""
+        vida = time.time() - self.inicio
+        return min(1.0, self.tiempo_en_uso / vida) if vida > 0 else 0.0
+
+class PoolNavegadores:
+    """Entrega contextos aislados de un Chromium de larga duración, reciclándolos tras N usos o un fallo.
+
+    La API síncrona de Playwright está ligada al hilo que la inicia: cada hilo debe tener su propio pool.
+    """
+
+    def __init__(self, config, usos_por_contexto: int = 20, max_contextos_libres: int = 2):
+        self.config = config
+        self.usos_por_contexto = max(1, usos_por_contexto)
+        self.max_contextos_libres = max_contextos_libres
+        self.metricas = MetricasPool()
+        self._playwright = None
+        self._navegador = None
+        self._libres: List[Tuple[object, int]] = []
+        self._usos: List[Dict] = []
+        atexit.register(self.cerrar)
+
+    @contextmanager
+    def contexto(self) -> Iterator:
+        """Presta un contexto limpio para un rastreo y lo devuelve al pool al terminar."""
+        tiempo_lanzamiento = self._obtener_navegador()
+        lanzado = tiempo_lanzamiento is not None
+        reutilizado = bool(self._libres)
+        if reutilizado:
+            contexto, usos = self._libres.pop()
+        else:
+            contexto, usos = self._nuevo_contexto(), 0
+
+        self.metricas.contextos_entregados += 1
+        inicio = time.time()
+        correcto = False
+        try:
+            yield contexto
+            correcto = True
+        finally:
+            tiempo_uso = time.time() - inicio
+            self.metricas.tiempo_en_uso += tiempo_uso
+            self._devolver(contexto, usos + 1, correcto)
+
+            # Tiempo que habría costado lanzar el navegador y crear el contexto en cada rastreo
+            ahorrado = (0.0 if lanzado else self.metricas.lanzamiento_medio) + \
+                       (self.metricas.creacion_contexto_media if reutilizado else 0.0)
+            self._usos.append({
+                'navegador_reutilizado': not lanzado,
+                'contexto_reutilizado': reutilizado,
+                'tiempo_lanzamiento': tiempo_lanzamiento or 0.0,
+                'tiempo_ahorrado': ahorrado,
+                'tiempo_uso': tiempo_uso,
+                'utilizacion': self.metricas.utilizacion
+            })
+
+    def extraer_usos(self) -> List[Dict]:
+        """Devuelve y vacía los registros de uso pendientes de guardar."""
+        usos, self._usos = self._usos, []
+        return usos
+
+    def cerrar(self) -> None:
+        """Cierra los contextos libres, el navegador y Playwright."""
+        for contexto, _ in self._libres:
+            self._cerrar_contexto(contexto)
+        self._libres = []
+        try:
+            if self._navegador:
+                self._navegador.close()
+            if self._playwright:
+                self._playwright.stop()
+        except Exception:
+            pass # Al salir desde otro hilo, el proceso del navegador termina con el intérprete
+        self._navegador = None
+        self._playwright = None
+
+    def _obtener_navegador(self) -> Optional[float]:
+        """Garantiza un navegador conectado y devuelve el tiempo de lanzamiento si ha habido que lanzarlo."""
+        if self._navegador and self._navegador.is_connected():
+            return None
+
+        if self._navegador:
+            # El navegador se cayó: sus contextos libres ya no son válidos
+            self.metricas.caidas += 1
+            self.metricas.contextos_reciclados += len(self._libres)
+            self._libres = []
+        if not self._playwright:
+            self._playwright = sync_playwright().start()
+
+        inicio = time.time()
+        self._navegador = self._playwright.chromium.launch(
+            headless=self.config.SCRAPING_CONFIG['headless'],
+            args=ARGUMENTOS_CHROMIUM,
+            timeout=30000
+        )
+        tiempo = time.time() - inicio
+        self.metricas.lanzamientos += 1
+        self.metricas.tiempo_lanzamiento += tiempo
+        return tiempo
+
+    def _nuevo_contexto(self):
+        """Crea un contexto con la configuración de rastreo."""
+        inicio = time.time()
+        contexto = self._navegador.new_context(**opciones_contexto(self.config))
+        self.metricas.contextos_creados += 1
+        self.metricas.tiempo_creacion_contextos += time.time() - inicio
+        return contexto
+
+    def _devolver(self, contexto, usos: int, correcto: bool) -> None:
+        """Limpia el contexto para el siguiente rastreo o lo recicla si está agotado o falló."""
+        conectado = self._navegador is not None and self._navegador.is_connected()
+        if correcto and conectado and usos < self.usos_por_contexto and len(self._libres) < self.max_contextos_libres:
+            try:
+                for pagina in contexto.pages:
+                    pagina.close()
+                # Aislar el siguiente rastreo del estado de sesión de este
+                contexto.clear_cookies()
+                contexto.clear_permissions()
+                self._libres.append((contexto, usos))
+                return
+            except Exception:
+                pass
+        self.metricas.contextos_reciclados += 1
+        self._cerrar_contexto(contexto)
+
+    def _cerrar_contexto(self, contexto) -> None:
+        try:
+            contexto.close()
+        except Exception:
+            pass
@@ -0,0 +1,220 @@
+"""
+Módulo para rastrear varias páginas de convocatoria a la vez con la API asíncrona de Playwright.
+"""
+
+import time
+import atexit
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+
+from .pool_navegadores import ARGUMENTOS_CHROMIUM, opciones_contexto
+from .espera_pagina import EsperaPagina, panel_controlado
+from .bloqueo_recursos import BloqueoRecursos
+from .validador_url import UrlValidator
+from .extractor_url_pdf import SCRIPT_ENLACES, ResultadoNavegador, resolver_enlace_pdf
+from .perfiles_organismo import SELECTOR_ENLACES, PerfilOrganismo, perfil_organismo
+from .captura_pdf import CapturaPdf
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+from servicios.utilidades.planificador_hosts import PlanificadorHosts
+from servicios.utilidades.adaptador_ssl import ESTADOS_LIMITE
+
+class RastreadorAsincrono:
+    """Rastrea páginas de forma concurrente sobre un único Chromium, con un límite global y otro por host.
+
+    El bucle de eventos vive en un hilo propio: cualquier hilo puede encargar un rastreo y esperar
+    su resultado, y los rastreos de todos los hilos comparten navegador y límites.
+    """
+
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    @classmethod
+    def compartido(cls, config) -> 'RastreadorAsincrono':
+        """Devuelve el rastreador común del proceso, creándolo la primera vez."""
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls(config)
+            return cls._instancia
+
+    def __init__(self, config):
+        self.config = config
+        self.max_paginas = max(1, config.SCRAPING_CONFIG['paginas_simultaneas'])
+        self.max_por_host = max(1, config.SCRAPING_CONFIG['paginas_por_host'])
+        self.planificador = PlanificadorHosts.compartido(config)
+        self.almacen = AlmacenPdf()
+        self._playwright = None
+        self._navegador = None
+        # Los objetos de asyncio se crean dentro del bucle, en su primer uso
+        self._lock_navegador: Optional[asyncio.Lock] = None
+        self._limite_global: Optional[asyncio.Semaphore] = None
+        self._limites_host: Dict[str, asyncio.Semaphore] = {}
+        self.url_validator = UrlValidator()
+
+        self._bucle = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self._bucle.run_forever, name='rastreo-async', daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def extraer_pdfs(self, url: str, max_retries: int, base_wait_time: int, silent: bool,
+                     al_encontrar: Optional[Callable[[str], None]] = None) -> ResultadoNavegador:
+        """Extrae las URLs de PDF de la página y los tiempos de su rastreo, bloqueando el hilo llamante hasta terminar.
+
+        al_encontrar se invoca desde el hilo del bucle con cada URL nueva en cuanto aparece,
+        por lo que no debe bloquear.
+        """
+        futuro = asyncio.run_coroutine_threadsafe(
+            self._extraer(url, max_retries, base_wait_time, silent, al_encontrar), self._bucle
+        )
+        return futuro.result()
+
+    def cerrar(self) -> None:
+        """Cierra el navegador y detiene el bucle de eventos."""
+        if not self._bucle.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar(), self._bucle).result(timeout=10)
+        except Exception:
+            pass
+        self._bucle.call_soon_threadsafe(self._bucle.stop)
+
+    async def _cerrar(self) -> None:
+        if self._navegador:
+            await self._navegador.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._navegador = None
+        self._playwright = None
+
+    async def _extraer(self, url: str, max_retries: int, base_wait_time: int, silent: bool,
+                       al_encontrar: Optional[Callable[[str], None]]) -> ResultadoNavegador:
+        """Rastrea la página con reintentos, liberando los límites mientras espera entre intentos."""
+        pdf_urls: Dict[str, None] = {} # Conserva el orden de aparición
+
+        def anotar(enlace: str, capturado: bool = False) -> None:
+            # Las URLs capturadas ya son absolutas y se sabe que son PDFs, aunque no lo parezcan
+            absolute_url = enlace if capturado else resolver_enlace_pdf(url, enlace)
+            if absolute_url and absolute_url not in pdf_urls:
+                pdf_urls[absolute_url] = None
+                if al_encontrar:
+                    al_encontrar(absolute_url)
+
+        limite_host = self._semaforo_host(urlparse(url).netloc)
+        organismo = self.url_validator.determinar_organismo(url)
+        perfil = perfil_organismo(organismo)
+        retries = 0
+        while retries < max_retries:
+            bloqueo = BloqueoRecursos(organismo, perfil.bloqueo) if self.config.SCRAPING_CONFIG['bloquear_recursos'] else None
+            captura = (CapturaPdf(self.almacen, self.config.SCRAPING_CONFIG['captura_max_mb'] * 1024 * 1024)
+                       if self.config.SCRAPING_CONFIG['capturar_pdfs'] else None)
+            try:
+                # Primero el límite y el ritmo del host, para no ocupar un hueco global mientras se espera al host.
+                # El planificador solo calcula la espera, para no bloquear el bucle de eventos
+                async with limite_host:
+                    await asyncio.sleep(self.planificador.reservar(url))
+                    async with self._semaforo_global():
+                        # La medición empieza al obtener los límites, no mientras se espera por ellos
+                        espera = EsperaPagina(url, organismo, perfil.espera)
+                        await self._rastrear_pagina(url, silent, anotar, perfil, espera, bloqueo, captura)
+                        tiempos = espera.finalizar(len(pdf_urls), bloqueo)
+                return ResultadoNavegador(list(pdf_urls), tiempos)
+            except Exception as e:
+                retries += 1
+                wait_time = base_wait_time * (2 ** retries)
+                if not silent:
+                    print(f"Error Playwright: {str(e)}")
+                    if retries < max_retries:
+                        print(f"Reintentando en {wait_time} segundos...")
+                await asyncio.sleep(wait_time)
+
+        return ResultadoNavegador(list(pdf_urls))
+
+    async def _rastrear_pagina(self, url: str, silent: bool, anotar: Callable[[str], None], perfil: PerfilOrganismo,
+                               espera: EsperaPagina, bloqueo: Optional[BloqueoRecursos],
+                               captura: Optional[CapturaPdf] = None) -> None:
+        """Carga la página en un contexto propio y anota los enlaces a PDF según se descubren."""
+        navegador = await self._obtener_navegador()
+        contexto = await navegador.new_context(**opciones_contexto(self.config))
+        try:
+            page = await contexto.new_page()
+            if bloqueo:
+                await page.route('**/*', bloqueo.manejar_async)
+            if captura:
+                # Cada PDF recibido se anota cuando ya está en el almacén, para que su verificación no lo descargue
+                page.on('response', lambda response: captura.manejar_async(response, lambda pdf_url: anotar(pdf_url, True)))
+            page.set_default_timeout(30000)
+            inicio = time.time()
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            espera.registrar_carga(inicio)
+            if response and response.status in ESTADOS_LIMITE:
+                self.planificador.penalizar(url, response.headers.get('retry-after'))
+                raise Exception(f"El servidor pide reducir el ritmo (HTTP {response.status})")
+            await espera.esperar_contenido_async(page)
+
+            if "captcha" in (await page.content()).lower() and not silent:
+                print(f"Advertencia: CAPTCHA detectado en {url}")
+                return
+
+            # Los enlaces visibles se verifican mientras se despliegan las secciones ocultas
+            await self._anotar_enlaces(page, silent, anotar)
+            paneles = await self._expandir_secciones_ocultas(page, perfil)
+            await espera.esperar_paneles_async(page, paneles)
+            await self._anotar_enlaces(page, silent, anotar)
+
+            for iframe in await page.query_selector_all('iframe, embed'):
+                try:
+                    anotar(await iframe.get_attribute('src'))
+                except Exception:
+                    continue
+        finally:
+            if captura:
+                await captura.esperar_async()
+            await contexto.close()
+
+    async def _anotar_enlaces(self, page, silent: bool, anotar: Callable[[str], None]) -> None:
+        try:
+            # Toda la página: anotar descarta los enlaces ya vistos antes de desplegar las secciones
+            for link in await page.eval_on_selector_all(SELECTOR_ENLACES, SCRIPT_ENLACES):
+                anotar(link)
+        except Exception as e:
+            if not silent: print(f"Error extraer enlaces: {str(e)}")
+
+    async def _expandir_secciones_ocultas(self, page, perfil: PerfilOrganismo) -> List[str]:
+        """Expande las secciones colapsadas de la página y devuelve los ids de los paneles desplegados."""
+        paneles = []
+        for element in await page.query_selector_all(perfil.selector_expandibles):
+            try:
+                await element.click(timeout=2000)
+                if (panel := panel_controlado(await element.get_attribute('aria-controls'),
+                                              await element.get_attribute('data-target'))):
+                    paneles.append(panel)
+            except Exception:
+                continue
+        return paneles
+
+    async def _obtener_navegador(self):
+        """Devuelve el navegador compartido, relanzándolo si se ha caído."""
+        if self._lock_navegador is None:
+            self._lock_navegador = asyncio.Lock()
+        async with self._lock_navegador:
+            if not (self._navegador and self._navegador.is_connected()):
+                if not self._playwright:
+                    self._playwright = await async_playwright().start()
+                self._navegador = await self._playwright.chromium.launch(
+                    headless=self.config.SCRAPING_CONFIG['headless'],
+                    args=ARGUMENTOS_CHROMIUM,
+                    timeout=30000
+                )
+            return self._navegador
+
+    def _semaforo_global(self) -> asyncio.Semaphore:
+        if self._limite_global is None:
+            self._limite_global = asyncio.Semaphore(self.max_paginas)
+        return self._limite_global
+
+    def _semaforo_host(self, host: str) -> asyncio.Semaphore:
+        if host not in self._limites_host:
+            self._limites_host[host] = asyncio.Semaphore(self.max_por_host)
+        return self._limites_host[host]
@@ -2,7 +2,7 @@
 Módulo para validar URLs y determinar el organismo responsable según el dominio.
 """
 
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
 
 class UrlValidator:
     """Valida URLs y determina organismos a partir del dominio."""
@@ -16,6 +16,9 @@ class UrlValidator:
         'sodercan.es': 'SODERCAN', 'spri.eus': 'SPRI', 'andaluciatrade.es': 'TRADE'
     }
 
+    # Parámetros de campañas y analítica que no cambian el recurso enlazado
+    PARAMETROS_SEGUIMIENTO = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl'}
+
     def es_valida(self, url: str) -> bool:
         """Verifica si es una URL válida."""
         try:
@@ -24,10 +27,32 @@ class UrlValidator:
         except Exception:
             return False
 
+    def normalizar(self, url: str) -> str:
+        """Elimina el fragmento y los parámetros de seguimiento y pasa a minúsculas el esquema y el host."""
+        parsed = urlparse(url.strip())
+        netloc = parsed.netloc.lower()
+        if (parsed.scheme.lower(), parsed.port) in (('http', 80), ('https', 443)):
+            netloc = netloc.rsplit(':', 1)[0]
+        # Se filtra el texto original de la consulta para no alterar la codificación del resto de parámetros
+        parametros = [
+            parametro for parametro in parsed.query.split('&')
+            if parametro and not self._es_parametro_seguimiento(parametro.split('=', 1)[0].lower())
+        ]
+        return urlunparse((parsed.scheme.lower(), netloc, parsed.path or '/', parsed.params, '&'.join(parametros), ''))
+
+    def clave_deduplicacion(self, url: str) -> str:
+        """Clave común a las variantes de una URL: normalizada, sin esquema y con los parámetros ordenados."""
+        parsed = urlparse(self.normalizar(url))
+        return urlunparse(('', parsed.netloc, parsed.path, parsed.params, '&'.join(sorted(parsed.query.split('&'))), ''))
+
+    def _es_parametro_seguimiento(self, clave: str) -> bool:
+        return clave.startswith('utm_') or clave in self.PARAMETROS_SEGUIMIENTO
+
     def determinar_organismo(self, url: str) -> str:
         """Determina el organismo correspondiente a partir del dominio de una URL."""
-        dominio = urlparse(url).netloc.lower()
-        for dominio_org, org in self.ORGANISMOS.items():
-            if dominio_org in dominio:
+        # Búsqueda exacta de cada sufijo del host (sede.cdti.es, cdti.es, es) en lugar de recorrer ORGANISMOS
+        etiquetas = (urlparse(url).hostname or '').rstrip('.').split('.')
+        for i in range(len(etiquetas)):
+            if (org := self.ORGANISMOS.get('.'.join(etiquetas[i:]))):
                 return org
         return 'OTRO'
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Módulo para verificar en paralelo los enlaces candidatos a PDF de una convocatoria.
+"""
+
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .validador_url import UrlValidator
+from .verificador_pdf import PdfVerifier
+
+# Resultado de las verificaciones que no llegaron a empezar porque se agotó el presupuesto
+OMITIDA_POR_TIEMPO = object()
+
+class VerificacionParalela:
+    """Comprueba qué candidatos son PDFs y obtiene sus metadatos con varios hilos.
+
+    Los candidatos se deduplican al enviarse por su forma normalizada, pero se verifican y guardan
+    con la URL original, la misma con la que se registraron en rastreos anteriores. Cada host tiene
+    un límite de peticiones simultáneas y toda la verificación está acotada por un presupuesto de
+    tiempo que empieza con el primer candidato: al agotarse, los candidatos que no empezaron a
+    verificarse se descartan y quedan en descartados.
+    """
+
+    def __init__(self, verificador: PdfVerifier, session: requests.Session, timeout: int,
+                 workers: int = 8, max_por_host: int = 2, presupuesto_segundos: float = 120):
+        self.verificador = verificador
+        self.session = session
+        self.timeout = timeout
+        self.max_por_host = max(1, max_por_host)
+        self.presupuesto_segundos = presupuesto_segundos
+        self.url_validator = UrlValidator()
+        self.estadisticas: Dict = {}
+        self.descartados: List[str] = [] # URLs que no se verificaron por falta de tiempo
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='verificacion')
+        self._lock = threading.Lock()
+        self._limites: Dict[str, threading.Semaphore] = {}
+        self._futuros: Dict[str, Future] = {} # Clave de deduplicación -> verificación
+        self._urls: Dict[str, str] = {} # Clave de deduplicación -> URL original
+        self._sin_enviar: List[str] = [] # Claves que llegaron con el presupuesto agotado
+        self._candidatos = 0
+        # El presupuesto no corre mientras se rastrea la página sin haber encontrado aún enlaces
+        self._inicio: Optional[float] = None
+
+    def enviar(self, url: str) -> None:
+        """Encola un candidato si no es una variante de otro ya enviado. Puede llamarse desde cualquier hilo."""
+        clave = self.url_validator.clave_deduplicacion(url)
+        with self._lock:
+            self._candidatos += 1
+            if self._inicio is None:
+                self._inicio = time.time()
+            if clave in self._urls:
+                return
+            self._urls[clave] = url
+            if self._agotado():
+                self._sin_enviar.append(clave)
+                return
+            self._futuros[clave] = self._pool.submit(self._comprobar, url)
+
+    def resultados(self) -> List[Dict]:
+        """Espera a las verificaciones dentro del presupuesto y devuelve los metadatos de los PDFs válidos.
+
+        Al agotarse el presupuesto se cancelan las que no han empezado y se espera a las que están en curso,
+        para no dejar descargas sueltas tras registrar las estadísticas.
+        """
+        with self._lock:
+            futuros = dict(self._futuros)
+            inicio = self._inicio
+        if inicio is not None:
+            wait(futuros.values(), timeout=max(0.0, self.presupuesto_segundos - (time.time() - inicio)))
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+        # Conservar el orden en que se descubrieron los enlaces
+        omitidas = [clave for clave, f in futuros.items() if f.cancelled() or f.result() is OMITIDA_POR_TIEMPO]
+        comprobados = [f.result() for f in futuros.values() if not f.cancelled() and f.result() is not OMITIDA_POR_TIEMPO]
+        validos = [metadatos for metadatos in comprobados if metadatos]
+        self.descartados = [self._urls[clave] for clave in omitidas + self._sin_enviar]
+        duracion = time.time() - inicio if inicio is not None else 0.0
+        self.estadisticas = {
+            'candidatos': self._candidatos,
+            'duplicados': self._candidatos - len(self._urls),
+            'comprobados': len(comprobados),
+            'validos': len(validos),
+            'descartados_por_tiempo': len(self.descartados),
+            'duracion': duracion,
+            'enlaces_por_segundo': len(comprobados) / duracion if duracion > 0 else 0.0
+        }
+        return validos
+
+    def _comprobar(self, url: str) -> Optional[Dict]:
+        if self._agotado():
+            return OMITIDA_POR_TIEMPO
+        with self._limite_host(urlparse(url).netloc):
+            if self._agotado():
+                return OMITIDA_POR_TIEMPO
+            # Una sola descarga verifica la firma del PDF, calcula su hash y lo deja en el almacén
+            return self.verificador.obtener_metadatos_pdf(url, self.session, self.timeout)
+
+    def _limite_host(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._limites:
+                self._limites[host] = threading.Semaphore(self.max_por_host)
+            return self._limites[host]
+
+    def _agotado(self) -> bool:
+        return self._inicio is not None and time.time() - self._inicio >= self.presupuesto_segundos
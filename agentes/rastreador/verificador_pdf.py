@@ -2,69 +2,118 @@
 Módulo para verificar y obtener metadatos de documentos PDF desde una URL.
 """
 
-import io
 import hashlib
+import itertools
 import requests
 import pdfplumber
+from pathlib import Path
+from datetime import datetime, timezone
 from typing import Dict, Optional
 
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+from servicios.utilidades.contador_paginas import contar_paginas
+from servicios.utilidades.validadores_http import ValidadoresHttp
+
+FIRMA_PDF = b'%PDF-'
+TAMANO_CABECERA = 1024
+
 class PdfVerifier:
     """Verifica que URL corresponde a un PDF y obtiene sus metadatos."""
 
+    def __init__(self, almacen: Optional[AlmacenPdf] = None, validadores: Optional[ValidadoresHttp] = None):
+        self.almacen = almacen or AlmacenPdf()
+        self.validadores = validadores or ValidadoresHttp()
+
     def verificar_es_pdf(self, url: str, session: requests.Session, timeout: int) -> bool:
-        """Verifica si la URL apunta a un archivo PDF basado en el tipo MIME"""
-        try:
-            # Verificar inicial con HEAD para minimizar transferencia
-            head_response = session.head(url, timeout=timeout, allow_redirects=True)
-            content_type = head_response.headers.get('content-type', '').lower()
-            return 'application/pdf' in content_type and 'html' not in content_type
-        except Exception:
-            return False
+        """Verifica por su contenido que la URL es un PDF, dejándolo descargado en el almacén local."""
+        return self._sondear(url, session, timeout) is not None
 
     def obtener_metadatos_pdf(self, pdf_url: str, session: requests.Session, timeout: int) -> Optional[Dict]:
-        """Descarga parcialmente un PDF para calcular su hash y obtener metadatos."""
+        """Verifica, descarga y obtiene los metadatos del PDF con una única petición."""
         try:
-            # Realizar HEAD request para obtener metadatos
-            head_response = session.head(pdf_url, timeout=timeout, allow_redirects=True)
-            head_response.raise_for_status()
-            
-            content_length = int(head_response.headers.get('content-length', 0))
-            last_modified = head_response.headers.get('last-modified')
-            
-            # Descargar solo lo necesario para contar páginas
-            get_response = session.get(
-                pdf_url,
-                stream=True,
-                headers={'Range': 'bytes=0-999999'},
-                timeout=timeout
-            )
-            get_response.raise_for_status()
-            
-            # Calcular hash SHA256
-            sha256 = hashlib.sha256()
-            pdf_content = io.BytesIO()
+            entrada = self._sondear(pdf_url, session, timeout)
+            if not entrada:
+                return None
 
-            for chunk in get_response.iter_content(chunk_size=8192):
-                pdf_content.write(chunk)
-                sha256.update(chunk)
-                if pdf_content.tell() > 1000000: break
-            
-            # Contar páginas
-            num_paginas = 0
-            pdf_content.seek(0)
-            try:
-                with pdfplumber.open(pdf_content) as pdf:
-                    num_paginas = len(pdf.pages)
-            except Exception: pass
+            ruta = self.almacen.ruta_archivo(entrada['hash'])
+            if not ruta:
+                return None
 
             return {
                 'tipo_mime': 'application/pdf',
-                'tamano_bytes': content_length,
-                'numero_paginas': num_paginas,
-                'hash_sha256': sha256.hexdigest(),
+                'tamano_bytes': ruta.stat().st_size,
+                'numero_paginas': self._contar_paginas(ruta),
+                'hash_sha256': entrada['hash'],
                 'enlace_documento': pdf_url,
-                'ultima_modificacion': last_modified
+                'ultima_modificacion': entrada['ultima_modificacion']
             }
         except Exception as e:
             print(f"Error metadatos PDF {pdf_url}: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def _contar_paginas(self, ruta: Path) -> int:
+        """Cuenta las páginas leyendo el árbol de páginas y, si no es posible, analizando el documento completo."""
+        if (num_paginas := contar_paginas(ruta)):
+            return num_paginas
+        try:
+            with pdfplumber.open(ruta) as pdf:
+                return len(pdf.pages)
+        except Exception:
+            return 0
+
+    def _sondear(self, url: str, session: requests.Session, timeout: int) -> Optional[Dict]:
+        """Descarga la URL si su contenido empieza como un PDF, calculando su hash completo mientras se guarda."""
+        # Un PDF descargado recientemente de esta URL no necesita volver a pedirse
+        if (entrada := self.almacen.entrada_url(url, vigente=True)):
+            return entrada
+        # Si no, y su última versión sigue en el almacén, basta con que el servidor confirme que no ha cambiado
+        validador = self.validadores.para_almacen(url, self.almacen)
+        try:
+            with session.get(url, stream=True, timeout=timeout, headers=self.validadores.cabeceras(validador)) as response:
+                if response.status_code == 304 and validador:
+                    return self.validadores.confirmar_almacen(url, validador, self.almacen)
+                response.raise_for_status()
+                bloques = response.iter_content(chunk_size=65536)
+                cabecera = b''
+                for bloque in bloques:
+                    cabecera += bloque
+                    if len(cabecera) >= TAMANO_CABECERA:
+                        break
+
+                # La firma puede ir precedida de bytes basura, como admiten los lectores de PDF.
+                # Si no aparece, al cerrar la respuesta se descarta el resto del cuerpo sin descargarlo
+                if FIRMA_PDF not in cabecera[:TAMANO_CABECERA]:
+                    return None
+
+                ultima_modificacion = response.headers.get('last-modified')
+                hash_sha256, _ = self.almacen.guardar(itertools.chain([cabecera], bloques), url, ultima_modificacion)
+                self.validadores.guardar(url, response, hash_sha256)
+                return {'hash': hash_sha256, 'ultima_modificacion': ultima_modificacion}
+        except Exception:
+            return None
+
+    def obtener_metadatos_pdf_local(self, ruta: str) -> Optional[Dict]:
+        """Calcula el hash y los metadatos de un PDF local, identificado por su URL file://."""
+        try:
+            archivo = Path(ruta).resolve()
+            sha256 = hashlib.sha256()
+            with open(archivo, 'rb') as f:
+                if f.read(4) != b'%PDF':
+                    print(f"El archivo {archivo} no es un PDF")
+                    return None
+                f.seek(0)
+                for bloque in iter(lambda: f.read(1024 * 1024), b''):
+                    sha256.update(bloque)
+
+            estadisticas = archivo.stat()
+            return {
+                'tipo_mime': 'application/pdf',
+                'tamano_bytes': estadisticas.st_size,
+                'numero_paginas': self._contar_paginas(archivo),
+                'hash_sha256': sha256.hexdigest(),
+                'enlace_documento': archivo.as_uri(),
+                'ultima_modificacion': datetime.fromtimestamp(estadisticas.st_mtime, tz=timezone.utc)
+            }
+        except Exception as e:
+            print(f"Error metadatos PDF local {ruta}: {str(e)}")
+            return None
@@ -0,0 +1,172 @@
+"""
+Herramientas para exportar, validar y comparar los backends de embeddings y la fragmentación.
+"""
+
+import time
+import argparse
+import numpy as np
+from typing import List
+
+from nucleo.configuracion.configuracion import Config
+from nucleo.base_datos.modelos import Database
+from agentes.fragmentador.generador_embedding import EmbeddingGenerator, BACKENDS
+from agentes.fragmentador.modelo_onnx import exportar_modelo_onnx
+from agentes.fragmentador.extractor_texto_pdf import PdfContentExtractor
+from agentes.fragmentador.fragmentador_texto import TextSplitter
+
+TEXTOS_PRUEBA = [
+    "Podrán ser beneficiarias las pequeñas y medianas empresas con domicilio fiscal en La Rioja.",
+    "El plazo de presentación de solicitudes finalizará el 30 de septiembre.",
+    "La intensidad máxima de la ayuda será del 40% de los costes subvencionables.",
+    "Proyectos de I+D de Transferencia Tecnológica Cervera",
+    "Se consideran gastos elegibles los costes de personal, instrumental y material.",
+    "La duración de los proyectos estará comprendida entre 12 y 36 meses.",
+    "--- TABLA 1 PÁG 3 ---\nCABECERA: Tipo de empresa | Intensidad\nFILA 1: Pequeña | 45%\nFILA 2: Mediana | 35%",
+    "Ayuda parcialmente reembolsable con un tramo no reembolsable de hasta el 33%."
+]
+
+def _cargar_textos(args) -> List[str]:
+    """Obtiene los textos de prueba de un fichero, de la base de datos o de la muestra fija."""
+    if args.archivo:
+        with open(args.archivo, 'r', encoding='utf-8') as f:
+            return [linea.strip() for linea in f if linea.strip()]
+    if args.muestra_bd:
+        textos = Database().obtener_muestra_chunks(args.muestra_bd)
+        if textos:
+            return textos
+        print("No se pudieron obtener chunks de la base de datos, se usa la muestra fija")
+    return TEXTOS_PRUEBA
+
+def exportar(args):
+    """Exporta y cuantiza el modelo configurado a ONNX."""
+    config = Config()
+    destino = args.destino or config.EMBEDDING_CONFIG['ruta_onnx']
+    ruta = exportar_modelo_onnx(config.EMBEDDING_CONFIG['modelo'], destino)
+    print(f"Modelo ONNX int8 exportado en {ruta}")
+
+def validar(args) -> bool:
+    """Comprueba la similitud coseno entre los embeddings del modelo torch y el ONNX."""
+    textos = _cargar_textos(args)
+    referencia = EmbeddingGenerator(backend='torch').model.encode(textos, show_progress_bar=False)
+    cuantizado = EmbeddingGenerator(backend='onnx').model.encode(textos, show_progress_bar=False)
+
+    normas = np.linalg.norm(referencia, axis=1) * np.linalg.norm(cuantizado, axis=1)
+    similitudes = (referencia * cuantizado).sum(axis=1) / np.clip(normas, 1e-12, None)
+
+    print("\n🔍 VALIDACIÓN BACKEND ONNX")
+    print(f"- Textos comparados: {len(textos)}")
+    print(f"- Similitud coseno media: {similitudes.mean():.4f}")
+    print(f"- Similitud coseno mínima: {similitudes.min():.4f}")
+    valido = bool(similitudes.min() >= args.umbral)
+    print(f"- Resultado: {'VÁLIDO' if valido else 'NO VÁLIDO'} (umbral {args.umbral})")
+    return valido
+
+def comparar(args):
+    """Mide latencia de consulta y rendimiento por lotes de cada backend, sin caché."""
+    textos = _cargar_textos(args)
+    print("\n📊 COMPARATIVA DE BACKENDS DE EMBEDDINGS")
+    print(f"- Textos por lote: {len(textos)}")
+
+    for backend in BACKENDS:
+        try:
+            modelo = EmbeddingGenerator(backend=backend).model
+        except Exception as e:
+            print(f"\n{backend}: no disponible ({str(e)})")
+            continue
+
+        # Calentamiento para excluir la carga perezosa del primer lote
+        modelo.encode(textos[:2], show_progress_bar=False)
+
+        latencias = []
+        for i in range(args.repeticiones):
+            inicio = time.perf_counter()
+            modelo.encode([textos[i % len(textos)]], show_progress_bar=False)
+            latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticiones):
+            modelo.encode(textos, show_progress_bar=False)
+        tiempo_lotes = time.perf_counter() - inicio
+
+        print(f"\n{backend}:")
+        print(f"   - Latencia consulta p50: {np.percentile(latencias, 50) * 1000:.1f} ms")
+        print(f"   - Latencia consulta p95: {np.percentile(latencias, 95) * 1000:.1f} ms")
+        print(f"   - Rendimiento por lotes: {len(textos) * args.repeticiones / tiempo_lotes:.1f} textos/segundo")
+
+def fragmentacion(args):
+    """Compara chunks y tiempo de embedding entre la división por caracteres y por tokens del modelo."""
+    config = Config()
+    embedder = EmbeddingGenerator()
+    modelo = embedder.model
+    ajustes = config.FRAGMENTACION_CONFIG
+
+    paginas = []
+    for ruta in args.pdf:
+        with open(ruta, 'rb') as f:
+            paginas.extend(p['texto'] for p in PdfContentExtractor().extract_text(f))
+    if not paginas:
+        print("No se pudo extraer texto de los PDFs indicados")
+        return False
+
+    divisores = {
+        'caracteres (anterior)': TextSplitter(ajustes['tamano_caracteres'], ajustes['solapamiento_caracteres']),
+        'tokens del modelo': TextSplitter.para_modelo(embedder, ajustes['tamano_tokens'], ajustes['solapamiento_tokens'])
+    }
+    medidor = divisores['tokens del modelo']
+
+    print("\n📊 COMPARATIVA DE FRAGMENTACIÓN")
+    print(f"- PDFs: {len(args.pdf)}, páginas con texto: {len(paginas)}")
+    print(f"- Límite del modelo: {embedder.max_seq_length} tokens")
+
+    for nombre, divisor in divisores.items():
+        inicio = time.perf_counter()
+        chunks = [chunk for texto in paginas for chunk in divisor.split(texto)]
+        tiempo_division = time.perf_counter() - inicio
+
+        tokens = [medidor.longitud(chunk) for chunk in chunks]
+        truncados = sum(1 for t in tokens if t > embedder.max_seq_length - 2)
+        tokens_perdidos = sum(max(0, t - (embedder.max_seq_length - 2)) for t in tokens)
+
+        inicio = time.perf_counter()
+        modelo.encode(chunks, show_progress_bar=False)
+        tiempo_embedding = time.perf_counter() - inicio
+
+        print(f"\n{nombre} (tamaño {divisor.chunk_size}, solapamiento {divisor.chunk_overlap}):")
+        print(f"   - Chunks: {len(chunks)}")
+        print(f"   - Tokens promedio por chunk: {np.mean(tokens):.1f}")
+        print(f"   - Chunks truncados por el modelo: {truncados} ({truncados / len(chunks) * 100:.1f}%)")
+        print(f"   - Tokens descartados por truncado: {tokens_perdidos}")
+        print(f"   - Tiempo de división: {tiempo_division:.2f} segundos")
+        print(f"   - Tiempo de embedding: {tiempo_embedding:.2f} segundos")
+
+def main():
+    """Función principal de las herramientas de embeddings."""
+    parser = argparse.ArgumentParser(description="Herramientas de backends de embeddings")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_exportar = subparsers.add_parser('exportar', help="Exporta el modelo a ONNX cuantizado int8")
+    parser_exportar.add_argument('--destino', help="Directorio de salida (por defecto EMBEDDING_ONNX_PATH)")
+    parser_exportar.set_defaults(funcion=exportar)
+
+    for nombre, funcion, ayuda in (
+        ('validar', validar, "Valida la concordancia coseno entre torch y ONNX"),
+        ('comparar', comparar, "Compara latencia y rendimiento de cada backend")
+    ):
+        subparser = subparsers.add_parser(nombre, help=ayuda)
+        subparser.add_argument('--archivo', help="Fichero de textos, uno por línea")
+        subparser.add_argument('--muestra-bd', type=int, default=0, help="Número de chunks a muestrear de la base de datos")
+        subparser.set_defaults(funcion=funcion)
+    parser_fragmentacion = subparsers.add_parser('fragmentacion', help="Compara la división por caracteres y por tokens")
+    parser_fragmentacion.add_argument('pdf', nargs='+', help="Rutas de PDFs locales de ejemplo")
+    parser_fragmentacion.set_defaults(funcion=fragmentacion)
+
+    subparsers.choices['validar'].add_argument('--umbral', type=float, default=0.99, help="Similitud coseno mínima aceptada")
+    subparsers.choices['comparar'].add_argument('--repeticiones', type=int, default=20, help="Repeticiones por medición")
+
+    args = parser.parse_args()
+    resultado = args.funcion(args)
+    if resultado is False:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
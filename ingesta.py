@@ -0,0 +1,199 @@
+"""
+Herramientas de ingesta: carga por lotes y consulta y reanudación de trabajos de ingesta.
+"""
+
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from nucleo.configuracion.configuracion import Config
+from nucleo.base_datos.modelos import Database
+from agentes.fragmentador.gestor_fragmentacion import ChunkingAgent
+from agentes.rastreador.gestor_extraccion import CrawlerAgent
+from agentes.rastreador.frontera_urls import FronteraUrls
+
+# Cada hilo del lote usa su propio agente: Playwright síncrono no puede compartirse entre hilos
+_agentes = threading.local()
+
+def _crawler() -> CrawlerAgent:
+    """Devuelve el agente de rastreo del hilo actual."""
+    if not hasattr(_agentes, 'crawler'):
+        _agentes.crawler = CrawlerAgent()
+        _agentes.crawler.set_silent(True)
+    return _agentes.crawler
+
+def _procesar_convocatoria(url: str) -> Dict:
+    """Registra una convocatoria y procesa sus documentos."""
+    resultado = _crawler().procesar_convocatoria(url)
+    if 'error' in resultado:
+        return {'estado': 'duplicada' if resultado['error'] == 'duplicada' else 'fallo', 'detalle': resultado['detalle']}
+    return {'estado': 'exito', 'documentos': resultado['total_documentos']}
+
+def _procesar_pdf_local(ruta: str) -> Dict:
+    """Registra un PDF local como documento y lo fragmenta, vectoriza y completa con el LLM."""
+    crawler = _crawler()
+    metadatos = crawler.pdf_verifier.obtener_metadatos_pdf_local(ruta)
+    if not metadatos:
+        return {'estado': 'fallo', 'detalle': 'No se pudieron obtener los metadatos del PDF'}
+
+    exito, mensaje, doc_id = crawler.db.insertar_documento(metadatos)
+    if not exito:
+        return {'estado': 'fallo', 'detalle': f'Error BD: {mensaje}'}
+
+    if not crawler.pdf_processor.procesar_documento(doc_id, metadatos['enlace_documento']):
+        return {'estado': 'fallo', 'detalle': 'No se pudo procesar el documento', 'documento_id': doc_id}
+
+    crawler.completar_informacion_con_llm_documentos([doc_id])
+    return {'estado': 'exito', 'documentos': 1, 'documento_id': doc_id}
+
+def _ejecutar(funcion: Callable[[str], Dict], origen: str) -> Dict:
+    """Procesa un elemento del lote midiendo su duración sin propagar errores."""
+    inicio = time.time()
+    try:
+        resultado = funcion(origen)
+    except Exception as e:
+        resultado = {'estado': 'fallo', 'detalle': f'Error inesperado: {str(e)}'}
+    resultado.update({'origen': origen, 'segundos': round(time.time() - inicio, 2)})
+    return resultado
+
+def _cargar_elementos(args) -> List[str]:
+    """Lee las URLs del fichero indicado o busca los PDFs del directorio."""
+    if args.urls:
+        with open(args.urls, 'r', encoding='utf-8') as f:
+            return [linea.strip() for linea in f if linea.strip() and not linea.startswith('#')]
+    return sorted(str(ruta) for ruta in Path(args.directorio).rglob('*') if ruta.suffix.lower() == '.pdf')
+
+def lote(args) -> bool:
+    """Ingiere en paralelo una lista de convocatorias o un directorio de PDFs locales."""
+    elementos = _cargar_elementos(args)
+    if not elementos:
+        print("No hay elementos que procesar")
+        return False
+
+    if args.urls:
+        # En la frontera compartida, las URLs que este lote no llegue a procesar las retoman otros agentes
+        frontera = FronteraUrls()
+        encoladas = sum(1 for url in elementos if frontera.encolar(url))
+        print(f"- {encoladas}/{len(elementos)} URLs añadidas a la frontera compartida")
+        if args.solo_encolar:
+            return encoladas == len(elementos)
+    elif args.solo_encolar:
+        print("--solo-encolar solo admite --urls")
+        return False
+
+    funcion = _procesar_convocatoria if args.urls else _procesar_pdf_local
+    workers = args.workers or Config().INGESTA_CONFIG['workers_lote']
+    print(f"\n📥 INGESTA POR LOTES: {len(elementos)} elementos con {workers} workers")
+
+    inicio = time.time()
+    resultados = []
+    iconos = {'exito': '✅', 'duplicada': '⏭️', 'fallo': '❌'}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lote') as pool:
+        futuros = [pool.submit(_ejecutar, funcion, elemento) for elemento in elementos]
+        for n, futuro in enumerate(as_completed(futuros), 1):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            ritmo = n / (time.time() - inicio) * 60
+            print(f"[{n}/{len(elementos)}] {iconos[resultado['estado']]} {resultado['origen']} "
+                  f"({resultado['segundos']:.1f} s) - {ritmo:.1f} elementos/minuto")
+            if resultado['estado'] == 'fallo':
+                print(f"   {resultado['detalle']}")
+
+    duracion = time.time() - inicio
+    resumen = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'origen': args.urls or args.directorio,
+        'workers': workers,
+        'total': len(resultados),
+        'exitos': sum(1 for r in resultados if r['estado'] == 'exito'),
+        'duplicadas': sum(1 for r in resultados if r['estado'] == 'duplicada'),
+        'fallos': sum(1 for r in resultados if r['estado'] == 'fallo'),
+        'documentos': sum(r.get('documentos', 0) for r in resultados),
+        'duracion_segundos': round(duracion, 2),
+        'elementos_por_minuto': round(len(resultados) / duracion * 60, 2) if duracion else 0,
+        'resultados': sorted(resultados, key=lambda r: elementos.index(r['origen']))
+    }
+
+    ruta_resumen = args.resumen or f"resumen_lote_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(ruta_resumen, 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2, default=str)
+
+    print("\n📊 RESUMEN DEL LOTE")
+    print(f"- Éxitos: {resumen['exitos']}, duplicadas: {resumen['duplicadas']}, fallos: {resumen['fallos']}")
+    print(f"- Documentos procesados: {resumen['documentos']}")
+    print(f"- Duración: {duracion:.1f} segundos ({resumen['elementos_por_minuto']:.1f} elementos/minuto)")
+    print(f"- Resumen guardado en {ruta_resumen}")
+    return resumen['fallos'] == 0
+
+def trabajos(args):
+    """Lista los trabajos pendientes, fallidos o detenidos."""
+    pendientes = Database().obtener_trabajos_ingesta_pendientes(args.inactivo)
+
+    print("\n🧾 TRABAJOS DE INGESTA SIN COMPLETAR")
+    if not pendientes:
+        print("- No hay trabajos pendientes")
+        return
+    for trabajo in pendientes:
+        paginas = f"{trabajo['ultima_pagina']}/{trabajo['total_paginas'] or '?'}"
+        print(f"- Documento {trabajo['documento_id']} [{trabajo['estado']}] páginas {paginas}, "
+              f"{trabajo['total_chunks']} chunks, {trabajo['intentos']} intentos, "
+              f"actualizado {trabajo['fecha_actualizacion']:%Y-%m-%d %H:%M}")
+        print(f"   {trabajo['enlace_documento']}")
+        if trabajo['error']:
+            print(f"   Error: {trabajo['error']}")
+
+def reanudar(args) -> bool:
+    """Reanuda desde su checkpoint los trabajos sin completar."""
+    pendientes = Database().obtener_trabajos_ingesta_pendientes(args.inactivo)
+    if args.documento:
+        pendientes = [t for t in pendientes if t['documento_id'] in args.documento]
+    if not pendientes:
+        print("No hay trabajos que reanudar")
+        return True
+
+    print(f"Reanudando {len(pendientes)} trabajos de ingesta...")
+    resultados = ChunkingAgent().procesar_documentos(
+        [(t['documento_id'], t['enlace_documento']) for t in pendientes]
+    )
+    completados = sum(1 for total in resultados.values() if total > 0)
+    print(f"- Completados: {completados}/{len(pendientes)}")
+    return completados == len(pendientes)
+
+def main():
+    """Función principal de las herramientas de ingesta."""
+    parser = argparse.ArgumentParser(description="Herramientas de trabajos de ingesta")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_lote = subparsers.add_parser('lote', help="Ingiere una lista de convocatorias o un directorio de PDFs")
+    origen = parser_lote.add_mutually_exclusive_group(required=True)
+    origen.add_argument('--urls', help="Fichero con una URL de convocatoria por línea")
+    origen.add_argument('--directorio', help="Directorio con PDFs locales (se recorre recursivamente)")
+    parser_lote.add_argument('--workers', type=int, help="Elementos simultáneos (por defecto INGESTA_WORKERS_LOTE)")
+    parser_lote.add_argument('--resumen', help="Ruta del resumen JSON de éxitos y fallos")
+    parser_lote.add_argument('--solo-encolar', action='store_true',
+                             help="Solo añade las URLs a la frontera, para que las procesen los agentes de rastreo")
+    parser_lote.set_defaults(funcion=lote)
+
+    parser_trabajos = subparsers.add_parser('trabajos', help="Lista los trabajos de ingesta sin completar")
+    parser_trabajos.set_defaults(funcion=trabajos)
+
+    parser_reanudar = subparsers.add_parser('reanudar', help="Reanuda los trabajos desde su último checkpoint")
+    parser_reanudar.add_argument('--documento', type=int, nargs='+', help="Identificadores de documento concretos")
+    parser_reanudar.set_defaults(funcion=reanudar)
+
+    for subparser in (parser_trabajos, parser_reanudar):
+        subparser.add_argument('--inactivo', type=int, default=30,
+                               help="Minutos sin avances para considerar detenido un trabajo en curso")
+
+    args = parser.parse_args()
+    resultado = args.funcion(args)
+    if resultado is False:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -30,9 +30,13 @@ CREATE TABLE IF NOT EXISTS convocatorias (
     enlace_ficha_tecnica TEXT,
     enlace_orden_bases TEXT,
     enlace_convocatoria TEXT NOT NULL,
-    fecha_registro TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid')
+    fecha_registro TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
+    fecha_ultimo_rastreo TIMESTAMP WITH TIME ZONE
 );
 
+-- Añadir a instalaciones existentes la fecha del último rastreo de la página de la convocatoria
+ALTER TABLE convocatorias ADD COLUMN IF NOT EXISTS fecha_ultimo_rastreo TIMESTAMP WITH TIME ZONE;
+
 -- Crear tabla relacional de documentos
 CREATE TABLE IF NOT EXISTS documentos (
     id SERIAL PRIMARY KEY,
@@ -45,10 +49,22 @@ CREATE TABLE IF NOT EXISTS documentos (
     es_comun TEXT DEFAULT 'no',
     enlace_documento TEXT NOT NULL,
     ultima_modificacion TIMESTAMP WITH TIME ZONE,
+    documento_anterior_id INTEGER REFERENCES documentos(id) ON DELETE SET NULL,
     fecha_registro TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
     CONSTRAINT unique_hash UNIQUE (hash_sha256)
 );
 
+-- Añadir a instalaciones existentes el enlace con la versión anterior del documento
+ALTER TABLE documentos ADD COLUMN IF NOT EXISTS documento_anterior_id INTEGER REFERENCES documentos(id) ON DELETE SET NULL;
+
+-- Crear tabla relacional de documentos_paginas
+CREATE TABLE IF NOT EXISTS documentos_paginas (
+    documento_id INTEGER NOT NULL REFERENCES documentos(id) ON DELETE CASCADE,
+    numero_pagina INTEGER NOT NULL,
+    hash_texto TEXT NOT NULL,
+    PRIMARY KEY (documento_id, numero_pagina)
+);
+
 -- Crear tabla relacional de convocatorias_documentos
 CREATE TABLE IF NOT EXISTS convocatorias_documentos (
     convocatoria_id INTEGER NOT NULL REFERENCES convocatorias(id) ON DELETE CASCADE,
@@ -68,10 +84,108 @@ CREATE TABLE IF NOT EXISTS documentos_chunks (
     fecha_registro TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid')
 );
 
+-- Crear tabla relacional de documentos_secciones
+CREATE TABLE IF NOT EXISTS documentos_secciones (
+    id SERIAL PRIMARY KEY,
+    documento_id INTEGER NOT NULL REFERENCES documentos(id) ON DELETE CASCADE,
+    seccion_padre_id INTEGER REFERENCES documentos_secciones(id) ON DELETE SET NULL,
+    titulo TEXT NOT NULL,
+    titulo_normalizado TEXT NOT NULL,
+    nivel INTEGER NOT NULL,
+    orden INTEGER NOT NULL,
+    numero_pagina INTEGER NOT NULL,
+    UNIQUE (documento_id, orden)
+);
+
+ALTER TABLE documentos_chunks ADD COLUMN IF NOT EXISTS seccion_id INTEGER REFERENCES documentos_secciones(id) ON DELETE SET NULL;
+
+-- Crear tabla vectorial de embeddings_cache
+CREATE TABLE IF NOT EXISTS embeddings_cache (
+    modelo TEXT NOT NULL,
+    hash_texto TEXT NOT NULL,
+    vector VECTOR(384) NOT NULL,
+    fecha_registro TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (modelo, hash_texto)
+);
+
+-- Crear tabla relacional de trabajos_ingesta
+CREATE TABLE IF NOT EXISTS trabajos_ingesta (
+    id SERIAL PRIMARY KEY,
+    documento_id INTEGER NOT NULL UNIQUE REFERENCES documentos(id) ON DELETE CASCADE,
+    enlace_documento TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente', -- pendiente, en_curso, completado, fallido
+    ultima_pagina INTEGER NOT NULL DEFAULT 0,
+    total_paginas INTEGER,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    memoria_proceso_mb FLOAT, -- Pico de memoria del proceso durante el documento, incluidos los procesados a la vez
+    fecha_inicio TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    fecha_actualizacion TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Crear tabla relacional de estrategias_dominio
+CREATE TABLE IF NOT EXISTS estrategias_dominio (
+    dominio TEXT PRIMARY KEY,
+    estrategia TEXT NOT NULL, -- html, navegador
+    exitos_html INTEGER NOT NULL DEFAULT 0,
+    usos_navegador INTEGER NOT NULL DEFAULT 0,
+    fecha_actualizacion TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Crear tabla relacional de validadores_http
+CREATE TABLE IF NOT EXISTS validadores_http (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    ultima_modificacion TEXT, -- Cabecera Last-Modified tal como la envió el servidor
+    hash_sha256 TEXT,
+    enlaces TEXT[], -- Enlaces a PDF extraídos, en páginas de convocatoria
+    requiere_navegador BOOLEAN,
+    revalidaciones INTEGER NOT NULL DEFAULT 0,
+    fecha_validacion TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Crear tabla relacional de frontera_urls
+CREATE TABLE IF NOT EXISTS frontera_urls (
+    url TEXT PRIMARY KEY,
+    estado TEXT NOT NULL DEFAULT 'pendiente', -- pendiente, en_curso, completado, fallido
+    prioridad INTEGER NOT NULL DEFAULT 0,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    trabajador TEXT, -- Agente que tiene reclamada la URL
+    concesion_hasta TIMESTAMP WITH TIME ZONE, -- Al vencer, otro agente puede reclamarla
+    error TEXT,
+    fecha_alta TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    fecha_actualizacion TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Trabajos de los documentos ingeridos antes de existir trabajos_ingesta. Solo se dan por completos
+-- si tienen chunks hasta su última página; si no, quedan pendientes desde la anterior a la última con chunks
+INSERT INTO trabajos_ingesta (documento_id, enlace_documento, estado, ultima_pagina, total_paginas, total_chunks, error)
+SELECT d.id, d.enlace_documento,
+       CASE WHEN c.ultima >= t.total THEN 'completado' ELSE 'pendiente' END,
+       CASE WHEN c.ultima >= t.total THEN c.ultima ELSE GREATEST(c.ultima - 1, 0) END,
+       t.total, c.chunks,
+       CASE WHEN c.ultima >= t.total THEN NULL ELSE 'Ingesta anterior a los trabajos, posiblemente incompleta' END
+FROM documentos d
+CROSS JOIN LATERAL (
+    SELECT MAX(numero_pagina) AS ultima, COUNT(*) AS chunks FROM documentos_chunks WHERE documento_id = d.id
+) c
+CROSS JOIN LATERAL (
+    SELECT COALESCE(NULLIF(d.numero_paginas, 0),
+                    (SELECT MAX(numero_pagina) FROM documentos_paginas WHERE documento_id = d.id)) AS total
+) t
+WHERE c.chunks > 0 AND NOT EXISTS (SELECT 1 FROM trabajos_ingesta j WHERE j.documento_id = d.id)
+ON CONFLICT (documento_id) DO NOTHING;
+
 -- Crear índices de optimización
 CREATE INDEX IF NOT EXISTS idx_documentos_comunes ON documentos(es_comun);
 CREATE INDEX IF NOT EXISTS idx_convocatorias_documentos ON convocatorias_documentos(convocatoria_id, documento_id);
 CREATE INDEX IF NOT EXISTS idx_documentos_chunks_documento ON documentos_chunks(documento_id);
+CREATE INDEX IF NOT EXISTS idx_documentos_enlace ON documentos(enlace_documento);
+CREATE INDEX IF NOT EXISTS idx_trabajos_ingesta_estado ON trabajos_ingesta(estado);
+CREATE INDEX IF NOT EXISTS idx_documentos_secciones_titulo ON documentos_secciones(documento_id, titulo_normalizado text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_documentos_chunks_seccion ON documentos_chunks(seccion_id);
+CREATE INDEX IF NOT EXISTS idx_frontera_urls_estado ON frontera_urls(estado, prioridad DESC, fecha_alta);
 
 -- Crear tabla relacional de metricas_extraccion
 CREATE TABLE IF NOT EXISTS metricas_extraccion (
@@ -101,6 +215,62 @@ CREATE TABLE IF NOT EXISTS metricas_procesamiento (
     total_chunks INTEGER
 );
 
+-- Crear tabla relacional de metricas_ingesta
+CREATE TABLE IF NOT EXISTS metricas_ingesta (
+    id SERIAL PRIMARY KEY,
+    fecha TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
+    etapa TEXT NOT NULL,
+    workers INTEGER,
+    documentos INTEGER,
+    errores INTEGER,
+    tiempo_ocupado FLOAT,
+    tiempo_espera FLOAT
+);
+
+-- Crear tabla relacional de metricas_navegador
+CREATE TABLE IF NOT EXISTS metricas_navegador (
+    id SERIAL PRIMARY KEY,
+    fecha TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
+    navegador_reutilizado BOOLEAN,
+    contexto_reutilizado BOOLEAN,
+    tiempo_lanzamiento FLOAT,
+    tiempo_ahorrado FLOAT,
+    tiempo_uso FLOAT,
+    utilizacion FLOAT
+);
+
+-- Crear tabla relacional de metricas_rastreo
+CREATE TABLE IF NOT EXISTS metricas_rastreo (
+    id SERIAL PRIMARY KEY,
+    fecha TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
+    url TEXT,
+    organismo TEXT,
+    tiempo_carga FLOAT,
+    tiempo_espera FLOAT,
+    tiempo_trabajo FLOAT,
+    enlaces INTEGER,
+    listo BOOLEAN
+);
+
+ALTER TABLE metricas_rastreo ADD COLUMN IF NOT EXISTS bloqueo_recursos BOOLEAN;
+ALTER TABLE metricas_rastreo ADD COLUMN IF NOT EXISTS peticiones_bloqueadas INTEGER;
+ALTER TABLE metricas_rastreo ADD COLUMN IF NOT EXISTS bytes_evitados BIGINT;
+ALTER TABLE metricas_rastreo ADD COLUMN IF NOT EXISTS estrategia TEXT;
+
+-- Crear tabla relacional de metricas_verificacion
+CREATE TABLE IF NOT EXISTS metricas_verificacion (
+    id SERIAL PRIMARY KEY,
+    fecha TIMESTAMP WITH TIME ZONE DEFAULT (NOW() AT TIME ZONE 'Europe/Madrid'),
+    url_convocatoria TEXT,
+    candidatos INTEGER,
+    duplicados INTEGER,
+    comprobados INTEGER,
+    validos INTEGER,
+    descartados_por_tiempo INTEGER,
+    duracion FLOAT,
+    enlaces_por_segundo FLOAT
+);
+
 -- Crear tabla relacional de metricas_llm
 CREATE TABLE IF NOT EXISTS metricas_llm (
     id SERIAL PRIMARY KEY,
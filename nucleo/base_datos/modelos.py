@@ -3,6 +3,7 @@ Módulo para gestionar la base de datos PostgreSQL con extensión pgvector.
 """
 
 import psycopg2
+from psycopg2.extras import execute_values
 from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional, Union
 
@@ -55,19 +56,15 @@ class Database:
         )
 
     def verificar_crear_tablas(self) -> bool:
-        """Verifica y crea las tablas si no existen."""
+        """Verifica la conexión y aplica el esquema para crear las tablas que falten."""
         try:
-            # Verificar si la tabla convocatorias existe
-            result = self._execute_query(
-                "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'convocatorias')",
-                fetch=True
-            )
+            # Verificar que la base de datos responde
+            result = self._execute_query("SELECT 1 AS disponible", fetch=True)
             if not result.success:
                 return False
-            # Si la tabla no existe, crear todas las tablas
-            if not result.data or not result.data.get('exists', False):
-                return self._crear_tablas()
-            return True
+            # El esquema solo usa sentencias idempotentes, así que se aplica en cada arranque
+            # para crear también las tablas añadidas después de la instalación inicial
+            return self._crear_tablas()
         except Exception as e:
             return False
 
@@ -159,6 +156,24 @@ class Database:
         )
         return result.data if result.success else []    
 
+    def obtener_convocatorias_para_rastreo(self) -> List[Dict]:
+        """Obtiene los datos necesarios para decidir qué convocatorias volver a rastrear."""
+        result = self._execute_query(
+            """SELECT id, enlace_convocatoria, fecha_fin, fecha_registro, fecha_ultimo_rastreo
+               FROM convocatorias ORDER BY COALESCE(fecha_ultimo_rastreo, fecha_registro)""",
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    def registrar_rastreo_convocatoria(self, convocatoria_id: int) -> bool:
+        """Anota que la página de la convocatoria se acaba de rastrear."""
+        result = self._execute_query(
+            "UPDATE convocatorias SET fecha_ultimo_rastreo = NOW() WHERE id = %s",
+            (convocatoria_id,)
+        )
+        return result.success
+
     # --- Métodos para documentos ---
 
     def insertar_documento(self, datos: Dict) -> Tuple[bool, str, Optional[int]]:
@@ -177,12 +192,16 @@ class Database:
         existente = self.documento_existe_por_hash(datos['hash_sha256'])
         if existente:
             return True, "Documento ya existente", existente['id']
+        # Enlazar con la versión anterior si la misma URL ya se registró con otro contenido
+        anterior = self.obtener_ultima_version_documento(datos['enlace_documento'])
+        datos.setdefault('documento_anterior_id', anterior['id'] if anterior else None)
         result = self._execute_query(
             """INSERT INTO documentos 
                (titulo, tipo_mime, tipo_documento, numero_paginas,
-                tamano_bytes, hash_sha256, enlace_documento, ultima_modificacion) 
+                tamano_bytes, hash_sha256, enlace_documento, ultima_modificacion, documento_anterior_id) 
                VALUES (%(titulo)s, %(tipo_mime)s, %(tipo_documento)s, %(numero_paginas)s,
-                      %(tamano_bytes)s, %(hash_sha256)s, %(enlace_documento)s, %(ultima_modificacion)s)
+                      %(tamano_bytes)s, %(hash_sha256)s, %(enlace_documento)s, %(ultima_modificacion)s,
+                      %(documento_anterior_id)s)
                RETURNING id""",
             datos,
             fetch=True
@@ -200,6 +219,47 @@ class Database:
         )
         return result.data if result.success else None
 
+    def obtener_ultima_version_documento(self, enlace_documento: str) -> Optional[Dict]:
+        """Obtiene el documento registrado más reciente para una URL."""
+        result = self._execute_query(
+            "SELECT * FROM documentos WHERE enlace_documento = %s ORDER BY id DESC LIMIT 1",
+            (enlace_documento,),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    # --- Métodos para páginas ---
+
+    def guardar_hashes_paginas(self, documento_id: int, hashes: List[Tuple[int, str]]) -> bool:
+        """Guarda el hash del texto de cada página (número de página, hash) de un documento."""
+        if not hashes:
+            return True
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        """INSERT INTO documentos_paginas (documento_id, numero_pagina, hash_texto)
+                           VALUES %s ON CONFLICT (documento_id, numero_pagina)
+                           DO UPDATE SET hash_texto = EXCLUDED.hash_texto""",
+                        [(documento_id, pagina, hash_texto) for pagina, hash_texto in hashes]
+                    )
+                    conn.commit()
+                    return True
+        except Exception as e:
+            print(f"Error guardando hashes de páginas del documento {documento_id}: {str(e)}")
+            return False
+
+    def obtener_hashes_paginas(self, documento_id: int) -> Dict[str, int]:
+        """Obtiene el número de página de un documento indexado por el hash de su texto."""
+        result = self._execute_query(
+            "SELECT numero_pagina, hash_texto FROM documentos_paginas WHERE documento_id = %s",
+            (documento_id,),
+            fetch=True,
+            many=True
+        )
+        return {fila['hash_texto']: fila['numero_pagina'] for fila in result.data} if result.success else {}
+
     # --- Métodos para relaciones ---
 
     def asociar_documento_convocatoria(self, convocatoria_id: int, documento_id: int) -> bool:
@@ -211,6 +271,15 @@ class Database:
             (convocatoria_id, documento_id)
         )
         return result.success
+
+    def desasociar_version_anterior(self, convocatoria_id: int, documento_id: int) -> bool:
+        """Quita de la convocatoria la versión anterior del documento, que queda sustituida por la nueva."""
+        result = self._execute_query(
+            """DELETE FROM convocatorias_documentos cd USING documentos d
+               WHERE d.id = %s AND cd.convocatoria_id = %s AND cd.documento_id = d.documento_anterior_id""",
+            (documento_id, convocatoria_id)
+        )
+        return result.success
     
     def obtener_documentos_por_convocatoria(self, convocatoria_id: int) -> List[Dict]:
         """Obtiene documentos asociados a una convocatoria."""
@@ -265,6 +334,29 @@ class Database:
             
         return self._execute_query(query, tuple(params), fetch=True, many=True)
 
+    def obtener_chunks_por_paginas(self, documento_id: int, paginas: List[int]) -> List[Dict]:
+        """Obtiene los chunks con su vector de las páginas indicadas de un documento."""
+        result = self._execute_query(
+            """SELECT chunk_texto, chunk_vector::real[] AS chunk_vector, numero_pagina
+               FROM documentos_chunks
+               WHERE documento_id = %s AND numero_pagina = ANY(%s)
+               ORDER BY numero_pagina, id""",
+            (documento_id, paginas),
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    def obtener_muestra_chunks(self, limite: int = 100) -> List[str]:
+        """Obtiene una muestra aleatoria de textos de chunks almacenados."""
+        result = self._execute_query(
+            "SELECT chunk_texto FROM documentos_chunks ORDER BY random() LIMIT %s",
+            (limite,),
+            fetch=True,
+            many=True
+        )
+        return [fila['chunk_texto'] for fila in result.data] if result.success else []
+
     def obtener_chunks_con_tablas(self, documento_id: int, limite: int = 5) -> List[Dict]:
         """Obtiene chunks que contienen tablas de un documento específico."""
         result = self._execute_query(
@@ -277,6 +369,349 @@ class Database:
         )
         return result.data if result.success else []
 
+    # --- Métodos para caché de embeddings ---
+
+    def obtener_embeddings_cache(self, modelo: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Obtiene los embeddings cacheados de un modelo para los hashes de texto dados."""
+        result = self._execute_query(
+            """SELECT hash_texto, vector::real[] AS vector FROM embeddings_cache
+               WHERE modelo = %s AND hash_texto = ANY(%s)""",
+            (modelo, hashes),
+            fetch=True,
+            many=True
+        )
+        return {fila['hash_texto']: fila['vector'] for fila in result.data} if result.success else {}
+
+    def insertar_embeddings_cache(self, modelo: str, registros: List[Tuple[str, List[float]]]) -> bool:
+        """Inserta en bloque embeddings en la caché persistente."""
+        if not registros:
+            return True
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        """INSERT INTO embeddings_cache (modelo, hash_texto, vector)
+                           VALUES %s ON CONFLICT DO NOTHING""",
+                        [(modelo, hash_texto, vector) for hash_texto, vector in registros],
+                        template="(%s, %s, %s::real[]::vector)"
+                    )
+                    conn.commit()
+                    return True
+        except Exception as e:
+            print(f"Error guardando embeddings en caché: {str(e)}")
+            return False
+
+    # --- Métodos para secciones ---
+
+    def guardar_secciones_documento(self, documento_id: int, secciones: List[Dict]) -> Dict[int, int]:
+        """Guarda la jerarquía de secciones de un documento y devuelve sus identificadores por orden."""
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    identificadores, padres = {}, {}
+                    for seccion in secciones:
+                        # El padre es la última sección abierta de un nivel superior
+                        padre = next(
+                            (padres[n] for n in range(seccion['nivel'] - 1, 0, -1) if n in padres), None
+                        )
+                        cur.execute(
+                            """INSERT INTO documentos_secciones
+                               (documento_id, seccion_padre_id, titulo, titulo_normalizado, nivel, orden, numero_pagina)
+                               VALUES (%s, %s, %s, %s, %s, %s, %s)
+                               ON CONFLICT (documento_id, orden) DO UPDATE SET
+                                   seccion_padre_id = EXCLUDED.seccion_padre_id,
+                                   titulo = EXCLUDED.titulo,
+                                   titulo_normalizado = EXCLUDED.titulo_normalizado,
+                                   nivel = EXCLUDED.nivel,
+                                   numero_pagina = EXCLUDED.numero_pagina
+                               RETURNING id""",
+                            (documento_id, padre, seccion['titulo'], seccion['titulo_normalizado'],
+                             seccion['nivel'], seccion['orden'], seccion['numero_pagina'])
+                        )
+                        identificadores[seccion['orden']] = cur.fetchone()[0]
+                        padres = {n: i for n, i in padres.items() if n < seccion['nivel']}
+                        padres[seccion['nivel']] = identificadores[seccion['orden']]
+                    conn.commit()
+                    return identificadores
+        except Exception as e:
+            print(f"Error guardando secciones del documento {documento_id}: {str(e)}")
+            return {}
+
+    def buscar_chunks_por_seccion(self, documento_id: int, titulos_normalizados: List[str], limite: int = 10) -> List[Dict]:
+        """Obtiene los chunks de las secciones (y subsecciones) cuyo título normalizado empieza por alguno de los dados."""
+        patrones = [f"{titulo}%" for titulo in titulos_normalizados]
+        result = self._execute_query(
+            """WITH RECURSIVE seleccion AS (
+                   SELECT id, orden FROM documentos_secciones
+                   WHERE documento_id = %s AND titulo_normalizado LIKE ANY(%s)
+                   UNION
+                   SELECT s.id, s.orden FROM documentos_secciones s
+                   JOIN seleccion ON s.seccion_padre_id = seleccion.id
+               )
+               SELECT c.id, c.chunk_texto, c.numero_pagina, c.titulo_seccion
+               FROM seleccion
+               JOIN documentos_chunks c ON c.seccion_id = seleccion.id
+               ORDER BY seleccion.orden, c.id
+               LIMIT %s""",
+            (documento_id, patrones, limite),
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    # --- Métodos para trabajos de ingesta ---
+
+    def iniciar_trabajo_ingesta(self, documento_id: int, enlace_documento: str) -> Optional[Dict]:
+        """Crea o reanuda el trabajo de ingesta de un documento conservando su último checkpoint."""
+        result = self._execute_query(
+            """INSERT INTO trabajos_ingesta (documento_id, enlace_documento, estado, intentos)
+               VALUES (%s, %s, 'en_curso', 1)
+               ON CONFLICT (documento_id) DO UPDATE SET
+                   estado = 'en_curso',
+                   intentos = trabajos_ingesta.intentos + 1,
+                   error = NULL,
+                   fecha_actualizacion = NOW()
+               RETURNING *""",
+            (documento_id, enlace_documento),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def guardar_pagina_ingesta(self, documento_id: int, numero_pagina: int,
+                               registros: List[Tuple[str, List[float], str, int, Optional[int]]]) -> bool:
+        """Inserta los chunks de una página y avanza el checkpoint del trabajo en una sola transacción."""
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cur:
+                    # Eliminar restos de un intento anterior interrumpido en esta misma página
+                    cur.execute(
+                        "DELETE FROM documentos_chunks WHERE documento_id = %s AND numero_pagina = %s",
+                        (documento_id, numero_pagina)
+                    )
+                    execute_values(
+                        cur,
+                        """INSERT INTO documentos_chunks
+                           (documento_id, chunk_texto, chunk_vector, titulo_seccion, numero_pagina, seccion_id)
+                           VALUES %s""",
+                        [(documento_id, *registro) for registro in registros],
+                        template="(%s, %s, %s::real[]::vector, %s, %s, %s)"
+                    )
+                    cur.execute(
+                        """UPDATE trabajos_ingesta SET
+                               ultima_pagina = GREATEST(ultima_pagina, %s),
+                               total_chunks = (SELECT COUNT(*) FROM documentos_chunks WHERE documento_id = %s),
+                               fecha_actualizacion = NOW()
+                           WHERE documento_id = %s""",
+                        (numero_pagina, documento_id, documento_id)
+                    )
+                    conn.commit()
+                    return True
+        except Exception as e:
+            print(f"Error guardando página {numero_pagina} del documento {documento_id}: {str(e)}")
+            return False
+
+    def finalizar_trabajo_ingesta(self, documento_id: int, estado: str, error: str = None,
+                                  total_paginas: int = None, memoria_proceso_mb: float = None) -> Optional[Dict]:
+        """Marca el trabajo de ingesta como completado o fallido."""
+        result = self._execute_query(
+            """UPDATE trabajos_ingesta SET
+                   estado = %s,
+                   error = %s,
+                   total_paginas = COALESCE(%s, total_paginas),
+                   memoria_proceso_mb = COALESCE(%s, memoria_proceso_mb),
+                   fecha_actualizacion = NOW()
+               WHERE documento_id = %s
+               RETURNING *""",
+            (estado, error, total_paginas, memoria_proceso_mb, documento_id),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def obtener_trabajos_ingesta_pendientes(self, minutos_inactivo: int = 30) -> List[Dict]:
+        """Obtiene los trabajos pendientes, fallidos o en curso sin avances recientes."""
+        result = self._execute_query(
+            """SELECT * FROM trabajos_ingesta
+               WHERE estado IN ('pendiente', 'fallido')
+                  OR (estado = 'en_curso' AND fecha_actualizacion < NOW() - make_interval(mins => %s))
+               ORDER BY fecha_actualizacion""",
+            (minutos_inactivo,),
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    def documento_ingesta_completa(self, documento_id: int) -> bool:
+        """Verifica si la ingesta de un documento terminó.
+
+        Los documentos ingeridos antes de existir los trabajos reciben el suyo al aplicar el esquema.
+        """
+        result = self._execute_query(
+            """SELECT EXISTS (
+                   SELECT 1 FROM trabajos_ingesta WHERE documento_id = %s AND estado = 'completado'
+               ) AS completa""",
+            (documento_id,),
+            fetch=True
+        )
+        return bool(result.data['completa']) if result.success and result.data else False
+
+    # --- Métodos para la frontera de URLs ---
+
+    def encolar_url_frontera(self, url: str, prioridad: int = 0) -> bool:
+        """Añade una URL pendiente a la frontera si no estaba ya."""
+        result = self._execute_query(
+            "INSERT INTO frontera_urls (url, prioridad) VALUES (%s, %s) ON CONFLICT (url) DO NOTHING",
+            (url, prioridad)
+        )
+        return result.success
+
+    def reclamar_url_frontera(self, url: str, trabajador: str, segundos_concesion: float,
+                              repetir_completada: bool = False) -> Optional[bool]:
+        """Reclama una URL concreta si nadie la tiene con una concesión vigente (ni, salvo que se pida, ya completada).
+
+        Devuelve None si la consulta falla, para no confundir un error de la base de datos con una URL ocupada.
+        """
+        result = self._execute_query(
+            """INSERT INTO frontera_urls (url, estado, trabajador, intentos, concesion_hasta)
+               VALUES (%s, 'en_curso', %s, 1, NOW() + make_interval(secs => %s))
+               ON CONFLICT (url) DO UPDATE SET
+                   estado = 'en_curso',
+                   trabajador = EXCLUDED.trabajador,
+                   intentos = frontera_urls.intentos + 1,
+                   concesion_hasta = EXCLUDED.concesion_hasta,
+                   error = NULL,
+                   fecha_actualizacion = NOW()
+               WHERE (frontera_urls.estado <> 'en_curso' OR frontera_urls.concesion_hasta < NOW())
+                 AND (%s OR frontera_urls.estado <> 'completado')
+               RETURNING url""",
+            (url, trabajador, segundos_concesion, repetir_completada),
+            fetch=True
+        )
+        if not result.success:
+            print(f"Error reclamando {url} en la frontera: {result.message}")
+            return None
+        return bool(result.data)
+
+    def reclamar_siguiente_frontera(self, trabajador: str, segundos_concesion: float,
+                                    max_intentos: int = 3) -> Optional[Dict]:
+        """Reclama la siguiente URL disponible; SKIP LOCKED evita que dos agentes se bloqueen o reclamen la misma."""
+        result = self._execute_query(
+            """UPDATE frontera_urls SET
+                   estado = 'en_curso',
+                   trabajador = %s,
+                   intentos = intentos + 1,
+                   concesion_hasta = NOW() + make_interval(secs => %s),
+                   error = NULL,
+                   fecha_actualizacion = NOW()
+               WHERE url = (
+                   SELECT url FROM frontera_urls
+                   WHERE (estado = 'pendiente'
+                          OR (estado = 'fallido' AND intentos < %s)
+                          OR (estado = 'en_curso' AND concesion_hasta < NOW()))
+                   ORDER BY prioridad DESC, fecha_alta
+                   LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+               )
+               RETURNING *""",
+            (trabajador, segundos_concesion, max_intentos),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def renovar_concesion_frontera(self, url: str, trabajador: str, segundos_concesion: float) -> bool:
+        """Prolonga la concesión de una URL mientras su trabajador la sigue procesando."""
+        result = self._execute_query(
+            """UPDATE frontera_urls SET concesion_hasta = NOW() + make_interval(secs => %s), fecha_actualizacion = NOW()
+               WHERE url = %s AND trabajador = %s AND estado = 'en_curso'""",
+            (segundos_concesion, url, trabajador)
+        )
+        return result.success and result.affected_rows > 0
+
+    def finalizar_url_frontera(self, url: str, trabajador: str, estado: str, error: str = None) -> bool:
+        """Marca la URL como completada o fallida y libera su concesión."""
+        result = self._execute_query(
+            """UPDATE frontera_urls SET
+                   estado = %s,
+                   error = %s,
+                   trabajador = NULL,
+                   concesion_hasta = NULL,
+                   fecha_actualizacion = NOW()
+               WHERE url = %s AND trabajador = %s""",
+            (estado, error, url, trabajador)
+        )
+        return result.success
+
+    # --- Métodos para validadores HTTP ---
+
+    def obtener_validador_http(self, url: str) -> Optional[Dict]:
+        """Obtiene los validadores HTTP de una URL, completados con los del último documento registrado con ella."""
+        result = self._execute_query(
+            """SELECT v.etag, v.ultima_modificacion, v.hash_sha256, v.enlaces, v.requiere_navegador,
+                      d.ultima_modificacion AS documento_ultima_modificacion, d.hash_sha256 AS documento_hash_sha256
+               FROM (SELECT %s::TEXT AS url) u
+               LEFT JOIN validadores_http v ON v.url = u.url
+               LEFT JOIN LATERAL (
+                   SELECT ultima_modificacion, hash_sha256 FROM documentos
+                   WHERE enlace_documento = u.url ORDER BY id DESC LIMIT 1
+               ) d ON TRUE""",
+            (url,),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def guardar_validador_http(self, url: str, etag: Optional[str], ultima_modificacion: Optional[str],
+                               hash_sha256: Optional[str], enlaces: Optional[List[str]] = None,
+                               requiere_navegador: Optional[bool] = None) -> bool:
+        """Guarda los validadores de la última respuesta completa recibida para una URL."""
+        result = self._execute_query(
+            """INSERT INTO validadores_http (url, etag, ultima_modificacion, hash_sha256, enlaces, requiere_navegador)
+               VALUES (%s, %s, %s, %s, %s, %s)
+               ON CONFLICT (url) DO UPDATE SET
+                   etag = EXCLUDED.etag,
+                   ultima_modificacion = EXCLUDED.ultima_modificacion,
+                   hash_sha256 = EXCLUDED.hash_sha256,
+                   enlaces = EXCLUDED.enlaces,
+                   requiere_navegador = EXCLUDED.requiere_navegador,
+                   fecha_validacion = NOW()""",
+            (url, etag, ultima_modificacion, hash_sha256, enlaces, requiere_navegador)
+        )
+        return result.success
+
+    def registrar_revalidacion_http(self, url: str) -> bool:
+        """Anota que el servidor confirmó con un 304 que el contenido de la URL no ha cambiado."""
+        result = self._execute_query(
+            """UPDATE validadores_http SET revalidaciones = revalidaciones + 1, fecha_validacion = NOW()
+               WHERE url = %s""",
+            (url,)
+        )
+        return result.success
+
+    # --- Métodos para estrategias de rastreo ---
+
+    def obtener_estrategia_dominio(self, dominio: str, dias_revision: int = 7) -> Optional[str]:
+        """Devuelve la estrategia de rastreo aprendida para el dominio, salvo que deba revisarse."""
+        result = self._execute_query(
+            """SELECT estrategia FROM estrategias_dominio
+               WHERE dominio = %s AND fecha_actualizacion >= NOW() - make_interval(days => %s)""",
+            (dominio, dias_revision),
+            fetch=True
+        )
+        return result.data['estrategia'] if result.success and result.data else None
+
+    def registrar_estrategia_dominio(self, dominio: str, estrategia: str) -> bool:
+        """Guarda la estrategia con la que se han obtenido los enlaces del dominio."""
+        result = self._execute_query(
+            """INSERT INTO estrategias_dominio (dominio, estrategia, exitos_html, usos_navegador)
+               VALUES (%s, %s, %s, %s)
+               ON CONFLICT (dominio) DO UPDATE SET
+                   estrategia = EXCLUDED.estrategia,
+                   exitos_html = estrategias_dominio.exitos_html + EXCLUDED.exitos_html,
+                   usos_navegador = estrategias_dominio.usos_navegador + EXCLUDED.usos_navegador,
+                   fecha_actualizacion = NOW()""",
+            (dominio, estrategia, int(estrategia == 'html'), int(estrategia == 'navegador'))
+        )
+        return result.success
+
     # --- Métodos para actualización ---
 
     def actualizar_campo_convocatoria(self, convocatoria_id: int, campo: str, valor: str) -> bool:
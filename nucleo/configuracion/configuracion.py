@@ -19,8 +19,45 @@ class Config:
             'user_agent': os.getenv('SCRAPING_USER_AGENT'),
             'timeout': int(os.getenv('SCRAPING_TIMEOUT')),
             'max_intentos': int(os.getenv('SCRAPING_MAX_RETRIES')),
+            'verificaciones_simultaneas': int(os.getenv('SCRAPING_VERIFICACIONES_SIMULTANEAS', '8')),
+            'verificaciones_por_host': int(os.getenv('SCRAPING_VERIFICACIONES_POR_HOST', '2')),
+            'presupuesto_verificacion': float(os.getenv('SCRAPING_PRESUPUESTO_VERIFICACION', '120')),
+            'peticiones_por_segundo_host': float(os.getenv('SCRAPING_PETICIONES_POR_SEGUNDO_HOST', '2')),
+            'rafaga_host': int(os.getenv('SCRAPING_RAFAGA_HOST', '4')),
+            'conexiones_por_host': int(os.getenv('SCRAPING_CONEXIONES_POR_HOST', '4')),
+            'max_retry_after': float(os.getenv('SCRAPING_MAX_RETRY_AFTER', '120')),
+            'http2': os.getenv('SCRAPING_HTTP2', 'false').lower() == 'true',
             'headless': os.getenv('PLAYWRIGHT_HEADLESS').lower() == 'true',
-            'slow_mo': int(os.getenv('PLAYWRIGHT_SLOW_MO'))
+            'slow_mo': int(os.getenv('PLAYWRIGHT_SLOW_MO')),
+            'usos_por_contexto': int(os.getenv('PLAYWRIGHT_USOS_CONTEXTO', '20')),
+            'asincrono': os.getenv('PLAYWRIGHT_ASINCRONO', 'false').lower() == 'true',
+            'paginas_simultaneas': int(os.getenv('PLAYWRIGHT_PAGINAS_SIMULTANEAS', '6')),
+            'paginas_por_host': int(os.getenv('PLAYWRIGHT_PAGINAS_POR_HOST', '2')),
+            'bloquear_recursos': os.getenv('PLAYWRIGHT_BLOQUEAR_RECURSOS', 'true').lower() == 'true',
+            'capturar_pdfs': os.getenv('PLAYWRIGHT_CAPTURAR_PDFS', 'true').lower() == 'true',
+            'captura_max_mb': int(os.getenv('PLAYWRIGHT_CAPTURA_MAX_MB', '50')) # 0: solo URL y cabeceras
+        }
+
+    @property
+    def RASTREO_CONFIG(self) -> Dict[str, Any]:
+        """Configuración del rastreo periódico de las convocatorias ya registradas."""
+        return {
+            'activo': os.getenv('RASTREO_PERIODICO', 'false').lower() == 'true',
+            'periodo_minutos': float(os.getenv('RASTREO_PERIODO_MINUTOS', '60')), # Entre rondas de revisión
+            'max_por_ronda': int(os.getenv('RASTREO_MAX_POR_RONDA', '10')),
+            'horas_abierta': float(os.getenv('RASTREO_HORAS_ABIERTA', '24')),
+            'horas_sin_fecha': float(os.getenv('RASTREO_HORAS_SIN_FECHA', '72')),
+            'dias_tras_cierre': int(os.getenv('RASTREO_DIAS_TRAS_CIERRE', '90')), # Periodo de resoluciones y correcciones
+            'dias_cerrada_reciente': float(os.getenv('RASTREO_DIAS_CERRADA_RECIENTE', '7')),
+            'dias_cerrada': float(os.getenv('RASTREO_DIAS_CERRADA', '30'))
+        }
+
+    @property
+    def FRONTERA_CONFIG(self) -> Dict[str, Any]:
+        """Configuración de la frontera de URLs compartida entre agentes de rastreo."""
+        return {
+            'concesion_segundos': float(os.getenv('FRONTERA_CONCESION_SEGUNDOS', '600')), # Se renueva mientras se procesa
+            'max_intentos': int(os.getenv('FRONTERA_MAX_INTENTOS', '3'))
         }
 
     @property
@@ -42,4 +79,50 @@ class Config:
             'endpoint': os.getenv('AZURE_OPENAI_ENDPOINT'),
             'api_version': os.getenv('AZURE_OPENAI_API_VERSION'),
             'deployment_name': os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
+        }
+
+    @property
+    def EMBEDDING_CONFIG(self) -> Dict[str, Any]:
+        """Configuración para la generación y caché de embeddings."""
+        return {
+            'modelo': os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2'),
+            'backend': os.getenv('EMBEDDING_BACKEND', 'torch').lower(),
+            'ruta_onnx': os.getenv('EMBEDDING_ONNX_PATH', '/root/.cache/onnx/all-MiniLM-L6-v2-int8'),
+            'cache_memoria': int(os.getenv('EMBEDDING_CACHE_SIZE', '10000')),
+            'cache_persistente': os.getenv('EMBEDDING_CACHE_PERSISTENTE', 'true').lower() == 'true'
+        }
+
+    @property
+    def ALMACEN_PDF_CONFIG(self) -> Dict[str, Any]:
+        """Configuración del almacén local de PDFs direccionado por contenido."""
+        return {
+            'ruta': os.getenv('ALMACEN_PDF_RUTA', 'datos/pdfs'),
+            'capacidad_mb': int(os.getenv('ALMACEN_PDF_CAPACIDAD_MB', '2048')), # 0: sin límite
+            'ttl_horas': float(os.getenv('ALMACEN_PDF_TTL_HORAS', '24')) # Vigencia de la URL sin volver a descargar
+        }
+
+    @property
+    def INGESTA_CONFIG(self) -> Dict[str, Any]:
+        """Configuración del pipeline de ingesta de documentos."""
+        return {
+            'workers': {
+                'descarga': int(os.getenv('INGESTA_WORKERS_DESCARGA', '3')),
+                'extraccion': int(os.getenv('INGESTA_WORKERS_EXTRACCION', '2')),
+                'vectorizacion': int(os.getenv('INGESTA_WORKERS_VECTORIZACION', '1')),
+                'almacenamiento': int(os.getenv('INGESTA_WORKERS_ALMACENAMIENTO', '2'))
+            },
+            'tamano_cola': int(os.getenv('INGESTA_TAMANO_COLA', '4')),
+            'workers_lote': int(os.getenv('INGESTA_WORKERS_LOTE', '2')), # Convocatorias o PDFs simultáneos en lote
+            'paginas_streaming': int(os.getenv('INGESTA_PAGINAS_STREAMING', '100')) # 0: sin modo streaming
+        }
+
+    @property
+    def FRAGMENTACION_CONFIG(self) -> Dict[str, Any]:
+        """Configuración de la división de texto en chunks."""
+        return {
+            'modo': os.getenv('FRAGMENTACION_MODO', 'tokens').lower(),
+            'tamano_tokens': int(os.getenv('FRAGMENTACION_TAMANO_TOKENS', '0')), # 0: límite del modelo
+            'solapamiento_tokens': int(os.getenv('FRAGMENTACION_SOLAPAMIENTO_TOKENS', '25')),
+            'tamano_caracteres': int(os.getenv('FRAGMENTACION_TAMANO_CARACTERES', '1000')),
+            'solapamiento_caracteres': int(os.getenv('FRAGMENTACION_SOLAPAMIENTO_CARACTERES', '200'))
         }
\ No newline at end of file
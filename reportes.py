@@ -47,6 +47,63 @@ def mostrar_reporte_general(dias: int = 1):
         print("\n4. Búsqueda:")
         print(f"   - Tiempo respuesta búsqueda vectorial: {reporte['busqueda']['promedios'].get('tiempo_respuesta_vectorial', 0):.4f} segundos")
 
+    # Ingesta por etapas (solo si hay datos)
+    if reporte.get('ingesta'):
+        print("\n5. Ingesta por etapas:")
+        for etapa in reporte['ingesta']:
+            total = (etapa['tiempo_ocupado'] or 0) + (etapa['tiempo_espera'] or 0)
+            utilizacion = (etapa['tiempo_ocupado'] / total * 100) if total else 0
+            print(f"   - {etapa['etapa']} ({etapa['workers']} workers): {etapa['documentos']} documentos, "
+                  f"{etapa['errores']} errores, {etapa['tiempo_ocupado']:.2f} s ocupado, "
+                  f"{etapa['tiempo_espera']:.2f} s en espera, utilización {utilizacion:.1f}%")
+
+    # Memoria del proceso durante cada documento (solo si hay datos)
+    if reporte.get('memoria_ingesta'):
+        memoria = reporte['memoria_ingesta']
+        print("\n6. Memoria de ingesta:")
+        print(f"   - Documentos medidos: {memoria['documentos']} (hasta {memoria['max_paginas']} páginas)")
+        print(f"   - Incremento del pico de memoria del proceso durante un documento: media {memoria['media_mb']:.1f} MB, "
+              f"máximo {memoria['maxima_mb']:.1f} MB (incluye los documentos procesados a la vez)")
+
+    # Reutilización del navegador de rastreo (solo si hay datos)
+    if reporte.get('navegador'):
+        navegador = reporte['navegador']
+        print("\n7. Pool de navegadores:")
+        print(f"   - Rastreos: {navegador['rastreos']} "
+              f"(navegador reutilizado {navegador['navegadores_reutilizados']}, "
+              f"contexto reutilizado {navegador['contextos_reutilizados']})")
+        if navegador['lanzamiento_medio'] is not None:
+            print(f"   - Lanzamiento medio de Chromium: {navegador['lanzamiento_medio']:.2f}s")
+        print(f"   - Tiempo de lanzamiento ahorrado: {navegador['tiempo_ahorrado']:.1f}s")
+        print(f"   - Utilización media del pool: {navegador['utilizacion_media'] * 100:.1f}%")
+
+    # Tiempos de rastreo por organismo (solo si hay datos)
+    if reporte.get('rastreo'):
+        print("\n8. Tiempos de rastreo:")
+        for organismo in reporte['rastreo']:
+            total = organismo['carga_media'] + organismo['espera_media'] + organismo['trabajo_medio']
+            espera = (organismo['espera_media'] / total * 100) if total else 0
+            print(f"   - {organismo['organismo']} [{organismo['estrategia']}] ({organismo['paginas']} páginas): carga {organismo['carga_media']:.2f} s, "
+                  f"espera {organismo['espera_media']:.2f} s ({espera:.1f}%), trabajo {organismo['trabajo_medio']:.2f} s, "
+                  f"{organismo['esperas_agotadas']} esperas agotadas")
+            if organismo['estrategia'] == 'html':
+                continue
+            if organismo['bloqueo_recursos']:
+                print(f"     Bloqueo de recursos: lista en {organismo['lista_media']:.2f} s, "
+                      f"{organismo['peticiones_bloqueadas']} peticiones y "
+                      f"~{organismo['bytes_evitados'] / (1024 * 1024):.1f} MB evitados")
+            else:
+                print(f"     Sin bloqueo de recursos: lista en {organismo['lista_media']:.2f} s")
+
+    # Verificación de enlaces candidatos (solo si hay datos)
+    if reporte.get('verificacion'):
+        verificacion = reporte['verificacion']
+        print("\n9. Verificación de enlaces:")
+        print(f"   - Convocatorias: {verificacion['convocatorias']}, candidatos: {verificacion['candidatos']} "
+              f"({verificacion['duplicados']} duplicados)")
+        print(f"   - Comprobados: {verificacion['comprobados']} a {verificacion['enlaces_por_segundo']:.1f} enlaces/s, "
+              f"{verificacion['validos']} PDFs válidos, {verificacion['descartados_por_tiempo']} descartados por tiempo")
+
 def main():
     """Función principal para la interfaz de reportes."""
     print("\n📊 Sistema de Reportes de Métricas")
@@ -3,7 +3,7 @@ Módulo para generar reportes de métricas de rendimiento.
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from nucleo.base_datos.modelos import Database
 
@@ -37,6 +37,21 @@ class ReportGenerator:
             resultado['llm'] = self._procesar_metricas(llm)
         if busqueda:
             resultado['busqueda'] = self._procesar_metricas(busqueda)
+        ingesta = self._obtener_metricas_ingesta(fecha_inicio)
+        if ingesta:
+            resultado['ingesta'] = ingesta
+        memoria = self._obtener_memoria_ingesta(fecha_inicio)
+        if memoria and memoria['documentos']:
+            resultado['memoria_ingesta'] = memoria
+        navegador = self._obtener_metricas_navegador(fecha_inicio)
+        if navegador and navegador['rastreos']:
+            resultado['navegador'] = navegador
+        rastreo = self._obtener_tiempos_rastreo(fecha_inicio)
+        if rastreo:
+            resultado['rastreo'] = rastreo
+        verificacion = self._obtener_metricas_verificacion(fecha_inicio)
+        if verificacion and verificacion['convocatorias']:
+            resultado['verificacion'] = verificacion
         return resultado
         
     def _obtener_metricas(self, tabla: str, fecha_inicio: datetime) -> List[Dict]:
@@ -49,6 +64,81 @@ class ReportGenerator:
         )
         return result.data if result.success else []
         
+    def _obtener_metricas_ingesta(self, fecha_inicio: datetime) -> List[Dict]:
+        """Agrega por etapa las métricas del pipeline de ingesta desde una fecha."""
+        result = self.db._execute_query(
+            """SELECT etapa, MAX(workers) AS workers, SUM(documentos) AS documentos,
+                      SUM(errores) AS errores, SUM(tiempo_ocupado) AS tiempo_ocupado,
+                      SUM(tiempo_espera) AS tiempo_espera
+               FROM metricas_ingesta WHERE fecha >= %s
+               GROUP BY etapa ORDER BY MIN(id)""",
+            (fecha_inicio,),
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    def _obtener_memoria_ingesta(self, fecha_inicio: datetime) -> Optional[Dict]:
+        """Resume el pico de memoria del proceso durante los trabajos de ingesta completados desde una fecha."""
+        result = self.db._execute_query(
+            """SELECT COUNT(memoria_proceso_mb) AS documentos, AVG(memoria_proceso_mb) AS media_mb,
+                      MAX(memoria_proceso_mb) AS maxima_mb, MAX(total_paginas) AS max_paginas
+               FROM trabajos_ingesta
+               WHERE estado = 'completado' AND fecha_actualizacion >= %s""",
+            (fecha_inicio,),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def _obtener_metricas_navegador(self, fecha_inicio: datetime) -> Optional[Dict]:
+        """Resume la reutilización del pool de navegadores desde una fecha."""
+        result = self.db._execute_query(
+            """SELECT COUNT(*) AS rastreos,
+                      COUNT(*) FILTER (WHERE navegador_reutilizado) AS navegadores_reutilizados,
+                      COUNT(*) FILTER (WHERE contexto_reutilizado) AS contextos_reutilizados,
+                      AVG(tiempo_lanzamiento) FILTER (WHERE NOT navegador_reutilizado) AS lanzamiento_medio,
+                      COALESCE(SUM(tiempo_ahorrado), 0) AS tiempo_ahorrado,
+                      AVG(utilizacion) AS utilizacion_media
+               FROM metricas_navegador WHERE fecha >= %s""",
+            (fecha_inicio,),
+            fetch=True
+        )
+        return result.data if result.success else None
+
+    def _obtener_tiempos_rastreo(self, fecha_inicio: datetime) -> List[Dict]:
+        """Agrega por organismo, estrategia y bloqueo de recursos, los tiempos y bytes evitados del rastreo."""
+        result = self.db._execute_query(
+            """SELECT organismo, COALESCE(estrategia, 'navegador') AS estrategia,
+                      COALESCE(bloqueo_recursos, FALSE) AS bloqueo_recursos,
+                      COUNT(*) AS paginas, AVG(tiempo_carga) AS carga_media,
+                      AVG(tiempo_espera) AS espera_media, AVG(tiempo_trabajo) AS trabajo_medio,
+                      AVG(tiempo_carga + tiempo_espera) AS lista_media,
+                      COUNT(*) FILTER (WHERE NOT listo) AS esperas_agotadas,
+                      COALESCE(SUM(peticiones_bloqueadas), 0) AS peticiones_bloqueadas,
+                      COALESCE(SUM(bytes_evitados), 0) AS bytes_evitados
+               FROM metricas_rastreo WHERE fecha >= %s
+               GROUP BY organismo, COALESCE(estrategia, 'navegador'), COALESCE(bloqueo_recursos, FALSE)
+               ORDER BY organismo, estrategia, bloqueo_recursos""",
+            (fecha_inicio,),
+            fetch=True,
+            many=True
+        )
+        return result.data if result.success else []
+
+    def _obtener_metricas_verificacion(self, fecha_inicio: datetime) -> Optional[Dict]:
+        """Resume la verificación de enlaces candidatos a PDF desde una fecha."""
+        result = self.db._execute_query(
+            """SELECT COUNT(*) AS convocatorias, COALESCE(SUM(candidatos), 0) AS candidatos,
+                      COALESCE(SUM(duplicados), 0) AS duplicados, COALESCE(SUM(comprobados), 0) AS comprobados,
+                      COALESCE(SUM(validos), 0) AS validos,
+                      COALESCE(SUM(descartados_por_tiempo), 0) AS descartados_por_tiempo,
+                      COALESCE(SUM(comprobados) / NULLIF(SUM(duracion), 0), 0) AS enlaces_por_segundo
+               FROM metricas_verificacion WHERE fecha >= %s""",
+            (fecha_inicio,),
+            fetch=True
+        )
+        return result.data if result.success else None
+
     def _procesar_metricas(self, metricas: List[Dict]) -> Dict:
         """Procesa una lista de métricas para calcular promedios."""
         if not metricas:
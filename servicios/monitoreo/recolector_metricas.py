@@ -2,13 +2,58 @@
 Módulo para seguir y calcular las métricas del sistema.
 """
 
+import os
 import time
+import resource
+import threading
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 
 from nucleo.base_datos.modelos import Database
 
+def memoria_rss_mb() -> float:
+    """Devuelve la memoria residente actual del proceso en MB."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Sin /proc solo se dispone del pico del proceso (KB en Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class MuestreoMemoria:
+    """Muestrea en segundo plano la memoria residente del proceso para obtener su pico durante un bloque.
+
+    La medida es del proceso completo: incluye lo que otros hilos procesen a la vez.
+    """
+
+    def __init__(self, intervalo: float = 0.05):
+        self.intervalo = intervalo
+        self.inicial = self.pico = 0.0
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def __enter__(self) -> 'MuestreoMemoria':
+        self.inicial = self.pico = memoria_rss_mb()
+        self._hilo = threading.Thread(target=self._muestrear, name='muestreo-memoria', daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._detener.set()
+        self._hilo.join()
+        self.pico = max(self.pico, memoria_rss_mb())
+
+    @property
+    def incremento_mb(self) -> float:
+        """Crecimiento máximo de la memoria del proceso respecto al inicio del bloque."""
+        return self.pico - self.inicial
+
+    def _muestrear(self) -> None:
+        while not self._detener.wait(self.intervalo):
+            self.pico = max(self.pico, memoria_rss_mb())
+
 @dataclass
 class MetricasExtraccion:
     total_urls_procesadas: int = 0
@@ -98,6 +143,54 @@ class MetricasManager:
         # Guardar en base de datos
         self._guardar_metricas_procesamiento()
         
+    def registrar_etapas_ingesta(self, etapas: List[Dict]):
+        """Registra las métricas por etapa de una ejecución del pipeline de ingesta."""
+        for etapa in etapas:
+            self.db._execute_query(
+                """INSERT INTO metricas_ingesta
+                   (fecha, etapa, workers, documentos, errores, tiempo_ocupado, tiempo_espera)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (datetime.now(), etapa['etapa'], etapa['workers'], etapa['documentos'],
+                 etapa['errores'], etapa['tiempo_ocupado'], etapa['tiempo_espera'])
+            )
+
+    def registrar_usos_navegador(self, usos: List[Dict]):
+        """Registra los préstamos de contextos del pool de navegadores."""
+        for uso in usos:
+            self.db._execute_query(
+                """INSERT INTO metricas_navegador
+                   (fecha, navegador_reutilizado, contexto_reutilizado, tiempo_lanzamiento,
+                    tiempo_ahorrado, tiempo_uso, utilizacion)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (datetime.now(), uso['navegador_reutilizado'], uso['contexto_reutilizado'],
+                 uso['tiempo_lanzamiento'], uso['tiempo_ahorrado'], uso['tiempo_uso'], uso['utilizacion'])
+            )
+
+    def registrar_tiempos_rastreo(self, tiempos: List[Dict]):
+        """Registra el reparto entre carga, espera y trabajo útil de cada página rastreada."""
+        for t in tiempos:
+            self.db._execute_query(
+                """INSERT INTO metricas_rastreo
+                   (fecha, url, organismo, tiempo_carga, tiempo_espera, tiempo_trabajo, enlaces, listo,
+                    bloqueo_recursos, peticiones_bloqueadas, bytes_evitados, estrategia)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (datetime.now(), t['url'], t['organismo'], t['tiempo_carga'], t['tiempo_espera'],
+                 t['tiempo_trabajo'], t['enlaces'], t['listo'], t['bloqueo_recursos'],
+                 t['peticiones_bloqueadas'], t['bytes_evitados'], t['estrategia'])
+            )
+
+    def registrar_verificacion(self, url_convocatoria: str, estadisticas: Dict):
+        """Registra la verificación de los enlaces candidatos de una convocatoria."""
+        self.db._execute_query(
+            """INSERT INTO metricas_verificacion
+               (fecha, url_convocatoria, candidatos, duplicados, comprobados, validos,
+                descartados_por_tiempo, duracion, enlaces_por_segundo)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+            (datetime.now(), url_convocatoria, estadisticas['candidatos'], estadisticas['duplicados'],
+             estadisticas['comprobados'], estadisticas['validos'], estadisticas['descartados_por_tiempo'],
+             estadisticas['duracion'], estadisticas['enlaces_por_segundo'])
+        )
+
     def registrar_llamada_llm(self, tipo: str, tiempo_ejecucion: float):
         """Registra una llamada al LLM."""
         self.llm.llamadas_totales += 1
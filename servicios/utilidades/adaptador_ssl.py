@@ -3,20 +3,43 @@ Módulo para establecer conexiones HTTP/HTTPS con adaptadores SSL.
 """
 
 import ssl
+import time
 import urllib3
-from typing import Optional
+import requests
+import threading
+from typing import Dict, Optional
 from requests.adapters import HTTPAdapter
 from urllib3.util.ssl_ import create_urllib3_context
 
+from .planificador_hosts import PlanificadorHosts
+
 # Desactivar advertencias de SSL no verificado
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Respuestas con las que el servidor pide bajar el ritmo; se reintentan tras la pausa de Retry-After
+ESTADOS_LIMITE = (429, 503)
+# Errores transitorios de pasarela; se reintentan con espera exponencial
+ESTADOS_REINTENTABLES = (502, 504)
+METODOS_REINTENTABLES = ('GET', 'HEAD', 'OPTIONS')
+ESPERA_BASE_REINTENTO = 0.5
+
 class CustomSSLAdapter(HTTPAdapter):
-    """Maneja las conexiones SSL con configuración flexible."""
+    """Maneja las conexiones SSL con configuración flexible.
+
+    Todas las peticiones, también los reintentos, pasan por el planificador de hosts del proceso, que
+    reparte el ritmo y las conexiones simultáneas por host. Cada petición ocupa su hueco en el host
+    hasta que se cierra la respuesta o se termina de leer su cuerpo, también con stream=True.
+    Los fallos de conexión y los 502/504 se reintentan con espera exponencial; los 429/503 pausan el
+    host según Retry-After y la petición se repite.
+    """
     
-    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, max_retries: int = 3, **kwargs):
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None, max_retries: int = 3,
+                 planificador: Optional[PlanificadorHosts] = None, **kwargs):
         self.ssl_context = ssl_context or self._create_ssl_context()
-        super().__init__(max_retries=max_retries, **kwargs)
+        self.planificador = planificador or PlanificadorHosts.compartido()
+        self.reintentos_limite = max_retries
+        # Los reintentos se hacen en send(), no en urllib3, para que respeten el ritmo del host
+        super().__init__(max_retries=0, **kwargs)
 
     def _create_ssl_context(self) -> ssl.SSLContext:
         """Crea y configura un contexto SSL seguro pero flexible."""
@@ -38,6 +61,77 @@ class CustomSSLAdapter(HTTPAdapter):
         
         return context
 
+    def send(self, request, **kwargs):
+        """Envía la petición cuando el host lo permite y la repite tras un fallo transitorio o si el servidor pide esperar."""
+        intentos = self.reintentos_limite if request.method in METODOS_REINTENTABLES else 0
+        for intento in range(intentos + 1):
+            self.planificador.esperar(request.url)
+            conexiones = self.planificador.conexiones(request.url)
+            conexiones.acquire()
+            try:
+                response = self._enviar(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                conexiones.release()
+                if intento == intentos:
+                    raise
+                time.sleep(ESPERA_BASE_REINTENTO * 2 ** intento)
+                continue
+            except Exception:
+                conexiones.release()
+                raise
+            self._retener_hasta_cierre(response, conexiones)
+
+            if response.status_code in ESTADOS_LIMITE:
+                # La pausa la aplica el planificador en la siguiente espera a este host
+                self.planificador.penalizar(request.url, response.headers.get('retry-after'))
+            if intento == intentos or response.status_code not in ESTADOS_LIMITE + ESTADOS_REINTENTABLES:
+                return response
+            response.close()
+            if response.status_code in ESTADOS_REINTENTABLES:
+                time.sleep(ESPERA_BASE_REINTENTO * 2 ** intento)
+        return response
+
+    def _enviar(self, request, **kwargs):
+        return super().send(request, **kwargs)
+
+    @staticmethod
+    def _retener_hasta_cierre(response, conexiones: threading.Semaphore) -> None:
+        """Libera el hueco del host al cerrar la respuesta o al liberar su conexión tras leer el cuerpo."""
+        lock = threading.Lock()
+        liberado = False
+
+        def liberar():
+            nonlocal liberado
+            with lock:
+                if liberado:
+                    return
+                liberado = True
+            conexiones.release()
+
+        raw = response.raw
+        metodos = [metodo for metodo in ('release_conn', 'close') if callable(getattr(raw, metodo, None))]
+        if not metodos:
+            liberar()
+            return
+        for metodo in metodos:
+            def envoltura(*args, _original=getattr(raw, metodo), **kwargs):
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    liberar()
+            setattr(raw, metodo, envoltura)
+
+    def estadisticas(self) -> Dict[str, Dict]:
+        """Peticiones y conexiones abiertas por host: cuantas menos conexiones por petición, más reutilización."""
+        estadisticas = {}
+        for clave in self.poolmanager.pools.keys():
+            if not (pool := self.poolmanager.pools.get(clave)) or not pool.num_requests:
+                continue
+            host = estadisticas.setdefault(pool.host, {'peticiones': 0, 'conexiones': 0, 'http2': 0})
+            host['peticiones'] += pool.num_requests
+            host['conexiones'] += pool.num_connections
+        return estadisticas
+
     def init_poolmanager(self, *args, **kwargs):
         """Inicializa el pool de conexiones con el contexto SSL configurado."""
         kwargs['ssl_context'] = self.ssl_context
@@ -0,0 +1,138 @@
+"""
+Módulo para almacenar en disco los PDFs descargados, direccionados por su contenido.
+"""
+
+import io
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from nucleo.configuracion.configuracion import Config
+
+class AlmacenPdf:
+    """Guarda cada PDF una sola vez por su SHA-256, con un índice URL → hash y un límite de tamaño LRU.
+
+    Estructura en disco:
+        objetos/ab/abcdef....pdf  Contenido, nombrado por su hash
+        urls/<sha256 de la URL>   Última descarga de cada URL: hash, Last-Modified y fecha
+    """
+
+    # La expulsión recorre el directorio completo: se serializa entre hilos
+    _lock = threading.Lock()
+
+    def __init__(self, ruta: Optional[str] = None, capacidad_mb: Optional[int] = None,
+                 ttl_horas: Optional[float] = None):
+        ajustes = Config().ALMACEN_PDF_CONFIG
+        self.ruta = Path(ruta or ajustes['ruta'])
+        self.capacidad_bytes = (capacidad_mb if capacidad_mb is not None else ajustes['capacidad_mb']) * 1024 * 1024
+        self.ttl_segundos = (ttl_horas if ttl_horas is not None else ajustes['ttl_horas']) * 3600
+        self.objetos = self.ruta / 'objetos'
+        self.urls = self.ruta / 'urls'
+        self.objetos.mkdir(parents=True, exist_ok=True)
+        self.urls.mkdir(parents=True, exist_ok=True)
+
+    def guardar(self, bloques: Iterable[bytes], url: Optional[str] = None,
+                ultima_modificacion: Optional[str] = None) -> Tuple[str, int]:
+        """Escribe el contenido en disco calculando su hash y devuelve (hash, tamaño en bytes)."""
+        sha256 = hashlib.sha256()
+        tamano = 0
+        descriptor, temporal = tempfile.mkstemp(dir=self.ruta, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                for bloque in bloques:
+                    f.write(bloque)
+                    sha256.update(bloque)
+                    tamano += len(bloque)
+
+            hash_sha256 = sha256.hexdigest()
+            destino = self._ruta_objeto(hash_sha256)
+            destino.parent.mkdir(exist_ok=True)
+            os.replace(temporal, destino) # Atómico: un lector nunca ve un PDF a medias
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        if url:
+            self.indexar_url(url, hash_sha256, ultima_modificacion)
+        self._recortar()
+        return hash_sha256, tamano
+
+    def indexar_url(self, url: str, hash_sha256: str, ultima_modificacion: Optional[str] = None) -> None:
+        """Asocia la URL al contenido descargado por última vez."""
+        entrada = {'hash': hash_sha256, 'ultima_modificacion': ultima_modificacion, 'fecha': time.time()}
+        destino = self._ruta_url(url)
+        temporal = destino.with_suffix('.tmp')
+        temporal.write_text(json.dumps(entrada), encoding='utf-8')
+        os.replace(temporal, destino)
+
+    def entrada_url(self, url: str, vigente: bool = False) -> Optional[Dict]:
+        """Devuelve la entrada del índice de una URL cuyo contenido sigue en disco (opcionalmente, sin caducar)."""
+        try:
+            entrada = json.loads(self._ruta_url(url).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if vigente and not self.es_vigente(entrada):
+            return None
+        return entrada if self._ruta_objeto(entrada['hash']).exists() else None
+
+    def es_vigente(self, entrada: Dict) -> bool:
+        """Indica si la entrada se descargó hace menos del TTL y puede usarse sin consultar al servidor."""
+        return time.time() - entrada['fecha'] <= self.ttl_segundos
+
+    def ruta_archivo(self, hash_sha256: str) -> Optional[Path]:
+        """Devuelve la ruta del PDF con ese hash, marcándolo como usado recientemente."""
+        ruta = self._ruta_objeto(hash_sha256)
+        try:
+            os.utime(ruta)
+            return ruta
+        except OSError:
+            return None
+
+    def abrir(self, hash_sha256: str) -> Optional[io.BytesIO]:
+        """Carga en memoria el PDF con ese hash, si está almacenado."""
+        ruta = self.ruta_archivo(hash_sha256)
+        if not ruta:
+            return None
+        try:
+            return io.BytesIO(ruta.read_bytes())
+        except OSError:
+            return None
+
+    def abrir_url(self, url: str) -> Optional[io.BytesIO]:
+        """Carga en memoria el último PDF descargado de la URL, si está almacenado."""
+        entrada = self.entrada_url(url)
+        return self.abrir(entrada['hash']) if entrada else None
+
+    def _ruta_objeto(self, hash_sha256: str) -> Path:
+        return self.objetos / hash_sha256[:2] / f"{hash_sha256}.pdf"
+
+    def _ruta_url(self, url: str) -> Path:
+        return self.urls / hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _recortar(self) -> None:
+        """Elimina los PDFs usados hace más tiempo hasta respetar la capacidad máxima."""
+        if self.capacidad_bytes <= 0:
+            return
+        with self._lock:
+            archivos = []
+            for ruta in self.objetos.glob('*/*.pdf'):
+                try:
+                    estado = ruta.stat()
+                    archivos.append((estado.st_mtime, estado.st_size, ruta))
+                except OSError:
+                    continue
+
+            total = sum(tamano for _, tamano, _ in archivos)
+            for _, tamano, ruta in sorted(archivos):
+                if total <= self.capacidad_bytes:
+                    break
+                try:
+                    ruta.unlink()
+                    total -= tamano
+                except OSError:
+                    continue
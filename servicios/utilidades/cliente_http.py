@@ -0,0 +1,179 @@
+"""
+Módulo con el cliente HTTP compartido por el rastreo, la verificación y la descarga de documentos.
+"""
+
+import threading
+import requests
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from nucleo.configuracion.configuracion import Config
+from .adaptador_ssl import CustomSSLAdapter
+
+# Hosts distintos cuyas conexiones se conservan abiertas a la vez
+HOSTS_EN_POOL = 20
+
+# Cabeceras propias de una conexión HTTP/1.1, prohibidas en HTTP/2; httpx gestiona las conexiones por sí mismo
+CABECERAS_CONEXION = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+class _CuerpoHttpx:
+    """Expone el cuerpo de una respuesta de httpx con la interfaz de urllib3 que usa requests.
+
+    Como urllib3, libera la conexión al agotar el cuerpo: el adaptador suelta entonces el hueco del host.
+    """
+
+    def __init__(self, respuesta):
+        self._respuesta = respuesta
+        self._pendiente = b''
+        self._bloques = None
+
+    def stream(self, chunk_size: Optional[int] = None, decode_content: bool = True):
+        yield from self._respuesta.iter_bytes(chunk_size)
+        self.release_conn()
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        if self._bloques is None:
+            self._bloques = self._respuesta.iter_bytes()
+        while amt is None or len(self._pendiente) < amt:
+            bloque = next(self._bloques, None)
+            if bloque is None:
+                self.release_conn()
+                break
+            self._pendiente += bloque
+        if amt is None:
+            datos, self._pendiente = self._pendiente, b''
+        else:
+            datos, self._pendiente = self._pendiente[:amt], self._pendiente[amt:]
+        return datos
+
+    def close(self) -> None:
+        self._respuesta.close()
+
+    def release_conn(self) -> None:
+        self._respuesta.close()
+
+class AdaptadorHttp2(CustomSSLAdapter):
+    """Envía las peticiones de requests con httpx para usar HTTP/2 cuando el servidor lo negocia.
+
+    Conserva el contexto SSL permisivo, el planificador de hosts y los reintentos tras 429/503 de
+    CustomSSLAdapter. Requiere la dependencia opcional httpx[http2].
+    """
+
+    def __init__(self, max_retries: int = 3, max_conexiones_por_host: int = 10, **kwargs):
+        super().__init__(max_retries=max_retries, **kwargs)
+        import httpx
+        transporte = httpx.HTTPTransport(
+            http2=True,
+            verify=self.ssl_context,
+            limits=httpx.Limits(max_connections=HOSTS_EN_POOL * max_conexiones_por_host,
+                                max_keepalive_connections=HOSTS_EN_POOL * max_conexiones_por_host)
+        )
+        self._cliente = httpx.Client(transport=transporte, follow_redirects=False, trust_env=False)
+        self._httpx = httpx
+        self._lock = threading.Lock()
+        self._peticiones: Dict[str, Dict] = defaultdict(lambda: {'peticiones': 0, 'http2': 0, 'conexiones': set()})
+
+    def _enviar(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        conexion, lectura = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        cabeceras = {clave: valor for clave, valor in request.headers.items() if clave.lower() not in CABECERAS_CONEXION}
+        peticion = self._cliente.build_request(
+            request.method, request.url, headers=cabeceras, content=request.body,
+            timeout=self._httpx.Timeout(lectura, connect=conexion)
+        )
+        try:
+            respuesta = self._cliente.send(peticion, stream=True)
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except self._httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        self._anotar(request.url, respuesta)
+
+        response = requests.Response()
+        response.status_code = respuesta.status_code
+        response.reason = respuesta.reason_phrase
+        response.headers = CaseInsensitiveDict(respuesta.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _CuerpoHttpx(respuesta)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def _anotar(self, url: str, respuesta) -> None:
+        # Cada conexión tiene su propio flujo de red: contarlos distingue las conexiones nuevas de las reutilizadas
+        flujo = respuesta.extensions.get('network_stream')
+        with self._lock:
+            host = self._peticiones[urlparse(url).hostname or '']
+            host['peticiones'] += 1
+            host['http2'] += respuesta.http_version == 'HTTP/2'
+            if flujo is not None:
+                host['conexiones'].add(id(flujo))
+
+    def estadisticas(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {host: {'peticiones': datos['peticiones'], 'conexiones': len(datos['conexiones']),
+                           'http2': datos['http2']}
+                    for host, datos in self._peticiones.items()}
+
+    def close(self) -> None:
+        self._cliente.close()
+        super().close()
+
+class ClienteHttp:
+    """Sesión HTTP única por proceso, con un pool de conexiones por host reutilizado entre componentes.
+
+    La sesión es segura entre hilos siempre que las cabeceras propias de una petición se pasen en la
+    llamada (headers=...) y no modificando session.headers.
+    """
+
+    _compartido: Optional['ClienteHttp'] = None
+    _lock_compartido = threading.Lock()
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        ajustes = self.config.SCRAPING_CONFIG
+        # Hilos que pueden estar a la vez en un mismo host: por encima, urllib3 descartaría conexiones
+        por_host = max(ajustes['conexiones_por_host'], ajustes['verificaciones_simultaneas'])
+        if ajustes['http2']:
+            self.adaptador = AdaptadorHttp2(max_retries=ajustes['max_intentos'], max_conexiones_por_host=por_host)
+        else:
+            self.adaptador = CustomSSLAdapter(max_retries=ajustes['max_intentos'],
+                                              pool_connections=HOSTS_EN_POOL, pool_maxsize=por_host)
+        self.session = self._configurar_sesion()
+
+    @classmethod
+    def compartido(cls, config: Optional[Config] = None) -> 'ClienteHttp':
+        """Devuelve el cliente del proceso, creándolo la primera vez."""
+        with cls._lock_compartido:
+            if cls._compartido is None:
+                cls._compartido = cls(config)
+            return cls._compartido
+
+    def _configurar_sesion(self) -> requests.Session:
+        """Configura la sesión con headers de navegador y el adaptador compartido para HTTP y HTTPS."""
+        session = requests.Session()
+        session.mount('https://', self.adaptador)
+        session.mount('http://', self.adaptador)
+
+        session.headers.update({
+            'User-Agent': self.config.SCRAPING_CONFIG['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1'
+        })
+
+        session.verify = False # Verificación SSL desactivada
+        session.trust_env = False
+        return session
+
+    def estadisticas(self) -> Dict[str, Dict]:
+        """Peticiones, conexiones abiertas, peticiones por HTTP/2 y proporción de reutilización por host."""
+        estadisticas = self.adaptador.estadisticas()
+        for datos in estadisticas.values():
+            datos['reutilizacion'] = 1 - datos['conexiones'] / datos['peticiones'] if datos['peticiones'] else 0.0
+        return estadisticas
@@ -0,0 +1,183 @@
+"""
+Módulo para contar las páginas de un PDF leyendo solo su trailer, su tabla xref y el árbol de páginas.
+"""
+
+import re
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+TAMANO_COLA = 2048
+MAX_OBJETO = 1024 * 1024
+
+PATRON_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+PATRON_LINEALIZADO = re.compile(rb'/Linearized\b.*?/N\s+(\d+)', re.S)
+
+def _referencia(diccionario: bytes, clave: bytes) -> Optional[int]:
+    coincidencia = re.search(rb'/' + clave + rb'\s+(\d+)\s+\d+\s+R', diccionario)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+def _entero(diccionario: bytes, clave: bytes) -> Optional[int]:
+    coincidencia = re.search(rb'/' + clave + rb'\s+(\d+)\b(?!\s+\d+\s+R)', diccionario)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+def _lista(diccionario: bytes, clave: bytes) -> Optional[list]:
+    coincidencia = re.search(rb'/' + clave + rb'\s*\[([\d\s]*)\]', diccionario)
+    return [int(n) for n in coincidencia.group(1).split()] if coincidencia else None
+
+class _LectorPdf:
+    """Localiza objetos a partir de las tablas xref, clásicas o comprimidas (PDF 1.5+)."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.entradas: Dict[int, Tuple] = {} # número -> ('desplazamiento', d) o ('comprimido', flujo, índice)
+        self.trailer = b''
+        self._flujos: Dict[int, Tuple[bytes, bytes]] = {}
+
+    def cargar_xref(self, desplazamiento: int) -> None:
+        """Recorre las secciones xref desde la última; las más recientes prevalecen sobre /Prev."""
+        visitadas = set()
+        while desplazamiento is not None and desplazamiento not in visitadas:
+            visitadas.add(desplazamiento)
+            self.f.seek(desplazamiento)
+            inicio = self.f.read(4)
+            if inicio == b'xref':
+                diccionario = self._leer_tabla(desplazamiento + 4)
+            else:
+                diccionario = self._leer_flujo_xref(desplazamiento)
+            if not self.trailer:
+                self.trailer = diccionario
+            # Los ficheros híbridos guardan en /XRefStm una tabla comprimida adicional
+            if (adicional := _entero(diccionario, b'XRefStm')) is not None and adicional not in visitadas:
+                visitadas.add(adicional)
+                self._leer_flujo_xref(adicional)
+            desplazamiento = _entero(diccionario, b'Prev')
+
+    def objeto(self, numero: int) -> bytes:
+        """Devuelve el contenido del objeto indicado, leyéndolo del fichero o de su flujo de objetos."""
+        entrada = self.entradas[numero]
+        if entrada[0] == 'desplazamiento':
+            return self._leer_objeto(entrada[1])
+        datos, diccionario = self._flujo_objetos(entrada[1])
+        primero, total = _entero(diccionario, b'First'), _entero(diccionario, b'N')
+        cabecera = [int(n) for n in datos[:primero].split()[:2 * total]]
+        desplazamientos = cabecera[1::2] + [len(datos) - primero]
+        indice = entrada[2]
+        return datos[primero + desplazamientos[indice]:primero + desplazamientos[indice + 1]]
+
+    def _leer_tabla(self, desplazamiento: int) -> bytes:
+        self.f.seek(desplazamiento)
+        datos = b''
+        while b'trailer' not in datos and len(datos) < 64 * MAX_OBJETO:
+            bloque = self.f.read(65536)
+            if not bloque:
+                break
+            datos += bloque
+        tabla, _, resto = datos.partition(b'trailer')
+
+        # Subsecciones "primer_objeto total" seguidas de una entrada "desplazamiento generación n|f" por objeto
+        elementos = tabla.split()
+        i = 0
+        while i + 1 < len(elementos):
+            primero, total = int(elementos[i]), int(elementos[i + 1])
+            i += 2
+            for numero in range(primero, primero + total):
+                desplazamiento_objeto, _, tipo = elementos[i:i + 3]
+                i += 3
+                if tipo == b'n':
+                    self.entradas.setdefault(numero, ('desplazamiento', int(desplazamiento_objeto)))
+        return resto.split(b'startxref')[0]
+
+    def _leer_flujo_xref(self, desplazamiento: int) -> bytes:
+        diccionario, datos = self._separar_flujo(self._leer_objeto(desplazamiento))
+        anchos = _lista(diccionario, b'W')
+        indices = _lista(diccionario, b'Index') or [0, _entero(diccionario, b'Size')]
+        tamano_fila = sum(anchos)
+        fila = 0
+        for primero, total in zip(indices[0::2], indices[1::2]):
+            for numero in range(primero, primero + total):
+                campos, posicion = [], fila * tamano_fila
+                for ancho in anchos:
+                    campos.append(int.from_bytes(datos[posicion:posicion + ancho], 'big') if ancho else None)
+                    posicion += ancho
+                fila += 1
+                tipo = 1 if campos[0] is None else campos[0]
+                if tipo == 1:
+                    self.entradas.setdefault(numero, ('desplazamiento', campos[1]))
+                elif tipo == 2:
+                    self.entradas.setdefault(numero, ('comprimido', campos[1], campos[2] or 0))
+        return diccionario
+
+    def _flujo_objetos(self, numero: int) -> Tuple[bytes, bytes]:
+        if numero not in self._flujos:
+            diccionario, datos = self._separar_flujo(self.objeto(numero))
+            self._flujos[numero] = (datos, diccionario)
+        return self._flujos[numero]
+
+    def _leer_objeto(self, desplazamiento: int) -> bytes:
+        self.f.seek(desplazamiento)
+        datos = self.f.read(MAX_OBJETO)
+        final = datos.find(b'endobj')
+        return datos[:final] if final >= 0 else datos
+
+    def _separar_flujo(self, objeto: bytes) -> Tuple[bytes, bytes]:
+        """Separa el diccionario de un objeto flujo y devuelve sus datos decodificados."""
+        inicio = objeto.find(b'stream')
+        diccionario = objeto[:inicio]
+        datos = objeto[inicio + 6:]
+        datos = datos[2:] if datos.startswith(b'\r\n') else datos[1:]
+        longitud = _entero(diccionario, b'Length')
+        datos = datos[:longitud] if longitud is not None else datos[:datos.rfind(b'endstream')]
+        if b'/FlateDecode' in diccionario:
+            datos = zlib.decompress(datos)
+        predictor = _entero(diccionario, b'Predictor') or 1
+        if predictor >= 10:
+            datos = _deshacer_predictor_png(datos, _entero(diccionario, b'Columns') or 1)
+        return diccionario, datos
+
+def _deshacer_predictor_png(datos: bytes, columnas: int) -> bytes:
+    """Revierte los filtros PNG por fila (un byte por muestra, como en las tablas xref)."""
+    resultado = bytearray()
+    anterior = bytearray(columnas)
+    for inicio in range(0, len(datos), columnas + 1):
+        filtro, fila = datos[inicio], bytearray(datos[inicio + 1:inicio + 1 + columnas])
+        for i in range(len(fila)):
+            izquierda = fila[i - 1] if i else 0
+            arriba, arriba_izquierda = anterior[i], (anterior[i - 1] if i else 0)
+            if filtro == 1:
+                fila[i] = (fila[i] + izquierda) & 0xFF
+            elif filtro == 2:
+                fila[i] = (fila[i] + arriba) & 0xFF
+            elif filtro == 3:
+                fila[i] = (fila[i] + (izquierda + arriba) // 2) & 0xFF
+            elif filtro == 4:
+                p = izquierda + arriba - arriba_izquierda
+                pa, pb, pc = abs(p - izquierda), abs(p - arriba), abs(p - arriba_izquierda)
+                prediccion = izquierda if pa <= pb and pa <= pc else (arriba if pb <= pc else arriba_izquierda)
+                fila[i] = (fila[i] + prediccion) & 0xFF
+        resultado += fila
+        anterior = fila
+    return bytes(resultado)
+
+def contar_paginas(ruta: Path) -> Optional[int]:
+    """Devuelve el /Count del árbol de páginas sin analizar el documento, o None si no se puede leer así."""
+    try:
+        with open(ruta, 'rb') as f:
+            # Un PDF linealizado declara su número de páginas al principio del fichero
+            if (linealizado := PATRON_LINEALIZADO.search(f.read(1024))):
+                return int(linealizado.group(1))
+
+            f.seek(0, 2)
+            tamano = f.tell()
+            f.seek(max(0, tamano - TAMANO_COLA))
+            startxref = PATRON_STARTXREF.findall(f.read())
+            if not startxref:
+                return None
+
+            lector = _LectorPdf(f)
+            lector.cargar_xref(int(startxref[-1]))
+            catalogo = lector.objeto(_referencia(lector.trailer, b'Root'))
+            paginas = lector.objeto(_referencia(catalogo, b'Pages'))
+            return _entero(paginas, b'Count')
+    except Exception:
+        return None
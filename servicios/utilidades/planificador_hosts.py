@@ -0,0 +1,96 @@
+"""
+Módulo para repartir las peticiones salientes por host: cubo de tokens, conexiones simultáneas y Retry-After.
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from nucleo.configuracion.configuracion import Config
+
+@dataclass
+class _EstadoHost:
+    tokens: float
+    actualizado: float
+    conexiones: threading.Semaphore
+    bloqueado_hasta: float = 0.0 # Fijado por un Retry-After del servidor
+
+class PlanificadorHosts:
+    """Limita el ritmo de peticiones a cada host, común a todo el proceso.
+
+    Cada host tiene un cubo de tokens (peticiones por segundo con una ráfaga máxima), un tope de
+    conexiones simultáneas y, tras un 429 o 503, una pausa hasta la fecha indicada en Retry-After.
+    reservar() no bloquea: devuelve cuánto hay que esperar, para que sirva también desde asyncio.
+    """
+
+    _compartido: Optional['PlanificadorHosts'] = None
+    _lock_compartido = threading.Lock()
+
+    def __init__(self, peticiones_por_segundo: float = 2.0, rafaga: int = 4,
+                 conexiones_por_host: int = 4, max_retry_after: float = 120):
+        self.peticiones_por_segundo = max(0.01, peticiones_por_segundo)
+        self.rafaga = max(1, rafaga)
+        self.conexiones_por_host = max(1, conexiones_por_host)
+        self.max_retry_after = max_retry_after
+        self._hosts: Dict[str, _EstadoHost] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def compartido(cls, config: Optional[Config] = None) -> 'PlanificadorHosts':
+        """Devuelve el planificador del proceso, creándolo con la configuración de scraping la primera vez."""
+        with cls._lock_compartido:
+            if cls._compartido is None:
+                scraping = (config or Config()).SCRAPING_CONFIG
+                cls._compartido = cls(scraping['peticiones_por_segundo_host'], scraping['rafaga_host'],
+                                      scraping['conexiones_por_host'], scraping['max_retry_after'])
+            return cls._compartido
+
+    def reservar(self, url: str) -> float:
+        """Consume un token del host de la URL y devuelve los segundos que hay que esperar antes de usarlo."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            estado = self._estado(host)
+            ahora = time.time()
+            estado.tokens = min(self.rafaga, estado.tokens + (ahora - estado.actualizado) * self.peticiones_por_segundo)
+            estado.actualizado = ahora
+            # Los tokens pueden quedar en negativo: cada petición reserva su hueco por orden de llegada
+            estado.tokens -= 1
+            return max(0.0, -estado.tokens / self.peticiones_por_segundo, estado.bloqueado_hasta - ahora)
+
+    def esperar(self, url: str) -> None:
+        """Versión bloqueante de reservar()."""
+        if (espera := self.reservar(url)) > 0:
+            time.sleep(espera)
+
+    def conexiones(self, url: str) -> threading.Semaphore:
+        """Semáforo que limita las peticiones simultáneas al host de la URL."""
+        with self._lock:
+            return self._estado(urlparse(url).netloc.lower()).conexiones
+
+    def penalizar(self, url: str, retry_after: Optional[str], por_defecto: float = 5.0) -> float:
+        """Pausa el host tras un 429/503 durante lo que indique Retry-After (segundos o fecha HTTP)."""
+        segundos = min(self.max_retry_after, _segundos_retry_after(retry_after, por_defecto))
+        with self._lock:
+            estado = self._estado(urlparse(url).netloc.lower())
+            estado.bloqueado_hasta = max(estado.bloqueado_hasta, time.time() + segundos)
+        return segundos
+
+    def _estado(self, host: str) -> _EstadoHost:
+        if host not in self._hosts:
+            self._hosts[host] = _EstadoHost(tokens=float(self.rafaga), actualizado=time.time(),
+                                            conexiones=threading.Semaphore(self.conexiones_por_host))
+        return self._hosts[host]
+
+def _segundos_retry_after(valor: Optional[str], por_defecto: float) -> float:
+    if not valor:
+        return por_defecto
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return por_defecto
@@ -0,0 +1,70 @@
+"""
+Módulo para revalidar descargas con peticiones HTTP condicionales (ETag y Last-Modified).
+"""
+
+import requests
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+
+from nucleo.base_datos.modelos import Database
+from servicios.utilidades.almacen_pdf import AlmacenPdf
+
+class ValidadoresHttp:
+    """Conserva por URL los validadores de la última respuesta completa y construye las cabeceras condicionales."""
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or Database()
+
+    def obtener(self, url: str) -> Optional[Dict]:
+        """Devuelve los validadores conocidos de la URL, o None si nunca se descargó."""
+        validador = self.db.obtener_validador_http(url)
+        if not validador:
+            return None
+        # Sin validadores propios se usan los del documento registrado con esa URL
+        if not validador['etag'] and not validador['ultima_modificacion']:
+            fecha = validador['documento_ultima_modificacion']
+            if isinstance(fecha, datetime):
+                validador['ultima_modificacion'] = format_datetime(fecha.astimezone(timezone.utc), usegmt=True)
+            validador['hash_sha256'] = validador['hash_sha256'] or validador['documento_hash_sha256']
+        if not (validador['etag'] or validador['ultima_modificacion']):
+            return None
+        return validador
+
+    def para_almacen(self, url: str, almacen: AlmacenPdf) -> Optional[Dict]:
+        """Validadores de la URL cuyo contenido sigue en el almacén: solo entonces un 304 ahorra la descarga."""
+        validador = self.obtener(url)
+        if not validador and (entrada := almacen.entrada_url(url)) and entrada['ultima_modificacion']:
+            validador = {'etag': None, 'ultima_modificacion': entrada['ultima_modificacion'], 'hash_sha256': entrada['hash']}
+        if validador and validador['hash_sha256'] and almacen.ruta_archivo(validador['hash_sha256']):
+            return validador
+        return None
+
+    def confirmar_almacen(self, url: str, validador: Dict, almacen: AlmacenPdf) -> Dict:
+        """Tras un 304, renueva la entrada de la URL en el almacén y la devuelve."""
+        almacen.indexar_url(url, validador['hash_sha256'], validador['ultima_modificacion'])
+        self.revalidado(url)
+        return {'hash': validador['hash_sha256'], 'ultima_modificacion': validador['ultima_modificacion']}
+
+    def cabeceras(self, validador: Optional[Dict]) -> Dict[str, str]:
+        """Cabeceras If-None-Match / If-Modified-Since para una petición condicional."""
+        if not validador:
+            return {}
+        cabeceras = {}
+        if validador.get('etag'):
+            cabeceras['If-None-Match'] = validador['etag']
+        if validador.get('ultima_modificacion'):
+            cabeceras['If-Modified-Since'] = validador['ultima_modificacion']
+        return cabeceras
+
+    def guardar(self, url: str, response: requests.Response, hash_sha256: str,
+                enlaces: Optional[List[str]] = None, requiere_navegador: Optional[bool] = None) -> None:
+        """Guarda los validadores de una respuesta 200, si el servidor los proporcionó."""
+        etag = response.headers.get('etag')
+        ultima_modificacion = response.headers.get('last-modified')
+        if etag or ultima_modificacion:
+            self.db.guardar_validador_http(url, etag, ultima_modificacion, hash_sha256, enlaces, requiere_navegador)
+
+    def revalidado(self, url: str) -> None:
+        """Anota una respuesta 304."""
+        self.db.registrar_revalidacion_http(url)